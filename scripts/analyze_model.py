@@ -15,6 +15,8 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "src"))
 
 from ml_engine.train import load_model, DIFFICULTY_LABELS
+from ml_engine.feature_registry import FEATURES, FEATURE_NAMES
+from ml_engine.feature_store import load_features, resolve_store
 
 
 def analyze_model_performance():
@@ -38,11 +40,7 @@ def analyze_model_performance():
     model = load_model(str(model_path))
     
     # Feature names
-    feature_names = [
-        'Max Stretch', 'Max Chord Size', 'Note Density',
-        'Left Hand Activity', 'Avg Tempo', 'Dynamic Range',
-        'Polyphony', 'Octave Jumps', 'Thirds Freq', 'Polyrhythm'
-    ]
+    feature_names = [FEATURES[name].label for name in FEATURE_NAMES]
     
     # Feature importances
     print("\n" + "="*70)
@@ -81,21 +79,16 @@ def analyze_model_performance():
     
     features_csv = project_root / "data" / "processed" / "features_all.csv"
     
-    if features_csv.exists():
-        df = pd.read_csv(features_csv)
+    if features_csv.exists() or resolve_store(features_csv) is not None:
+        df = load_features(features_csv)
         
         print(f"\n✓ Total files: {len(df)}")
-        print(f"✓ Total features: 10")
+        print(f"✓ Total features: {len(FEATURE_NAMES)}")
         
         # Feature statistics
         print("\nFeature Statistics:\n")
         
-        feature_cols = [
-            'max_stretch', 'max_chord_size', 'note_density',
-            'left_hand_activity', 'avg_tempo', 'dynamic_range',
-            'poly_voice_count', 'octave_jump_frequency',
-            'thirds_frequency', 'polyrhythm_score'
-        ]
+        feature_cols = FEATURE_NAMES
         
         stats = df[feature_cols].describe()
         print(stats.to_string())
@@ -124,7 +117,8 @@ def analyze_model_performance():
         print("FEATURE DISTRIBUTIONS")
         print("="*70)
         
-        fig, axes = plt.subplots(5, 2, figsize=(15, 18))
+        n_rows = (len(feature_cols) + 1) // 2
+        fig, axes = plt.subplots(n_rows, 2, figsize=(15, 3.6 * n_rows))
         axes = axes.flatten()
         
         for i, (col, name) in enumerate(zip(feature_cols, feature_names)):
@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+import argparse
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.ml_engine.feature_extract import backfill_features
+from src.ml_engine.feature_registry import FEATURE_NAMES
+from src.ml_engine.corpus_scan import CorpusManifest, DEFAULT_MANIFEST_PATH, scan_midi_files
+from src.ml_engine.note_cache import NoteCache, DEFAULT_NOTE_CACHE_PATH
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute missing or outdated feature columns of an existing feature table in place")
+    parser.add_argument("--features", type=str, default="data/processed/features_all.csv",
+                        help="Features CSV (its .fstore is rebuilt too) or feature store")
+    parser.add_argument("--input", type=str, default="data/raw_midi",
+                        help="MIDI library the table was extracted from (directory or archive)")
+    parser.add_argument("--backend", type=str, default=None, choices=["music21", "native"],
+                        help="MIDI parser backend (default: the one the table was extracted with)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of parallel workers")
+    parser.add_argument("--note-cache", type=str, default=DEFAULT_NOTE_CACHE_PATH,
+                        help="Parsed-note cache; files in it are not re-parsed")
+    parser.add_argument("--no-note-cache", action="store_true", help="Do not use or keep parsed notes")
+    parser.add_argument("--manifest", type=str, default=DEFAULT_MANIFEST_PATH,
+                        help="Corpus manifest (path, size, mtime, hash); unchanged files are not rehashed")
+    parser.add_argument("--no-manifest", action="store_true", help="Do not use a corpus manifest")
+    parser.add_argument("--recompute", type=str, nargs="+", default=[], choices=FEATURE_NAMES,
+                        metavar="FEATURE", help="Recompute these features even if up to date")
+
+    args = parser.parse_args()
+
+    features_path = Path(args.features)
+    input_dir = Path(args.input)
+    for path in (features_path, input_dir):
+        if not path.exists():
+            print(f"Error: '{path}' does not exist.")
+            return
+
+    note_cache = None
+    if not args.no_note_cache:
+        note_cache = NoteCache(args.note_cache)
+    manifest = None
+    if not args.no_manifest:
+        manifest = CorpusManifest(args.manifest)
+
+    print(f"Backfilling {features_path} from {input_dir}...")
+    try:
+        backfill_features(
+            features_path,
+            scan_midi_files(input_dir, manifest=manifest),
+            backend=args.backend,
+            note_cache=note_cache,
+            manifest=manifest,
+            n_jobs=args.workers,
+            recompute=args.recompute,
+            root=input_dir
+        )
+    finally:
+        if note_cache is not None:
+            note_cache.close()
+        if manifest is not None:
+            manifest.close()
+    print("Backfill complete.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Feature Extraction Benchmark
+Compares the per-analyzer feature path with the fused single-pass extractor
+and the vectorized NoteArray analyzers, and optionally the cost of
+extracting only a subset of the features (--subset).
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+import music21
+
+from ml_engine.feature_extract import FEATURE_ANALYZERS, extract_features_from_stream
+from ml_engine.note_array import ANALYZERS, NoteArray, extract_features_from_note_array
+
+
+def collect_midi_files(input_dir, features_csv=None, limit=None):
+    """
+    Collect MIDI files to benchmark.
+
+    If features_csv is given, only files listed in its midi_filename column
+    are used, so the benchmark runs on the same corpus as features_all.csv.
+    """
+    files = sorted(list(input_dir.glob("*.mid")) + list(input_dir.glob("*.midi")))
+
+    if features_csv:
+        known = set(pd.read_csv(features_csv, usecols=['midi_filename'])['midi_filename'])
+        files = [f for f in files if f.name in known]
+
+    if limit:
+        files = files[:limit]
+
+    return files
+
+
+def benchmark_file(midi_path, repeats, subset=None):
+    """
+    Time the extraction paths on one parsed file.
+
+    The vectorized time covers featurizing an already-built NoteArray;
+    building it from the stream is a one-off conversion. The subset time
+    includes that conversion, limited to the passes the subset reads.
+
+    Returns:
+        tuple: (per-analyzer seconds, fused seconds, vectorized seconds,
+                subset seconds or None, parity ok)
+    """
+    stream = music21.converter.parse(str(midi_path), forceSource=True, storePickle=False)
+    notes = NoteArray.from_stream(stream)
+
+    legacy_times = []
+    fused_times = []
+    vectorized_times = []
+    subset_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        legacy = {name: analyzer(stream) for name, analyzer in FEATURE_ANALYZERS.items()}
+        legacy_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        fused = extract_features_from_stream(stream)
+        fused_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        vectorized = extract_features_from_note_array(NoteArray(notes.notes, notes.tempos, notes.dynamics,
+                                                                notes.duration, notes.n_parts))
+        vectorized_times.append(time.perf_counter() - start)
+
+        if subset:
+            start = time.perf_counter()
+            partial = extract_features_from_stream(stream, features=subset)
+            subset_times.append(time.perf_counter() - start)
+
+    same = legacy == fused == vectorized
+    if subset:
+        same = same and partial == {name: fused[name] for name in subset}
+    return (min(legacy_times), min(fused_times), min(vectorized_times),
+            min(subset_times) if subset else None, same)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-analyzer, fused and vectorized feature extraction")
+    parser.add_argument("--input", type=str, default="data/raw_midi", help="Input directory containing MIDI files")
+    parser.add_argument("--features-csv", type=str, default=None,
+                        help="Only benchmark files listed in this features CSV (e.g. data/processed/features_all.csv)")
+    parser.add_argument("--limit", type=int, default=200, help="Maximum number of files to benchmark (0 = all)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing repeats per file (best is kept)")
+    parser.add_argument("--subset", type=str, nargs="+", default=None, choices=list(ANALYZERS), metavar="FEATURE",
+                        help="Also time extracting only these features (e.g. max_stretch max_chord_size note_density)")
+    args = parser.parse_args()
+
+    input_dir = Path(args.input)
+    if not input_dir.exists():
+        print(f"Error: Input directory '{input_dir}' does not exist.")
+        return
+
+    files = collect_midi_files(input_dir, args.features_csv, args.limit or None)
+    if not files:
+        print(f"Error: No MIDI files found in '{input_dir}'.")
+        return
+
+    print("=" * 70)
+    print("FEATURE EXTRACTION BENCHMARK")
+    print("=" * 70)
+    print(f"  📊 Files: {len(files)}  |  Repeats: {args.repeats}")
+
+    legacy_times = []
+    fused_times = []
+    vectorized_times = []
+    subset_times = []
+    mismatches = []
+
+    for midi_path in files:
+        try:
+            legacy, fused, vectorized, subset, same = benchmark_file(midi_path, args.repeats, args.subset)
+        except Exception as e:
+            print(f"  ⚠ Skipped {midi_path.name}: {e}")
+            continue
+        legacy_times.append(legacy)
+        fused_times.append(fused)
+        vectorized_times.append(vectorized)
+        subset_times.append(subset)
+        if not same:
+            mismatches.append(midi_path.name)
+
+    if not legacy_times:
+        print("\n❌ No files could be benchmarked.")
+        return
+
+    legacy_times = np.array(legacy_times)
+    fused_times = np.array(fused_times)
+    vectorized_times = np.array(vectorized_times)
+    speedups = legacy_times / np.maximum(fused_times, 1e-9)
+
+    columns = [legacy_times, fused_times, vectorized_times]
+    header = f"\n{'':<18}{'per-analyzer':>14}{'fused':>14}{'vectorized':>14}"
+    if args.subset:
+        subset_times = np.array(subset_times)
+        columns.append(subset_times)
+        header += f"{'subset':>14}"
+    print(header)
+    print(f"{'Mean (ms/file)':<18}" + "".join(f"{t.mean() * 1000:>14.2f}" for t in columns))
+    print(f"{'Median (ms/file)':<18}" + "".join(f"{np.median(t) * 1000:>14.2f}" for t in columns))
+    print(f"{'Total (s)':<18}" + "".join(f"{t.sum():>14.2f}" for t in columns))
+
+    print(f"\n  ⚡ Median per-file speedup (fused): {np.median(speedups):.2f}x")
+    print(f"  ⚡ Overall speedup (fused): {legacy_times.sum() / fused_times.sum():.2f}x")
+    print(f"  ⚡ Overall speedup (vectorized): {legacy_times.sum() / max(vectorized_times.sum(), 1e-9):.2f}x")
+    if args.subset:
+        print(f"  ⚡ Subset ({len(args.subset)}/{len(ANALYZERS)} features) vs fused: "
+              f"{fused_times.sum() / max(subset_times.sum(), 1e-9):.2f}x")
+
+    if mismatches:
+        print(f"\n❌ {len(mismatches)} files produced different features:")
+        for name in mismatches[:10]:
+            print(f"   - {name}")
+        sys.exit(1)
+
+    print(f"\n✓ Fused and vectorized features identical on all {len(legacy_times)} files")
+
+
+if __name__ == "__main__":
+    main()
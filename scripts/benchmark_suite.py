@@ -0,0 +1,242 @@
+"""
+Feature Extraction Benchmark Suite
+Times MIDI parsing, every analyze_* function and extract_features_batch on a
+deterministic synthetic corpus, writes the results as JSON and compares them
+with a stored baseline to flag regressions.
+"""
+
+import sys
+import io
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import music21
+
+from ml_engine.feature_extract import (
+    FEATURE_ANALYZERS,
+    extract_features_batch,
+    extract_features_from_stream
+)
+from ml_engine.midi_reader import read_midi
+from ml_engine.note_array import NoteArray, extract_features_from_note_array
+from synthetic_midi import write_corpus
+
+
+# One baseline per corpus size, since their totals are not comparable
+DEFAULT_BASELINE = "data/benchmarks/baseline.json"
+DEFAULT_QUICK_BASELINE = "data/benchmarks/baseline_quick.json"
+DEFAULT_OUTPUT = "data/benchmarks/latest.json"
+
+
+def best_time(func, repeats):
+    """Best wall-clock time of func() over repeats runs, and its last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def time_single_file_stages(files, repeats):
+    """
+    Time parsing and each analyzer per file.
+
+    Returns:
+        dict: metric name -> list of per-file seconds
+    """
+    stages = {}
+
+    def record(name, seconds):
+        stages.setdefault(name, []).append(seconds)
+
+    for path in files:
+        seconds, stream = best_time(
+            lambda: music21.converter.parse(path, forceSource=True, storePickle=False), repeats)
+        record('parse.music21', seconds)
+        seconds, _ = best_time(lambda: read_midi(path), repeats)
+        record('parse.native', seconds)
+
+        for name, analyzer in FEATURE_ANALYZERS.items():
+            seconds, _ = best_time(lambda: analyzer(stream), repeats)
+            record(f'analyze.{analyzer.__name__}', seconds)
+
+        seconds, _ = best_time(lambda: extract_features_from_stream(stream), repeats)
+        record('extract.fused', seconds)
+        notes = NoteArray.from_stream(stream)
+        seconds, _ = best_time(
+            lambda: extract_features_from_note_array(NoteArray(notes.notes, notes.tempos, notes.dynamics,
+                                                               notes.duration, notes.n_parts)),
+            repeats)
+        record('extract.vectorized', seconds)
+
+    return stages
+
+
+def time_batch(files, worker_counts, backends):
+    """
+    Time extract_features_batch end to end (no cache, no output file).
+
+    Returns:
+        dict: metric name -> seconds
+    """
+    timings = {}
+    for backend in backends:
+        for workers in worker_counts:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                start = time.perf_counter()
+                df = extract_features_batch(files, n_jobs=workers, backend=backend,
+                                            save_interval=len(files) + 1)
+                seconds = time.perf_counter() - start
+            if len(df) != len(files):
+                print(f"  ⚠ batch.{backend}.workers={workers}: {len(df)}/{len(files)} files extracted")
+            timings[f'batch.{backend}.workers={workers}'] = seconds
+    return timings
+
+
+def compare_with_baseline(metrics, baseline, threshold, min_seconds):
+    """
+    Compare metrics with a baseline run.
+
+    A metric regresses when it is more than `threshold` slower (relative)
+    and at least `min_seconds` slower (absolute), so tiny timings do not
+    flap on noise.
+
+    Returns:
+        list: (name, baseline seconds, current seconds, ratio, regressed) rows
+    """
+    rows = []
+    for name, current in metrics.items():
+        if name not in baseline:
+            continue
+        previous = baseline[name]
+        ratio = current / max(previous, 1e-9)
+        regressed = ratio > 1 + threshold and current - previous > min_seconds
+        rows.append((name, previous, current, ratio, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark feature extraction on a synthetic MIDI corpus")
+    parser.add_argument("--quick", action="store_true", help="Use the small corpus (for CI)")
+    parser.add_argument("--copies", type=int, default=1, help="Copies of the corpus grid (different seeds)")
+    parser.add_argument("--repeats", type=int, default=2, help="Timing repeats per file (best is kept)")
+    parser.add_argument("--workers", type=str, default="1,2,4", help="Comma-separated worker counts for the batch")
+    parser.add_argument("--output", type=str, default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help=f"Baseline JSON to compare against (default: {DEFAULT_BASELINE}, "
+                             f"or {DEFAULT_QUICK_BASELINE} with --quick)")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown that counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.01,
+                        help="Ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+
+    print("=" * 70)
+    print("FEATURE EXTRACTION BENCHMARK SUITE")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = write_corpus(corpus_dir, quick=args.quick, copies=args.copies)
+        files = [entry['path'] for entry in corpus]
+        print(f"  🎹 Corpus: {len(files)} synthetic files "
+              f"({sum(e['bytes'] for e in corpus) / 1024:.0f} KB, "
+              f"{sum(e['events'] for e in corpus)} events)")
+
+        print(f"\n⏱️  Timing single-file stages (best of {args.repeats})...")
+        stages = time_single_file_stages(files, args.repeats)
+
+        print(f"⏱️  Timing extract_features_batch at {worker_counts} workers...")
+        batch = time_batch(files, worker_counts, ['music21', 'native'])
+
+    # Stage metrics are summed over the corpus, so they compare like batch wall times
+    metrics = {name: float(np.sum(times)) for name, times in stages.items()}
+    metrics.update(batch)
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'music21': str(music21.VERSION_STR),
+            'quick': args.quick,
+            'copies': args.copies,
+            'repeats': args.repeats,
+            'files': len(files)
+        },
+        'corpus': [{k: v for k, v in entry.items() if k != 'path'} for entry in corpus],
+        'metrics': metrics,
+        'per_file_median': {name: float(np.median(times)) for name, times in stages.items()}
+    }
+
+    print(f"\n{'Metric':<44}{'Total (s)':>12}{'Median/file (ms)':>18}")
+    print("-" * 74)
+    for name, seconds in metrics.items():
+        median = results['per_file_median'].get(name)
+        median_text = f"{median * 1000:>18.2f}" if median is not None else f"{'':>18}"
+        print(f"{name:<44}{seconds:>12.3f}{median_text}")
+
+    for name in batch:
+        print(f"  ⚡ {name}: {len(files) / max(batch[name], 1e-9):.1f} files/sec")
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(results, indent=2))
+    print(f"\n✓ Results saved to {output_path}")
+
+    exit_code = 0
+    baseline_path = Path(args.baseline or (DEFAULT_QUICK_BASELINE if args.quick else DEFAULT_BASELINE))
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text())
+        same_corpus = all(baseline['meta'].get(key) == results['meta'][key]
+                          for key in ('quick', 'copies', 'files'))
+        if not same_corpus:
+            print(f"\n⚠ Baseline {baseline_path} was recorded on a different corpus; "
+                  f"rerun with matching --quick/--copies to compare")
+        else:
+            rows = compare_with_baseline(metrics, baseline['metrics'], args.threshold, args.min_seconds)
+            print(f"\n📊 Comparison with baseline ({baseline['meta'].get('timestamp')}, "
+                  f"{baseline['meta'].get('platform')}):")
+            print(f"{'Metric':<44}{'Baseline':>10}{'Current':>10}{'Ratio':>9}")
+            print("-" * 73)
+            for name, previous, current, ratio, regressed in rows:
+                flag = "  ❌" if regressed else ""
+                print(f"{name:<44}{previous:>10.3f}{current:>10.3f}{ratio:>8.2f}x{flag}")
+            regressions = [row for row in rows if row[4]]
+            if regressions:
+                print(f"\n❌ {len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+                exit_code = 1
+            else:
+                print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+    elif not args.save_baseline:
+        print(f"\nℹ️  No baseline at {baseline_path}; run with --save-baseline to create one")
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"✓ Baseline saved to {baseline_path}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Backend Parity Check
+Compares features from the native MIDI backend with the music21 backend.
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add src and scripts to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ml_engine.feature_extract import extract_features_from_midi
+from synthetic_midi import synthetic_midi
+
+
+# Allowed difference per feature as (relative, absolute); a value passes if
+# it is within either. Counts, maxima and note shares must match exactly.
+# The rest were measured on music21's test MIDI files and the synthetic
+# corpus, with some headroom:
+# - note_density, avg_tempo: music21 re-times notes (and tempo marks) in some
+#   files, which moves the end of the piece (up to 1.2% and 0.02% apart)
+# - octave_jump_frequency, thirds_frequency: elements that start together in
+#   one part come out of music21 in its insertion order, the native reader
+#   keeps file order, and swapping two of them changes the intervals between
+#   successive elements. With ties put in one order on both sides they match
+#   exactly, except in the files music21 re-times. Compared in absolute
+#   terms, since a few swaps are a large relative change to a small share
+#   (up to 0.061 and 0.018 apart)
+EXACT = (1e-6, 0.0)
+TOLERANCES = {
+    'max_stretch': EXACT,
+    'max_chord_size': EXACT,
+    'note_density': (0.02, 0.0),
+    'left_hand_activity': EXACT,
+    'avg_tempo': (1e-3, 0.0),
+    'dynamic_range': EXACT,
+    'poly_voice_count': EXACT,
+    'octave_jump_frequency': (0.0, 0.07),
+    'thirds_frequency': (0.0, 0.025),
+    'polyrhythm_score': EXACT,
+}
+
+
+def relative_difference(a, b):
+    return abs(a - b) / max(abs(a), abs(b), 1e-9)
+
+
+def within_tolerance(a, b, tolerance):
+    relative, absolute = tolerance
+    return abs(a - b) <= absolute or relative_difference(a, b) <= relative
+
+
+def tolerance_for(name, override=None):
+    """Per-feature tolerance, or override as a relative tolerance for every feature."""
+    if override is not None:
+        return (override, 0.0)
+    return TOLERANCES.get(name, EXACT)
+
+
+def describe_tolerance(tolerance):
+    relative, absolute = tolerance
+    return f"±{absolute:g}" if absolute else f"{relative:.2g} rel"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare native and music21 feature extraction backends")
+    parser.add_argument("--input", type=str, default="data/raw_midi", help="Input directory containing MIDI files")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Compare this many synthetic MIDI files instead of --input")
+    parser.add_argument("--limit", type=int, default=200, help="Maximum number of files to compare (0 = all)")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Maximum relative difference allowed for every feature "
+                             "(default: per-feature tolerances, see TOLERANCES)")
+    parser.add_argument("--verbose", action="store_true", help="Print every differing value")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_dir = Path(args.input)
+        if args.synthetic:
+            input_dir = Path(tmp_dir)
+            for i in range(args.synthetic):
+                (input_dir / f"piece_{i:03d}.mid").write_bytes(
+                    synthetic_midi(seed=i, n_events=400, density=2 + i % 4, max_chord=1 + i % 5))
+        compare_backends(input_dir, args)
+
+
+def compare_backends(input_dir, args):
+    """Extract every file in input_dir with both backends and compare the features."""
+    if not input_dir.exists():
+        print(f"Error: Input directory '{input_dir}' does not exist.")
+        return
+
+    files = sorted(list(input_dir.glob("*.mid")) + list(input_dir.glob("*.midi")))
+    if args.limit:
+        files = files[:args.limit]
+    if not files:
+        print(f"Error: No MIDI files found in '{input_dir}'.")
+        return
+
+    print("=" * 70)
+    print("BACKEND PARITY CHECK (native vs music21)")
+    print("=" * 70)
+
+    differences = {}
+    failures = []
+    only_failed = {'music21': 0, 'native': 0}
+    times = {'music21': 0.0, 'native': 0.0}
+
+    for midi_path in files:
+        results = {}
+        for backend in times:
+            start = time.perf_counter()
+            results[backend] = extract_features_from_midi(str(midi_path), backend=backend)
+            times[backend] += time.perf_counter() - start
+
+        reference, native = results['music21'], results['native']
+        if reference is None or native is None:
+            if reference is None and native is not None:
+                only_failed['music21'] += 1
+            elif native is None and reference is not None:
+                only_failed['native'] += 1
+            continue
+
+        for name, value in reference.items():
+            tolerance = tolerance_for(name, args.tolerance)
+            diff = relative_difference(value, native[name])
+            differences.setdefault(name, []).append((diff, abs(value - native[name])))
+            if not within_tolerance(value, native[name], tolerance):
+                failures.append((midi_path.name, name, value, native[name]))
+            elif args.verbose and diff > 0:
+                print(f"  {midi_path.name}: {name} {value} vs {native[name]}")
+
+    if not differences:
+        print("\n❌ No files could be compared.")
+        return
+
+    print(f"\n  📊 Compared {len(next(iter(differences.values())))} files\n")
+    print(f"{'Feature':<26}{'exact':>8}{'median rel':>12}{'max rel':>10}{'max abs':>10}{'allowed':>12}")
+    for name, diffs in differences.items():
+        diffs = np.array(diffs)
+        print(f"{name:<26}{np.mean(diffs[:, 0] == 0):>8.1%}{np.median(diffs[:, 0]):>12.4f}"
+              f"{diffs[:, 0].max():>10.4f}{diffs[:, 1].max():>10.4g}{describe_tolerance(tolerance_for(name, args.tolerance)):>12}")
+
+    print(f"\n  ⏱  music21: {times['music21']:.2f}s  |  native: {times['native']:.2f}s"
+          f"  ({times['music21'] / max(times['native'], 1e-9):.1f}x faster)")
+    for backend, count in only_failed.items():
+        if count:
+            print(f"  ⚠ {count} files failed only with the {backend} backend")
+
+    if failures:
+        print(f"\n❌ {len(failures)} values differ by more than their tolerance:")
+        for name, feature, reference_value, native_value in failures[:20]:
+            print(f"   - {name}: {feature} music21={reference_value} native={native_value}")
+        sys.exit(1)
+
+    print("\n✓ All features within tolerance of the music21 backend")
+
+
+if __name__ == "__main__":
+    main()
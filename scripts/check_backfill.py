@@ -0,0 +1,151 @@
+"""
+Backfill Check
+Extracts a small synthetic corpus, blanks some feature values, backfills
+the table (as a CSV and as a feature store) and checks that what is read
+back matches a full extraction. A throwaway feature is registered first,
+so adding a new column is covered too, on each parser backend.
+"""
+
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add src and scripts to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from ml_engine.feature_extract import BACKENDS, backfill_features, extract_features_batch
+from ml_engine.feature_registry import FEATURES, FEATURE_NAMES, FeatureSpec, read_table_versions
+from ml_engine.feature_store import FeatureStore, STORE_SUFFIX, write_feature_store
+from ml_engine.note_array import register_analyzer
+from synthetic_midi import synthetic_midi
+
+
+# Registered for this check only: a column no existing table has
+NEW_FEATURE = 'check_mean_pitch'
+
+
+def register_new_feature():
+    FEATURES[NEW_FEATURE] = FeatureSpec(NEW_FEATURE, '1', 'float', 0, 'Mean Pitch')
+    FEATURE_NAMES.append(NEW_FEATURE)
+
+    @register_analyzer(NEW_FEATURE, inputs=('notes',))
+    def mean_pitch(notes):
+        pitches = notes.notes['pitch'][notes.notes['pitch'] >= 0]
+        return float(pitches.mean()) if len(pitches) else 0.0
+
+
+def read_table(path):
+    if path.suffix == STORE_SUFFIX:
+        return FeatureStore(path).to_dataframe(widen=True)
+    import pandas as pd
+    return pd.read_csv(path)
+
+
+def compare(table, reference, tolerance):
+    """Feature columns of table that differ from reference (float32 precision)."""
+    table = table.set_index('midi_filename').loc[reference['midi_filename']]
+    differing = []
+    for name in FEATURE_NAMES:
+        expected = reference[name].to_numpy(dtype=np.float64)
+        actual = table[name].to_numpy(dtype=np.float64)
+        if not np.allclose(actual, expected, rtol=tolerance, atol=tolerance, equal_nan=False):
+            differing.append(name)
+    return differing
+
+
+def check_backend(backend, midi_files, unreadable_files, tmp_dir, tolerance):
+    """Backfill every case with one backend; returns failure messages."""
+    failures = []
+    reference = extract_features_batch(midi_files, n_jobs=1, backend=backend)
+    if NEW_FEATURE not in reference.columns or reference[NEW_FEATURE].isna().any():
+        return [f"{backend}: a full extraction does not compute {NEW_FEATURE}"]
+    blanked = reference.copy()
+    blanked.loc[blanked.index[::3], FEATURE_NAMES[0]] = np.nan
+    original = reference.drop(columns=[NEW_FEATURE])
+
+    # (name, table to start from, features to recompute)
+    cases = [
+        ('missing values', blanked, []),
+        ('new column', original, []),
+        ('recompute', reference, [name for name in FEATURE_NAMES
+                                  if reference[name].dtype.kind in 'iu'][:1]),
+    ]
+    for case, table, recompute in cases:
+        for suffix in ('.csv', STORE_SUFFIX):
+            path = tmp_dir / f"features_{backend}_{case.replace(' ', '_')}{suffix}"
+            if suffix == '.csv':
+                table.to_csv(path, index=False)
+            else:
+                write_feature_store(table, path)
+            label = f"{backend}, {case} ({suffix.lstrip('.')})"
+            try:
+                written = backfill_features(path, midi_files, backend=backend, n_jobs=1, recompute=recompute)
+                differing = compare(read_table(path), reference, tolerance)
+            except Exception as e:
+                failures.append(f"{label}: {type(e).__name__}: {e}")
+                continue
+            if differing:
+                failures.append(f"{label}: {', '.join(differing)} differ from a full extraction")
+            empty = [name for name, count in written.items() if not count]
+            if empty:
+                failures.append(f"{label}: no values written for {', '.join(empty)}")
+
+    # Every file fails to parse: the new column must not be recorded as current
+    path = tmp_dir / f"features_{backend}_unreadable.csv"
+    original.to_csv(path, index=False)
+    label = f"{backend}, unreadable files"
+    try:
+        backfill_features(path, unreadable_files, backend=backend, n_jobs=1)
+    except Exception as e:
+        failures.append(f"{label}: {type(e).__name__}: {e}")
+    else:
+        if NEW_FEATURE in read_table_versions(path)['features']:
+            failures.append(f"{label}: {NEW_FEATURE} marked up to date without any values")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that backfilled feature tables match a full extraction")
+    parser.add_argument("--files", type=int, default=8, help="Synthetic MIDI files to generate")
+    parser.add_argument("--backend", type=str, nargs="+", default=list(BACKENDS), choices=list(BACKENDS),
+                        help="MIDI parser backends to check (default: all)")
+    parser.add_argument("--tolerance", type=float, default=1e-5, help="Allowed relative difference")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("BACKFILL CHECK")
+    print("=" * 70)
+
+    register_new_feature()
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        midi_dir = tmp_dir / "midi"
+        unreadable_dir = tmp_dir / "unreadable"
+        midi_dir.mkdir()
+        unreadable_dir.mkdir()
+        for i in range(args.files):
+            name = f"piece_{i:03d}.mid"
+            (midi_dir / name).write_bytes(synthetic_midi(seed=i, n_events=300, density=4, max_chord=4))
+            (unreadable_dir / name).write_bytes(b"not a midi file")
+        midi_files = sorted(str(path) for path in midi_dir.glob("*.mid"))
+        unreadable_files = sorted(str(path) for path in unreadable_dir.glob("*.mid"))
+
+        for backend in args.backend:
+            failures.extend(check_backend(backend, midi_files, unreadable_files, tmp_dir, args.tolerance))
+
+    if failures:
+        print(f"\n❌ {len(failures)} backfill checks failed:")
+        for failure in failures:
+            print(f"   • {failure}")
+        sys.exit(1)
+    print("\n✓ Backfilled tables match a full extraction")
+
+
+if __name__ == "__main__":
+    main()
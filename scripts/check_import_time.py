@@ -0,0 +1,141 @@
+"""
+CLI Cold-Start Budget Check
+Runs src/main.py in fresh interpreters (--help and the rule-based fallback
+path) and fails if a run is over its time budget, slower than the stored
+baseline, or imports a heavy library it does not need.
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# Add scripts to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(Path(__file__).parent))
+
+from synthetic_midi import synthetic_midi
+
+
+MAIN = project_root / "src" / "main.py"
+DEFAULT_BASELINE = "data/benchmarks/import_time_baseline.json"
+
+HEAVY = ('music21', 'xgboost', 'sklearn', 'pandas')
+
+# name -> (main.py arguments, libraries that must not be imported, default
+# budget in seconds). {midi} is a small synthetic file; the model path
+# does not exist, so the fallback classifies it.
+SCENARIOS = {
+    'help': (['--help'], HEAVY, 0.5),
+    'fallback.native': (['--midi_file', '{midi}', '--model', '{no_model}', '--backend', 'native'],
+                        HEAVY, 0.75),
+    'fallback.music21': (['--midi_file', '{midi}', '--model', '{no_model}', '--backend', 'music21'],
+                         ('xgboost', 'sklearn', 'pandas'), 2.0),
+}
+
+
+def run_cold(args, repeats):
+    """
+    Run main.py with -X importtime in fresh interpreters.
+
+    Returns:
+        tuple: (best wall-clock seconds, set of top-level modules imported)
+    """
+    best = float('inf')
+    modules = set()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime', str(MAIN)] + args,
+                                 capture_output=True, text=True, cwd=project_root)
+        best = min(best, time.perf_counter() - start)
+        if process.returncode != 0:
+            raise RuntimeError(f"main.py {' '.join(args)} failed:\n{process.stderr[-2000:]}")
+        # Lines look like "import time:  self [us] | cumulative | name"
+        modules = {line.rsplit('|', 1)[-1].strip().split('.')[0]
+                   for line in process.stderr.splitlines() if line.startswith('import time:')}
+    return best, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the analysis CLI's cold-start time and imports")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per scenario (best is kept)")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Multiply every time budget (e.g. 2 on a slow CI machine)")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="Relative slowdown over the baseline that fails (0.5 = 50%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("CLI COLD-START CHECK")
+    print("=" * 70)
+
+    failures = []
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        midi_path = Path(tmp_dir) / "piece.mid"
+        midi_path.write_bytes(synthetic_midi(seed=0, n_events=200, density=4, max_chord=4))
+        paths = {'midi': str(midi_path), 'no_model': str(Path(tmp_dir) / "no_model.pkl")}
+
+        print(f"{'Scenario':<20}{'Seconds':>9}{'Budget':>9}  Heavy imports")
+        print("-" * 70)
+        for name, (scenario_args, forbidden, budget) in SCENARIOS.items():
+            budget *= args.budget_scale
+            seconds, modules = run_cold([arg.format(**paths) for arg in scenario_args], args.repeats)
+            metrics[name] = seconds
+            heavy = sorted(module for module in HEAVY if module in modules)
+            unexpected = [module for module in heavy if module in forbidden]
+            flag = "" if seconds <= budget and not unexpected else "  ❌"
+            print(f"{name:<20}{seconds:>9.3f}{budget:>9.2f}  {', '.join(heavy) or '-'}{flag}")
+            if seconds > budget:
+                failures.append(f"{name}: {seconds:.3f}s is over its {budget:.2f}s budget")
+            if unexpected:
+                failures.append(f"{name}: imports {', '.join(unexpected)}")
+
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text())
+        print(f"\n📊 Comparison with baseline ({baseline['meta'].get('timestamp')}, "
+              f"{baseline['meta'].get('platform')}):")
+        for name, current in metrics.items():
+            previous = baseline['metrics'].get(name)
+            if previous is None:
+                continue
+            ratio = current / max(previous, 1e-9)
+            regressed = ratio > 1 + args.threshold and current - previous > args.min_seconds
+            print(f"   {name:<20}{previous:>9.3f}{current:>9.3f}{ratio:>8.2f}x{'  ❌' if regressed else ''}")
+            if regressed:
+                failures.append(f"{name}: {ratio:.2f}x slower than the baseline")
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count()
+            },
+            'metrics': metrics
+        }, indent=2))
+        print(f"\n✓ Baseline saved to {baseline_path}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} cold-start checks failed:")
+        for failure in failures:
+            print(f"   • {failure}")
+        sys.exit(1)
+    print("\n✓ Cold start within budget")
+
+
+if __name__ == "__main__":
+    main()
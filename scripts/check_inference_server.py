@@ -0,0 +1,78 @@
+"""
+Inference Server Check
+Starts an InferenceService in-process and sends requests through the
+Flask test client, checking the status code of valid and malformed ones.
+"""
+
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add src and scripts to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from inference_server import InferenceService, create_app
+from ml_engine.feature_registry import FEATURE_NAMES
+from synthetic_midi import synthetic_midi
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the inference server's responses to valid and bad requests")
+    parser.add_argument("--model", type=str, default=None,
+                        help="Model to serve (default: none, so the rule-based fallback answers)")
+    parser.add_argument("--backend", type=str, default="native", choices=["music21", "native"],
+                        help="MIDI parser backend")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("INFERENCE SERVER CHECK")
+    print("=" * 70)
+
+    midi = synthetic_midi(seed=0, n_events=200, density=4, max_chord=4)
+    name = FEATURE_NAMES[0]
+    # (description, path, request arguments, expected status)
+    cases = [
+        ('features', '/api/predict', {'json': {'features': {name: 0.5}}}, 200),
+        ('feature list', '/api/predict', {'json': {'features': [{name: 0.5}, {name: 2}]}}, 200),
+        ('numeric string', '/api/predict', {'json': {'features': {name: '0.5'}}}, 200),
+        ('null feature', '/api/predict', {'json': {'features': {name: None}}}, 200),
+        ('non-numeric feature', '/api/predict', {'json': {'features': {name: 'abc'}}}, 400),
+        ('non-numeric in list', '/api/predict', {'json': {'features': [{name: 0.5}, {name: [1]}]}}, 400),
+        ('unknown feature', '/api/predict', {'json': {'features': {'no_such_feature': 1}}}, 400),
+        ('no features', '/api/predict', {'json': {}}, 400),
+        ('MIDI upload', '/api/analyze', {'data': midi}, 200),
+        ('not MIDI', '/api/analyze', {'data': b'not a midi file'}, 422),
+        ('empty upload', '/api/analyze', {'data': b''}, 400),
+    ]
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = args.model or str(Path(tmp_dir) / "no_model.pkl")
+        service = InferenceService(model_path, n_jobs=1, backend=args.backend)
+        try:
+            client = create_app(service).test_client()
+            print(f"{'Request':<24}{'Expected':>9}{'Got':>6}")
+            print("-" * 70)
+            for description, path, kwargs, expected in cases:
+                response = client.post(path, **kwargs)
+                flag = "" if response.status_code == expected else "  ❌"
+                print(f"{description:<24}{expected:>9}{response.status_code:>6}{flag}")
+                if response.status_code != expected:
+                    failures.append(f"{description}: expected {expected}, got {response.status_code} "
+                                    f"({response.get_data(as_text=True)[:200].strip()})")
+        finally:
+            service.close()
+
+    if failures:
+        print(f"\n❌ {len(failures)} server checks failed:")
+        for failure in failures:
+            print(f"   • {failure}")
+        sys.exit(1)
+    print("\n✓ Every request got the expected status")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,8 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / "src"))
 
 from ml_engine.train import load_model, DIFFICULTY_LABELS
+from ml_engine.feature_registry import FEATURE_NAMES
+from ml_engine.feature_store import load_features, resolve_store
 
 
 def evaluate_model():
@@ -45,21 +47,16 @@ def evaluate_model():
     # Load data
     features_csv = project_root / "data" / "processed" / "features_all.csv"
     
-    if not features_csv.exists():
+    if not features_csv.exists() and resolve_store(features_csv) is None:
         print("\n❌ Features file not found!")
         print(f"   Expected: {features_csv}")
         return
     
     print(f"✓ Loading data: {features_csv}")
-    df = pd.read_csv(features_csv)
+    df = load_features(features_csv)
     
     # Features
-    feature_cols = [
-        'max_stretch', 'max_chord_size', 'note_density',
-        'left_hand_activity', 'avg_tempo', 'dynamic_range',
-        'poly_voice_count', 'octave_jump_frequency',
-        'thirds_frequency', 'polyrhythm_score'
-    ]
+    feature_cols = FEATURE_NAMES
     
     X = df[feature_cols].values
     
@@ -104,8 +101,9 @@ def evaluate_model():
     print("MAKING PREDICTIONS...")
     print("="*70)
     
-    y_pred = model.predict(X_test)
+    # One pass over the trees: the label is the most probable class
     y_pred_proba = model.predict_proba(X_test)
+    y_pred = y_pred_proba.argmax(axis=1)
     
     # Basic metrics
     print("\n" + "="*70)
@@ -7,29 +7,142 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from src.ml_engine.feature_extract import extract_features_batch
+from src.ml_engine.feature_cache import FeatureCache, DEFAULT_CACHE_PATH
+from src.ml_engine.corpus_scan import CorpusManifest, DEFAULT_MANIFEST_PATH as DEFAULT_CORPUS_MANIFEST_PATH, scan_midi_files
+from src.ml_engine.failure_index import FailureIndex, DEFAULT_FAILURE_INDEX_PATH
+from src.ml_engine.feature_store import import_csv
+from src.ml_engine.note_cache import NoteCache, DEFAULT_NOTE_CACHE_PATH
+from src.ml_engine.midi_fingerprint import DEFAULT_MANIFEST_PATH, DEFAULT_THRESHOLD, find_duplicates, write_manifest
 
 def main():
     parser = argparse.ArgumentParser(description="Extract features from MIDI files")
-    parser.add_argument("--input", type=str, default="data/raw_midi", help="Input directory containing MIDI files")
+    parser.add_argument("--input", type=str, default="data/raw_midi",
+                        help="Input directory, searched recursively for .mid/.midi files (any case) "
+                             "including inside zip/tar archives; or a single archive")
     parser.add_argument("--output", type=str, default="data/processed/features_all.csv", help="Output CSV file")
     parser.add_argument("--workers", type=int, default=4, help="Number of parallel workers")
+    parser.add_argument("--backend", type=str, default="music21", choices=["music21", "native"],
+                        help="MIDI parser backend (native skips music21 and is much faster)")
+    parser.add_argument("--cache", type=str, default=DEFAULT_CACHE_PATH,
+                        help="Feature cache file; unchanged files are not re-parsed")
+    parser.add_argument("--cache-size-mb", type=int, default=512, help="Feature cache size cap in MB")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the feature cache")
+    parser.add_argument("--note-cache", type=str, default=DEFAULT_NOTE_CACHE_PATH,
+                        help="Parsed-note cache; new analyzers run on it instead of re-parsing the MIDI files")
+    parser.add_argument("--no-note-cache", action="store_true", help="Do not keep parsed notes")
+    parser.add_argument("--manifest", type=str, default=DEFAULT_CORPUS_MANIFEST_PATH,
+                        help="Corpus manifest (path, size, mtime, hash); unchanged files are not rehashed")
+    parser.add_argument("--no-manifest", action="store_true", help="Do not keep a corpus manifest")
+    parser.add_argument("--failure-index", type=str, default=DEFAULT_FAILURE_INDEX_PATH,
+                        help="Index of failed files; files that failed before are skipped")
+    parser.add_argument("--no-failure-index", action="store_true", help="Do not record or skip failed files")
+    parser.add_argument("--retry-failures", action="store_true",
+                        help="Extract files in the failure index again")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Group exact and near-duplicate files first and extract one file per group")
+    parser.add_argument("--dedupe-threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Estimated similarity (0-1) at which two files count as duplicates")
+    parser.add_argument("--duplicates-manifest", type=str, default=DEFAULT_MANIFEST_PATH,
+                        help="Where to write the duplicate-group manifest (used by the labeling tools)")
+    parser.add_argument("--read-ahead", action="store_true",
+                        help="Read files in the main process and send their bytes to the workers "
+                             "(one read per file; helps on network storage and compressed tars)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its partial output")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="Seconds allowed per file before it is killed and recorded as failed (0 = no limit)")
+    parser.add_argument("--max-memory-mb", type=float, default=4096,
+                        help="Memory allowed per worker before its file is killed (0 = no limit)")
+    parser.add_argument("--max-tasks-per-worker", type=int, default=200,
+                        help="Restart each worker after this many tasks (0 = never)")
+    parser.add_argument("--max-memory-growth-mb", type=float, default=1024,
+                        help="Restart a worker once its memory grows this much (0 = never)")
+    parser.add_argument("--no-store", action="store_true",
+                        help="Do not build the memory-mapped feature store next to the CSV")
+    parser.add_argument("--format", type=str, default="csv", choices=["csv", "npz"],
+                        help="Output format: csv, or npz for a directory of columnar chunks "
+                             "(a .csv suffix on --output is dropped)")
+    parser.add_argument("--profile", type=str, default=None, metavar="REPORT.json",
+                        help="Time each extraction stage per file and write a JSON report "
+                             "(plus a per-file CSV next to it)")
 
     args = parser.parse_args()
 
     input_dir = Path(args.input)
     output_file = args.output
+    if args.format == "npz" and output_file.endswith(".csv"):
+        output_file = output_file[:-len(".csv")]
 
     if not input_dir.exists():
-        print(f"Error: Input directory '{input_dir}' does not exist.")
+        print(f"Error: Input '{input_dir}' does not exist.")
         return
 
+    cache = None
+    if not args.no_cache:
+        cache = FeatureCache(args.cache, max_bytes=args.cache_size_mb * 1024 * 1024)
+    note_cache = None
+    if not args.no_note_cache:
+        note_cache = NoteCache(args.note_cache)
+    failure_index = None
+    if not args.no_failure_index:
+        failure_index = FailureIndex(args.failure_index)
+    manifest = None
+    if not args.no_manifest:
+        manifest = CorpusManifest(args.manifest)
+
+    # Paths are yielded as the library is walked, so extraction starts right away
+    midi_files = scan_midi_files(input_dir, manifest=manifest)
+    if args.dedupe:
+        # Grouping needs the whole corpus
+        midi_files = list(midi_files)
+        print(f"Fingerprinting {len(midi_files)} files for duplicates...")
+        midi_files, duplicates = find_duplicates(midi_files, threshold=args.dedupe_threshold, n_jobs=args.workers,
+                                                 root=input_dir)
+        n_groups = duplicates['group_id'].nunique()
+        print(f"  {len(duplicates) - n_groups} duplicates in {n_groups} groups; "
+              f"extracting {len(midi_files)} files")
+        print(f"  Duplicate groups saved to {write_manifest(duplicates, args.duplicates_manifest)}")
+
     print(f"Starting feature extraction from {input_dir}...")
     extract_features_batch(
-        midi_files=list(input_dir.glob("*.mid")) + list(input_dir.glob("*.midi")),
+        midi_files=midi_files,
         output_csv=output_file,
-        n_jobs=args.workers
+        n_jobs=args.workers,
+        backend=args.backend,
+        cache=cache,
+        note_cache=note_cache,
+        failure_index=failure_index,
+        manifest=manifest,
+        read_ahead=args.read_ahead,
+        retry_failures=args.retry_failures,
+        resume=args.resume,
+        sink_format=args.format,
+        timeout=args.timeout or None,
+        max_memory_mb=args.max_memory_mb or None,
+        max_tasks_per_child=args.max_tasks_per_worker or None,
+        max_memory_growth_mb=args.max_memory_growth_mb or None,
+        profile=args.profile,
+        root=input_dir,
+        return_df=False
     )
+    if cache is not None:
+        cache.close()
+    if note_cache is not None:
+        note_cache.close()
+    if failure_index is not None:
+        failure_index.close()
+    if manifest is not None:
+        counts = manifest.counts
+        print(f"Manifest: {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged files; "
+              f"{counts['hashed']} hashed")
+        if manifest.scan_complete:
+            removed = manifest.prune()
+            if removed:
+                print(f"Manifest: {removed} files no longer in {input_dir} removed")
+        manifest.close()
     print(f"Extraction complete. Features saved to {output_file}")
+    if args.format == "csv" and not args.no_store and Path(output_file).exists():
+        print(f"Feature store saved to {import_csv(output_file)}")
 
 if __name__ == "__main__":
     main()
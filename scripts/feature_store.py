@@ -0,0 +1,55 @@
+"""
+Feature Store Tool
+Converts between features CSV files and the memory-mapped columnar feature
+store, and prints a summary of a store.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from ml_engine.feature_store import FeatureStore, STORE_SUFFIX, export_csv, import_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import/export the columnar feature store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Build a feature store from a CSV")
+    import_parser.add_argument("--csv", type=str, default="data/processed/features_all.csv", help="Source CSV")
+    import_parser.add_argument("--store", type=str, default=None,
+                               help=f"Target store (default: CSV path with {STORE_SUFFIX})")
+
+    export_parser = subparsers.add_parser("export", help="Write a feature store back out as CSV")
+    export_parser.add_argument("--store", type=str, default="data/processed/features_all" + STORE_SUFFIX,
+                               help="Source store")
+    export_parser.add_argument("--csv", type=str, required=True, help="Target CSV")
+
+    info_parser = subparsers.add_parser("info", help="Show the columns and size of a store")
+    info_parser.add_argument("--store", type=str, default="data/processed/features_all" + STORE_SUFFIX,
+                             help="Store to inspect")
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        start = time.perf_counter()
+        store_path = import_csv(args.csv, args.store)
+        print(f"✓ Imported {args.csv} → {store_path} ({time.perf_counter() - start:.2f}s)")
+    elif args.command == "export":
+        csv_path = export_csv(args.store, args.csv)
+        print(f"✓ Exported {args.store} → {csv_path}")
+    else:
+        store = FeatureStore(args.store)
+        size = sum(f.stat().st_size for f in Path(args.store).iterdir())
+        print(f"📦 {args.store}: {len(store)} rows, {len(store.columns)} columns, {size / 1024:.0f} KB")
+        for column in store.meta['columns']:
+            print(f"   {column['name']:<26} {column.get('dtype', 'string table')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,900 @@
+"""
+Inference Server for Virtuoso Architect
+Long-running HTTP service that keeps the classifier loaded and a pool of
+parsing workers warm, so an analysis costs one parse and a share of a
+model call instead of a new process.
+
+Concurrent requests are coalesced: uploads are parsed in parallel on the
+pool, and every feature row waiting for the model, from uploads and from
+feature-vector requests alike, is classified in one micro-batch. Queues are
+bounded; when they are full a request is refused at once with 503 and a
+Retry-After header instead of piling up until it times out.
+
+Files too long for a synchronous request go through the job API instead:
+submitting returns a job id at once, a separate pool runs
+main.analyze_midi_file, and the result stays available for a while.
+
+Endpoints:
+    POST /api/analyze            MIDI file (multipart field 'file', or the raw body)
+    POST /api/predict            {"features": {...}} or {"features": [{...}, ...]}
+    POST /api/jobs               MIDI file, analyzed in the background (202 + job id)
+    GET  /api/jobs/<id>          Job status, and its result once done
+    GET  /api/jobs/<id>/events   Job status as server-sent events, until it finishes
+    GET  /api/metrics            Latency percentiles, throughput, batch sizes, queues
+    GET  /api/health             Model and worker status
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import itertools
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from flask import Flask, Response, jsonify, request
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from main import FALLBACK_FEATURES, analyze_midi_file, classify_batch
+from ml_engine.feature_cache import bytes_digest
+from ml_engine.feature_extract import BACKENDS, DEFAULT_BACKEND, extract_features_from_bytes
+from ml_engine.feature_registry import FEATURE_NAMES, cast_feature
+from ml_engine.train import load_model
+from ml_engine.worker_pool import IDLE, GuardedPool
+
+
+# Rows classified together at most, and how long the first waiting row
+# holds the batch open for others
+MAX_BATCH = 64
+MAX_WAIT_MS = 10
+
+# Uploads waiting for a parser, and requests waiting for the model
+MAX_PENDING_UPLOADS = 32
+MAX_PENDING_PREDICTIONS = 256
+
+PARSE_TIMEOUT = 60
+REQUEST_TIMEOUT = 120
+MAX_UPLOAD_MB = 16
+
+# Background jobs: workers, jobs waiting before new ones are refused,
+# finished jobs kept and for how long, and the time one job may take
+JOB_WORKERS = 1
+MAX_PENDING_JOBS = 64
+MAX_FINISHED_JOBS = 1000
+JOB_TTL = 3600
+JOB_TIMEOUT = 600
+FINISHED_STATES = ('done', 'failed')
+
+# Seconds between keep-alive comments on an idle event stream
+EVENT_KEEPALIVE = 15
+
+# Recent requests kept for latency percentiles, and the window for
+# requests/sec
+LATENCY_WINDOW = 2048
+THROUGHPUT_WINDOW = 60
+PERCENTILES = (50, 90, 99)
+
+
+class ServiceOverloaded(RuntimeError):
+    """A request was refused because the queue it needs is full."""
+
+
+class ServiceMetrics:
+    """Thread-safe request counters, latencies and batch sizes."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.latencies = {}
+        self.batch_sizes = deque(maxlen=window)
+        self.finished = deque()
+        self.window = window
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counts[name] += n
+
+    def observe(self, name, seconds):
+        """Record one latency sample (seconds) for a stage."""
+        with self._lock:
+            samples = self.latencies.get(name)
+            if samples is None:
+                samples = self.latencies[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def batch(self, rows):
+        with self._lock:
+            self.batch_sizes.append(rows)
+
+    def request_finished(self):
+        """Record a completed request (for requests/sec)."""
+        now = time.time()
+        with self._lock:
+            self.finished.append(now)
+            while self.finished and self.finished[0] < now - THROUGHPUT_WINDOW:
+                self.finished.popleft()
+
+    def snapshot(self):
+        """
+        Current metrics.
+
+        Returns:
+            dict: uptime, counts, requests_per_sec (over the last
+                  THROUGHPUT_WINDOW seconds), latency_ms per stage (count,
+                  mean and percentiles over the last requests) and batches
+        """
+        now = time.time()
+        with self._lock:
+            counts = dict(self.counts)
+            latencies = {name: np.array(samples) for name, samples in self.latencies.items()}
+            batch_sizes = np.array(self.batch_sizes)
+            recent = sum(1 for t in self.finished if t >= now - THROUGHPUT_WINDOW)
+
+        uptime = now - self.started
+        latency_ms = {}
+        for name, samples in latencies.items():
+            if len(samples) == 0:
+                continue
+            entry = {'count': int(len(samples)), 'mean': float(samples.mean() * 1000)}
+            for q, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+                entry[f'p{q}'] = float(value * 1000)
+            entry['max'] = float(samples.max() * 1000)
+            latency_ms[name] = entry
+        return {
+            'uptime_seconds': uptime,
+            'counts': counts,
+            'requests_per_sec': recent / max(1e-9, min(uptime, THROUGHPUT_WINDOW)),
+            'latency_ms': latency_ms,
+            'batches': {
+                'count': int(len(batch_sizes)),
+                'mean_rows': float(batch_sizes.mean()) if len(batch_sizes) else 0.0,
+                'max_rows': int(batch_sizes.max()) if len(batch_sizes) else 0
+            }
+        }
+
+
+class _Request:
+    """One request on its way through the service."""
+
+    __slots__ = ('rows', 'future', 'submitted', 'timings')
+
+    def __init__(self, rows=None):
+        self.rows = rows
+        self.future = Future()
+        self.submitted = time.perf_counter()
+        self.timings = {}
+
+
+def _warm_up(backend=DEFAULT_BACKEND):
+    """Pool initializer: have the parser loaded before the first upload."""
+    if backend == 'music21':
+        import music21
+        music21.environment.UserSettings()['warnings'] = 0
+
+
+def _numeric_features(row):
+    """Feature dict with every value as a float (None = missing, left out)."""
+    numeric = {}
+    for name, value in row.items():
+        if value is None:
+            continue
+        try:
+            numeric[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Feature {name} is not a number: {value!r}") from None
+    return numeric
+
+
+def _extract_upload(task, backend=DEFAULT_BACKEND, features=None):
+    """Worker function: (request id, MIDI bytes) -> feature dict."""
+    request_id, data = task
+    return extract_features_from_bytes(data, backend, raise_errors=True, features=features)
+
+
+class InferenceService:
+    """
+    Warm model plus parsing pool behind two bounded queues.
+
+    Uploads go to the parse queue, from which a dispatcher thread feeds the
+    worker pool; feature rows (parsed uploads and direct requests) go to the
+    prediction queue, which a batcher thread drains into micro-batches of
+    up to max_batch rows, one model call each.
+    """
+
+    def __init__(self, model_path, n_jobs=1, backend=DEFAULT_BACKEND, max_batch=MAX_BATCH,
+                 max_wait_ms=MAX_WAIT_MS, max_pending_uploads=MAX_PENDING_UPLOADS,
+                 max_pending_predictions=MAX_PENDING_PREDICTIONS, parse_timeout=PARSE_TIMEOUT,
+                 max_memory_mb=None):
+        """
+        Load the model and start the workers and service threads.
+
+        Args:
+            model_path (str): Path to trained model (the rule-based fallback
+                              is used if it does not exist)
+            n_jobs (int): Parsing worker processes
+            backend (str): MIDI parser backend, 'music21' or 'native'
+            max_batch (int): Most feature rows per model call
+            max_wait_ms (float): How long a waiting row holds a batch open
+            max_pending_uploads (int): Uploads queued for a parser before
+                                       new ones are refused
+            max_pending_predictions (int): Requests queued for the model
+                                           before new ones are refused
+            parse_timeout (float, optional): Seconds a file may take to parse
+                                             before its worker is killed
+            max_memory_mb (float, optional): Resident memory allowed per worker
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}. Available: {list(BACKENDS)}")
+        self.model_path = model_path
+        self.model = load_model(model_path) if Path(model_path).exists() else None
+        self.features = None if self.model is not None else FALLBACK_FEATURES
+        self.backend = backend
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = ServiceMetrics()
+
+        self._uploads = queue.Queue(maxsize=max_pending_uploads)
+        self._predictions = queue.Queue(maxsize=max_pending_predictions)
+        self._in_flight = {}
+        self._ids = itertools.count()
+        self._closed = threading.Event()
+
+        # Short poll: an idle worker picks up a new upload within ~10 ms
+        self.pool = GuardedPool(n_jobs, timeout=parse_timeout, max_rss_mb=max_memory_mb,
+                                initializer=_warm_up, initargs=(backend,), poll_interval=0.01)
+        self.pool.start()
+        self._threads = [
+            threading.Thread(target=self._dispatch_uploads, name='upload-dispatcher', daemon=True),
+            threading.Thread(target=self._run_batches, name='model-batcher', daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # Submitting
+
+    def submit_midi(self, data):
+        """
+        Queue MIDI content for parsing and classification.
+
+        Returns:
+            Future: Resolves to a result dict (see _finish), or to a
+                    ValueError if the file cannot be processed
+
+        Raises:
+            ServiceOverloaded: If the parse queue is full
+        """
+        req = _Request()
+        request_id = next(self._ids)
+        self._in_flight[request_id] = req
+        try:
+            self._uploads.put_nowait((request_id, bytes(data)))
+        except queue.Full:
+            del self._in_flight[request_id]
+            self.metrics.count('rejected')
+            raise ServiceOverloaded("Too many uploads waiting to be parsed")
+        self.metrics.count('uploads')
+        return req.future
+
+    def submit_features(self, rows):
+        """
+        Queue feature rows for classification.
+
+        Args:
+            rows (list): Feature dicts (missing features get their defaults)
+
+        Returns:
+            Future: Resolves to a list of result dicts, one per row
+
+        Raises:
+            ValueError: If a feature is unknown or its value is not a number
+            ServiceOverloaded: If the prediction queue is full
+        """
+        unknown = sorted({name for row in rows for name in row} - set(FEATURE_NAMES))
+        if unknown:
+            raise ValueError(f"Unknown features: {unknown}. Available: {FEATURE_NAMES}")
+        req = _Request([_numeric_features(row) for row in rows])
+        try:
+            self._predictions.put_nowait(req)
+        except queue.Full:
+            self.metrics.count('rejected')
+            raise ServiceOverloaded("Too many requests waiting for the model")
+        self.metrics.count('feature_requests')
+        return req.future
+
+    # Service threads
+
+    def _pending_uploads(self):
+        """Task source for the pool: queued uploads, IDLE while there are none."""
+        while not self._closed.is_set():
+            try:
+                task = self._uploads.get_nowait()
+            except queue.Empty:
+                yield IDLE
+                continue
+            self._in_flight[task[0]].timings['queue'] = time.perf_counter()
+            yield task
+
+    def _dispatch_uploads(self):
+        extract = functools.partial(_extract_upload, backend=self.backend, features=self.features)
+        for result in self.pool.imap_unordered(self._pending_uploads(), extract):
+            request_id = result.task[0]
+            req = self._in_flight.pop(request_id, None)
+            if req is None:
+                continue
+            now = time.perf_counter()
+            picked_up = req.timings.pop('queue', now)
+            req.timings['queue_wait'] = picked_up - req.submitted
+            req.timings['parse'] = now - picked_up
+            if result.value is None:
+                self.metrics.count('failed')
+                reason = result.error or "Failed to extract features from MIDI file"
+                req.future.set_exception(ValueError(reason))
+                continue
+            req.rows = [result.value]
+            # Parsing was the expensive part: wait for room rather than drop it
+            self._predictions.put(req)
+
+    def _run_batches(self):
+        while not self._closed.is_set():
+            try:
+                first = self._predictions.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            rows = len(first.rows)
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    req = self._predictions.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(req)
+                rows += len(req.rows)
+            self._classify(batch)
+
+    def _classify(self, batch):
+        start = time.perf_counter()
+        try:
+            df = pd.DataFrame([row for req in batch for row in req.rows])
+            predictions = classify_batch(self.model, df)
+        except Exception:
+            if len(batch) > 1:
+                # Find the request that broke the batch; the others still succeed
+                for req in batch:
+                    self._classify([req])
+                return
+            batch[0].future.set_exception(ValueError(f"Cannot classify: {sys.exc_info()[1]!r}"))
+            self.metrics.count('failed')
+            return
+        elapsed = time.perf_counter() - start
+        self.metrics.batch(len(df))
+        self.metrics.observe('predict', elapsed)
+
+        offset = 0
+        for req in batch:
+            n = len(req.rows)
+            req.timings['predict'] = elapsed
+            req.future.set_result(self._finish(req, predictions[offset:offset + n]))
+            offset += n
+
+    def _finish(self, req, predictions):
+        """Result dicts for one request, and its metrics."""
+        total = time.perf_counter() - req.submitted
+        req.timings['total'] = total
+        for name, seconds in req.timings.items():
+            self.metrics.observe(name, seconds)
+        self.metrics.request_finished()
+        timings_ms = {name: round(seconds * 1000, 3) for name, seconds in req.timings.items()}
+        return [{
+            'features': {name: cast_feature(name, value) for name, value in row.items()
+                         if name in FEATURE_NAMES and not pd.isna(value)},
+            'classification': prediction,
+            'timings_ms': timings_ms
+        } for row, prediction in zip(req.rows, predictions)]
+
+    # Status
+
+    def status(self):
+        """Model, worker and queue status."""
+        return {
+            'model': self.model_path if self.model is not None else None,
+            'fallback': self.model is None,
+            'backend': self.backend,
+            'workers': self.pool.processes,
+            'pending_uploads': self._uploads.qsize(),
+            'pending_predictions': self._predictions.qsize(),
+            'in_flight': len(self._in_flight),
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+    def close(self):
+        """Stop the service threads and the workers."""
+        self._closed.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self.pool.terminate()
+
+
+# Model of this job worker process, loaded once by _load_job_model
+_job_model = None
+
+
+def _load_job_model(model_path, backend=DEFAULT_BACKEND):
+    """Job pool initializer: load the model once per worker."""
+    global _job_model
+    _warm_up(backend)
+    if Path(model_path).exists():
+        with contextlib.redirect_stdout(io.StringIO()):
+            _job_model = load_model(model_path)
+
+
+def _run_analysis(task, model_path, backend=DEFAULT_BACKEND):
+    """Worker function: (job id, spooled file, file name) -> analyze_midi_file results."""
+    job_id, midi_path, filename = task
+    # The pipeline prints its progress; workers have no one to show it to
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = analyze_midi_file(midi_path, model_path, backend=backend, model=_job_model)
+    if 'error' in results:
+        raise ValueError(results['error'])
+    results['file'] = filename
+    return results
+
+
+class AnalysisJobs:
+    """
+    Background analysis of uploaded files on their own process pool.
+
+    Jobs are kept in submission order with their status (queued, running,
+    done or failed). Finished jobs expire after ttl seconds, and only the
+    newest max_finished of them are kept. An upload whose content is
+    already queued, running or done is folded into that job instead of
+    being analyzed again.
+    """
+
+    def __init__(self, model_path, n_jobs=JOB_WORKERS, backend=DEFAULT_BACKEND,
+                 max_pending=MAX_PENDING_JOBS, max_finished=MAX_FINISHED_JOBS, ttl=JOB_TTL,
+                 timeout=JOB_TIMEOUT, max_memory_mb=None, metrics=None):
+        """
+        Start the job workers and dispatcher.
+
+        Args:
+            model_path (str): Path to trained model (the rule-based fallback
+                              is used if it does not exist)
+            n_jobs (int): Analysis worker processes
+            backend (str): MIDI parser backend, 'music21' or 'native'
+            max_pending (int): Queued jobs before new submissions are refused
+            max_finished (int): Finished jobs kept for polling
+            ttl (float): Seconds a finished job is kept
+            timeout (float, optional): Seconds one job may run before its
+                                       worker is killed
+            max_memory_mb (float, optional): Resident memory allowed per worker
+            metrics (ServiceMetrics, optional): Where job counts and
+                                                latencies are recorded
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}. Available: {list(BACKENDS)}")
+        self.model_path = model_path
+        self.backend = backend
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.ttl = ttl
+        self.metrics = metrics or ServiceMetrics()
+
+        self._jobs = OrderedDict()
+        # Content (digest, backend) -> id of the job analyzing it
+        self._by_content = {}
+        self._pending = deque()
+        self._changed = threading.Condition()
+        self._closed = False
+        # Uploads wait on disk, not in memory or in the pool's pipes
+        self._spool = tempfile.mkdtemp(prefix='virtuoso-jobs-')
+
+        self.pool = GuardedPool(n_jobs, timeout=timeout, max_rss_mb=max_memory_mb,
+                                initializer=_load_job_model, initargs=(model_path, backend),
+                                poll_interval=0.05)
+        self.pool.start()
+        self._thread = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, data, filename=None):
+        """
+        Queue a file for analysis.
+
+        Returns:
+            tuple: (job dict, True if the upload was folded into an
+                    existing job for the same content)
+
+        Raises:
+            ServiceOverloaded: If max_pending jobs are already queued
+        """
+        key = (bytes_digest(data), self.backend)
+        with self._changed:
+            self._purge()
+            existing = self._jobs.get(self._by_content.get(key))
+            if existing is not None and existing['status'] != 'failed':
+                existing['folded'] += 1
+                self.metrics.count('jobs_folded')
+                return self._view(existing), True
+            if len(self._pending) >= self.max_pending:
+                self.metrics.count('jobs_rejected')
+                raise ServiceOverloaded(f"{len(self._pending)} jobs already waiting")
+
+            job_id = uuid.uuid4().hex
+            midi_path = os.path.join(self._spool, f'{job_id}.mid')
+            with open(midi_path, 'wb') as f:
+                f.write(data)
+            job = {'id': job_id, 'status': 'queued', 'file': filename, 'key': key, 'path': midi_path,
+                   'submitted': time.time(), 'started': None, 'finished': None,
+                   'result': None, 'error': None, 'folded': 0, 'version': 0}
+            self._jobs[job_id] = job
+            self._by_content[key] = job_id
+            self._pending.append(job)
+            self.metrics.count('jobs_submitted')
+            self._changed.notify_all()
+            return self._view(job), False
+
+    def get(self, job_id):
+        """Job dict, or None if unknown or expired."""
+        with self._changed:
+            self._purge()
+            job = self._jobs.get(job_id)
+            return self._view(job) if job is not None else None
+
+    def wait(self, job_id, version, timeout=EVENT_KEEPALIVE):
+        """
+        Wait until a job changes past version (or timeout).
+
+        Returns:
+            dict: The job (its version is unchanged on timeout), or None if
+                  it is unknown or expired
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job['version'] != version:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closed:
+                    break
+                self._changed.wait(remaining)
+            return self._view(job) if job is not None else None
+
+    def counts(self):
+        """Jobs per status."""
+        with self._changed:
+            self._purge()
+            return dict(Counter(job['status'] for job in self._jobs.values()))
+
+    def _view(self, job):
+        """The public part of a job."""
+        view = {name: job[name] for name in ('id', 'status', 'file', 'submitted', 'started',
+                                             'finished', 'folded', 'version')}
+        if job['status'] == 'queued':
+            view['position'] = next(i for i, pending in enumerate(self._pending) if pending is job)
+        if job['status'] == 'done':
+            view['result'] = job['result']
+        if job['status'] == 'failed':
+            view['error'] = job['error']
+        if job['started'] is not None:
+            view['elapsed'] = (job['finished'] or time.time()) - job['started']
+        if job['finished'] is not None:
+            view['expires'] = job['finished'] + self.ttl
+        return view
+
+    def _update(self, job, **changes):
+        """Change a job and wake everyone waiting on it (lock held)."""
+        job.update(changes)
+        job['version'] += 1
+        self._changed.notify_all()
+
+    def _purge(self):
+        """Drop expired finished jobs, then the oldest beyond max_finished (lock held)."""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job['status'] in FINISHED_STATES]
+        kept = [job for job in finished if now - job['finished'] <= self.ttl]
+        # Jobs are in submission order: the oldest go first
+        excess = max(0, len(kept) - self.max_finished)
+        expired = [job for job in finished if now - job['finished'] > self.ttl] + kept[:excess]
+        for job in expired:
+            del self._jobs[job['id']]
+            if self._by_content.get(job['key']) == job['id']:
+                del self._by_content[job['key']]
+        if expired:
+            self.metrics.count('jobs_expired', len(expired))
+
+    def _queued(self):
+        """Task source for the pool: the next queued job, IDLE while there is none."""
+        while not self._closed:
+            with self._changed:
+                job = self._pending.popleft() if self._pending else None
+                if job is not None:
+                    self._update(job, status='running', started=time.time())
+            if job is None:
+                yield IDLE
+                continue
+            self.metrics.observe('job_queue_wait', job['started'] - job['submitted'])
+            yield (job['id'], job['path'], job['file'])
+
+    def _dispatch(self):
+        analyze = functools.partial(_run_analysis, model_path=self.model_path, backend=self.backend)
+        for result in self.pool.imap_unordered(self._queued(), analyze):
+            job_id, midi_path, _ = result.task
+            with contextlib.suppress(OSError):
+                os.remove(midi_path)
+            with self._changed:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                if result.value is not None:
+                    self._update(job, status='done', result=result.value, finished=time.time())
+                    self.metrics.count('jobs_done')
+                else:
+                    self._update(job, status='failed', finished=time.time(),
+                                 error=result.error or "Failed to extract features from MIDI file")
+                    self.metrics.count('jobs_failed')
+                self.metrics.observe('job_run', job['finished'] - job['started'])
+                self.metrics.observe('job_total', job['finished'] - job['submitted'])
+
+    def close(self):
+        """Stop the dispatcher and workers, and remove spooled uploads."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._thread.join(timeout=5)
+        self.pool.terminate()
+        shutil.rmtree(self._spool, ignore_errors=True)
+
+
+def create_app(service, jobs=None, request_timeout=REQUEST_TIMEOUT, max_upload_mb=MAX_UPLOAD_MB):
+    """
+    Flask app serving an InferenceService.
+
+    Args:
+        service (InferenceService): The running service
+        jobs (AnalysisJobs, optional): Background job queue (the job
+                                       endpoints answer 404 without one)
+        request_timeout (float): Seconds a request may wait for its result
+        max_upload_mb (float): Largest accepted upload
+
+    Returns:
+        Flask: The app
+    """
+    app = Flask(__name__)
+    app.config['MAX_CONTENT_LENGTH'] = int(max_upload_mb * 1024 * 1024)
+
+    def overloaded(e):
+        response = jsonify({'error': str(e), 'overloaded': True})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+
+    def wait_for(future):
+        try:
+            return future.result(timeout=request_timeout)
+        except FutureTimeout:
+            service.metrics.count('timed_out')
+            return None
+
+    def read_upload():
+        """(bytes, file name) of the uploaded MIDI file."""
+        # Any other content type is the file itself (curl --data-binary
+        # sends it as a form body, which must not be parsed)
+        upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+        data = upload.read() if upload is not None else request.get_data()
+        return data, (upload.filename if upload is not None else request.args.get('filename'))
+
+    @app.route('/api/analyze', methods=['POST'])
+    def analyze():
+        """Parse and classify one uploaded MIDI file."""
+        data, filename = read_upload()
+        if not data:
+            return jsonify({'error': "No MIDI data (send a 'file' field or the raw file)"}), 400
+
+        try:
+            future = service.submit_midi(data)
+        except ServiceOverloaded as e:
+            return overloaded(e)
+        try:
+            results = wait_for(future)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'file': filename}), 422
+        if results is None:
+            return jsonify({'error': f'No result within {request_timeout:g}s'}), 504
+        return jsonify(dict(results[0], file=filename))
+
+    @app.route('/api/predict', methods=['POST'])
+    def predict():
+        """Classify one feature dict, or a list of them."""
+        data = request.get_json(silent=True) or {}
+        rows = data.get('features')
+        single = isinstance(rows, dict)
+        if single:
+            rows = [rows]
+        if not rows or not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return jsonify({'error': "Send {'features': {...}} or {'features': [{...}, ...]}"}), 400
+
+        try:
+            future = service.submit_features(rows)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except ServiceOverloaded as e:
+            return overloaded(e)
+        try:
+            results = wait_for(future)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 422
+        if results is None:
+            return jsonify({'error': f'No result within {request_timeout:g}s'}), 504
+        for result in results:
+            del result['timings_ms']
+        return jsonify(results[0] if single else {'results': results})
+
+    @app.route('/api/jobs', methods=['POST'])
+    def submit_job():
+        """Queue an uploaded MIDI file for background analysis."""
+        if jobs is None:
+            return jsonify({'error': 'Background jobs are disabled'}), 404
+        data, filename = read_upload()
+        if not data:
+            return jsonify({'error': "No MIDI data (send a 'file' field or the raw file)"}), 400
+        try:
+            job, folded = jobs.submit(data, filename)
+        except ServiceOverloaded as e:
+            return overloaded(e)
+        response = jsonify(dict(job, folded_into_existing=folded,
+                                poll=f"/api/jobs/{job['id']}", events=f"/api/jobs/{job['id']}/events"))
+        response.status_code = 200 if job['status'] in FINISHED_STATES else 202
+        response.headers['Location'] = f"/api/jobs/{job['id']}"
+        return response
+
+    @app.route('/api/jobs/<job_id>', methods=['GET'])
+    def get_job(job_id):
+        """Status of a job, with its result once done."""
+        job = jobs.get(job_id) if jobs is not None else None
+        if job is None:
+            return jsonify({'error': 'Unknown or expired job'}), 404
+        return jsonify(job)
+
+    @app.route('/api/jobs/<job_id>/events', methods=['GET'])
+    def job_events(job_id):
+        """Stream a job's status as server-sent events until it finishes."""
+        job = jobs.get(job_id) if jobs is not None else None
+        if job is None:
+            return jsonify({'error': 'Unknown or expired job'}), 404
+
+        def stream(job):
+            yield f"data: {json.dumps(job)}\n\n"
+            while job['status'] not in FINISHED_STATES:
+                update = jobs.wait(job_id, job['version'])
+                if update is None:
+                    yield "event: expired\ndata: {}\n\n"
+                    return
+                if update['version'] == job['version']:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"data: {json.dumps(update)}\n\n"
+                job = update
+
+        return Response(stream(job), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """Latency, throughput and queue metrics."""
+        snapshot = dict(service.metrics.snapshot(), **service.status())
+        if jobs is not None:
+            snapshot['jobs'] = jobs.counts()
+        return jsonify(snapshot)
+
+    @app.route('/api/health', methods=['GET'])
+    def health():
+        """Service status."""
+        return jsonify(dict(service.status(), ok=True))
+
+    @app.errorhandler(413)
+    def too_large(e):
+        return jsonify({'error': f'Upload larger than {max_upload_mb:g} MB'}), 413
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Virtuoso Architect - Inference Server")
+    parser.add_argument('--model', type=str, default='models/difficulty_classifier.pkl',
+                        help='Path to trained model (default: models/difficulty_classifier.pkl)')
+    parser.add_argument('--backend', type=str, default=DEFAULT_BACKEND, choices=list(BACKENDS),
+                        help=f'MIDI parser backend (default: {DEFAULT_BACKEND})')
+    parser.add_argument('--workers', type=int, default=2, help='Parsing worker processes')
+    parser.add_argument('--port', type=int, default=5001, help='Port (default: 5001)')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host (default: 127.0.0.1)')
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help='Most rows per model call')
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS,
+                        help='How long a request waits for others to share its model call')
+    parser.add_argument('--max-pending-uploads', type=int, default=MAX_PENDING_UPLOADS,
+                        help='Uploads queued for parsing before new ones get 503')
+    parser.add_argument('--max-pending-predictions', type=int, default=MAX_PENDING_PREDICTIONS,
+                        help='Requests queued for the model before new ones get 503')
+    parser.add_argument('--parse-timeout', type=float, default=PARSE_TIMEOUT,
+                        help='Seconds a file may take to parse before its worker is killed')
+    parser.add_argument('--request-timeout', type=float, default=REQUEST_TIMEOUT,
+                        help='Seconds a request waits for its result')
+    parser.add_argument('--max-upload-mb', type=float, default=MAX_UPLOAD_MB, help='Largest accepted upload')
+    parser.add_argument('--job-workers', type=int, default=JOB_WORKERS,
+                        help='Background job worker processes (0 disables /api/jobs)')
+    parser.add_argument('--max-pending-jobs', type=int, default=MAX_PENDING_JOBS,
+                        help='Queued jobs before new submissions get 503')
+    parser.add_argument('--max-finished-jobs', type=int, default=MAX_FINISHED_JOBS,
+                        help='Finished jobs kept for polling')
+    parser.add_argument('--job-ttl', type=float, default=JOB_TTL, help='Seconds a finished job is kept')
+    parser.add_argument('--job-timeout', type=float, default=JOB_TIMEOUT,
+                        help='Seconds one job may run before its worker is killed')
+    args = parser.parse_args()
+
+    service = InferenceService(
+        args.model,
+        n_jobs=args.workers,
+        backend=args.backend,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        max_pending_uploads=args.max_pending_uploads,
+        max_pending_predictions=args.max_pending_predictions,
+        parse_timeout=args.parse_timeout or None
+    )
+    jobs = None
+    if args.job_workers > 0:
+        jobs = AnalysisJobs(
+            args.model,
+            n_jobs=args.job_workers,
+            backend=args.backend,
+            max_pending=args.max_pending_jobs,
+            max_finished=args.max_finished_jobs,
+            ttl=args.job_ttl,
+            timeout=args.job_timeout or None,
+            metrics=service.metrics
+        )
+    app = create_app(service, jobs=jobs, request_timeout=args.request_timeout,
+                     max_upload_mb=args.max_upload_mb)
+
+    print("\n" + "="*70)
+    print("🎹 VIRTUOSO ARCHITECT - INFERENCE SERVER")
+    print("="*70)
+    print(f"\n🧠 Model: {args.model if service.model is not None else 'not found (rule-based fallback)'}")
+    print(f"💻 Parsing workers: {args.workers} ({args.backend} backend)")
+    print(f"📦 Micro-batches: up to {args.max_batch} rows, {args.max_wait_ms:g} ms wait")
+    if jobs is not None:
+        print(f"🗂️  Background jobs: {args.job_workers} workers, results kept {args.job_ttl:g}s")
+    print(f"\n🌐 Listening on http://{args.host}:{args.port}")
+    print(f"📊 Metrics: http://{args.host}:{args.port}/api/metrics")
+    print(f"\n⌨️  Press Ctrl+C to stop the server")
+    print("="*70 + "\n")
+
+    try:
+        app.run(host=args.host, port=args.port, threaded=True)
+    finally:
+        service.close()
+        if jobs is not None:
+            jobs.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,18 +4,60 @@ Orchestrates MIDI feature extraction and ML classification.
 """
 
 import argparse
+import contextlib
+import csv
+import glob
 import json
+import math
+import os
 import sys
+import time
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from ml_engine.feature_extract import extract_features_from_midi
-from ml_engine.train import load_model, predict_difficulty, DIFFICULTY_LABELS
+from ml_engine.corpus_scan import scan_midi_files
+from ml_engine.feature_cache import DEFAULT_CACHE_PATH
+from ml_engine.feature_extract import (
+    BACKENDS, DEFAULT_BACKEND, extract_features_batch, extract_features_from_midi, shutdown_warm_pool
+)
+from ml_engine.feature_registry import FEATURES, cast_feature
+from ml_engine.midi_archive import is_archive, source_name
+from ml_engine.labels import DIFFICULTY_LABELS
 
+# The only features the rule-based fallback reads; without a model only
+# these are extracted
+FALLBACK_FEATURES = ['max_stretch', 'max_chord_size', 'note_density']
 
-def analyze_midi_file(midi_path, model_path, piece_info=None):
+# Files extracted and classified together in batch mode
+BATCH_SIZE = 256
+
+
+def fallback_category(features):
+    """Rule-based category for a file when no model is trained."""
+    if features['max_stretch'] > 12:
+        return "Far Reach"
+    elif features['max_chord_size'] > 5:
+        return "Advanced Chords"
+    elif features['note_density'] > 10:
+        return "Double Thirds"
+    return "Multiple Voices"
+
+
+def fallback_prediction(features):
+    """Prediction dict of the rule-based fallback."""
+    category = fallback_category(features)
+    return {
+        'predicted_category': category,
+        'predicted_id': list(DIFFICULTY_LABELS.values()).index(category),
+        'confidence': 0.5,
+        'probabilities': {},
+        'note': 'Using fallback classification (model not trained)'
+    }
+
+
+def analyze_midi_file(midi_path, model_path, piece_info=None, backend=DEFAULT_BACKEND, model=None):
     """
     Complete analysis pipeline for a MIDI file.
     
@@ -23,6 +65,8 @@ def analyze_midi_file(midi_path, model_path, piece_info=None):
         midi_path (str): Path to MIDI file
         model_path (str): Path to trained model
         piece_info (dict, optional): Piece metadata (composer, title)
+        backend (str): MIDI parser backend, 'music21' or 'native'
+        model (optional): Already loaded model; model_path is not read again
         
     Returns:
         dict: Complete analysis results
@@ -33,7 +77,9 @@ def analyze_midi_file(midi_path, model_path, piece_info=None):
     
     # Step 1: Extract features
     print("Step 1/2: Extracting features...")
-    features = extract_features_from_midi(midi_path)
+    have_model = model is not None or Path(model_path).exists()
+    features = extract_features_from_midi(midi_path, backend=backend,
+                                          features=None if have_model else FALLBACK_FEATURES)
     
     if not features:
         return {'error': 'Failed to extract features from MIDI file'}
@@ -45,32 +91,20 @@ def analyze_midi_file(midi_path, model_path, piece_info=None):
     # Step 2: Classify difficulty
     print("\nStep 2/2: Classifying technical difficulty...")
     
-    try:
-        model = load_model(model_path)
+    if have_model:
+        # xgboost and scikit-learn are only loaded when there is a model
+        from ml_engine.train import load_model, predict_difficulty
+        if model is None:
+            model = load_model(model_path)
         prediction = predict_difficulty(model, features)
         
         print(f"  ✓ Category: {prediction['predicted_category']}")
         print(f"  ✓ Confidence: {prediction['confidence']:.2%}")
         
-    except FileNotFoundError:
+    else:
         print("  ⚠ Model not found. Using fallback classification...")
         # Simple rule-based fallback
-        if features['max_stretch'] > 12:
-            category = "Far Reach"
-        elif features['max_chord_size'] > 5:
-            category = "Advanced Chords"
-        elif features['note_density'] > 10:
-            category = "Double Thirds"
-        else:
-            category = "Multiple Voices"
-        
-        prediction = {
-            'predicted_category': category,
-            'predicted_id': list(DIFFICULTY_LABELS.values()).index(category),
-            'confidence': 0.5,
-            'probabilities': {},
-            'note': 'Using fallback classification (model not trained)'
-        }
+        prediction = fallback_prediction(features)
     
     # Combine results
     results = {
@@ -83,6 +117,176 @@ def analyze_midi_file(midi_path, model_path, piece_info=None):
     return results
 
 
+def iter_batch_inputs(source):
+    """
+    MIDI files for batch mode, yielded lazily.
+    
+    Args:
+        source (str): A directory or zip/tar archive (scanned recursively), a
+                      manifest (a CSV with a 'path' column, such as
+                      duplicate_groups.csv, or a text file with one path per
+                      line; relative paths are taken from the manifest's
+                      directory), or a glob pattern ('library/**/*.mid')
+    
+    Yields:
+        str: File path or archive member address
+    """
+    path = Path(source)
+    if path.is_dir() or (path.is_file() and is_archive(path)):
+        yield from scan_midi_files(path)
+    elif path.is_file():
+        base = path.parent
+        with open(path, newline='', encoding='utf-8') as f:
+            if path.suffix.lower() == '.csv':
+                reader = csv.DictReader(f)
+                column = 'path' if 'path' in (reader.fieldnames or []) else reader.fieldnames[0]
+                entries = (row[column] for row in reader)
+            else:
+                entries = (line.strip() for line in f if not line.lstrip().startswith('#'))
+            for entry in entries:
+                if entry:
+                    yield entry if os.path.isabs(entry) or os.path.exists(entry) else str(base / entry)
+    else:
+        matches = sorted(glob.glob(source, recursive=True))
+        if not matches:
+            raise ValueError(f"No MIDI files match {source!r} (not a directory, archive, manifest or glob)")
+        yield from matches
+
+
+def _blocks(midi_files, size):
+    """
+    Split files into blocks of at most size files, starting a new block
+    when a file name repeats, so results (keyed by midi_filename) map back
+    to exactly one path.
+    """
+    block = {}
+    for midi_path in midi_files:
+        name = source_name(midi_path)
+        if len(block) >= size or name in block:
+            yield block
+            block = {}
+        block[name] = midi_path
+    if block:
+        yield block
+
+
+def classify_batch(model, df):
+    """
+    Classify every row of a feature DataFrame with one model pass.
+    
+    Args:
+        model: Trained XGBoost model, or None for the rule-based fallback
+        df (pd.DataFrame): Feature rows (missing features get their defaults)
+        
+    Returns:
+        list: Prediction dicts, as from predict_difficulty, in row order
+    """
+    if model is None:
+        defaults = {name: FEATURES[name].default for name in FALLBACK_FEATURES}
+        rows = df.reindex(columns=FALLBACK_FEATURES).fillna(defaults).to_dict('records')
+        return [fallback_prediction(row) for row in rows]
+    from ml_engine.train import predict_difficulty_batch
+    results = predict_difficulty_batch(model, df)
+    categories = list(results.columns[3:])
+    probabilities = results[categories].to_numpy()
+    return [{
+        'predicted_category': category,
+        'predicted_id': int(pred_id),
+        'confidence': float(confidence),
+        'probabilities': dict(zip(categories, row.tolist()))
+    } for category, pred_id, confidence, row in zip(results['predicted_category'], results['predicted_id'],
+                                                    results['confidence'], probabilities)]
+
+
+def analyze_batch(source, model_path, output=None, n_jobs=None, backend=DEFAULT_BACKEND,
+                  cache=DEFAULT_CACHE_PATH, batch_size=BATCH_SIZE):
+    """
+    Analyze a whole library: the model is loaded once, features are
+    extracted in parallel on warm workers and classified BATCH_SIZE files at
+    a time, and one JSON line per file is written as each block finishes.
+    
+    Lines have the shape of analyze_midi_file results; files that could not
+    be extracted get {"file": ..., "error": ...}.
+    
+    Args:
+        source (str): Directory, archive, manifest or glob (see iter_batch_inputs)
+        model_path (str): Path to trained model (the rule-based fallback is
+                          used if it does not exist)
+        output (str, optional): JSON Lines path; None or '-' = stdout, in which
+                                case progress goes to stderr
+        n_jobs (int, optional): Extraction workers. None = all CPUs - 1
+        backend (str): MIDI parser backend, 'music21' or 'native'
+        cache (str, optional): Feature cache path, or None for no cache
+        batch_size (int): Files per extraction and prediction block
+        
+    Returns:
+        dict: Throughput summary (files, succeeded, failed, seconds spent
+              extracting and predicting, wall seconds, files/sec)
+    """
+    to_stdout = output in (None, '-')
+    log = sys.stderr if to_stdout else sys.stdout
+    start = time.perf_counter()
+    
+    model = None
+    if Path(model_path).exists():
+        from ml_engine.train import load_model
+        with contextlib.redirect_stdout(log):
+            model = load_model(model_path)
+    else:
+        print("⚠ Model not found. Using fallback classification...", file=log)
+    features = None if model is not None else FALLBACK_FEATURES
+    
+    stats = {'files': 0, 'succeeded': 0, 'failed': 0, 'extract_seconds': 0.0, 'predict_seconds': 0.0}
+    out = sys.stdout if to_stdout else open(output, 'w', encoding='utf-8')
+    try:
+        for block in _blocks(iter_batch_inputs(source), batch_size):
+            t0 = time.perf_counter()
+            # The extraction log must not end up in the JSON Lines
+            with contextlib.redirect_stdout(log):
+                df = extract_features_batch(list(block.values()), n_jobs=n_jobs, backend=backend,
+                                            cache=cache, warm_workers=True, features=features)
+            t1 = time.perf_counter()
+            rows = df.to_dict('records')
+            predictions = classify_batch(model, df) if rows else []
+            stats['extract_seconds'] += t1 - t0
+            stats['predict_seconds'] += time.perf_counter() - t1
+            
+            for row, prediction in zip(rows, predictions):
+                name = row.pop('midi_filename')
+                values = {k: (None if isinstance(v, float) and math.isnan(v) else cast_feature(k, v))
+                          for k, v in row.items()}
+                out.write(json.dumps({'file': str(block.pop(name)), 'features': values,
+                                      'classification': prediction}, ensure_ascii=False) + '\n')
+            # Whatever is left did not come back from extraction
+            for midi_path in block.values():
+                out.write(json.dumps({'file': str(midi_path),
+                                      'error': 'Failed to extract features from MIDI file'},
+                                     ensure_ascii=False) + '\n')
+            out.flush()
+            stats['files'] += len(rows) + len(block)
+            stats['succeeded'] += len(rows)
+            stats['failed'] += len(block)
+    finally:
+        shutdown_warm_pool()
+        if not to_stdout:
+            out.close()
+    
+    stats['wall_seconds'] = time.perf_counter() - start
+    stats['files_per_sec'] = stats['files'] / stats['wall_seconds'] if stats['wall_seconds'] > 0 else 0.0
+    
+    print(f"\n{'='*60}", file=log)
+    print("BATCH SUMMARY", file=log)
+    print(f"{'='*60}", file=log)
+    print(f"   Files: {stats['files']} ({stats['succeeded']} analyzed, {stats['failed']} failed)", file=log)
+    print(f"   Extraction: {stats['extract_seconds']:.1f}s", file=log)
+    print(f"   Prediction: {stats['predict_seconds']:.2f}s "
+          f"({'model' if model is not None else 'fallback rules'})", file=log)
+    print(f"   Total: {stats['wall_seconds']:.1f}s ({stats['files_per_sec']:.1f} files/sec)", file=log)
+    if not to_stdout:
+        print(f"✓ Results saved to: {output}", file=log)
+    return stats
+
+
 def print_results(results):
     """
     Pretty print analysis results.
@@ -106,18 +310,24 @@ def print_results(results):
         for category, prob in results['classification']['probabilities'].items():
             print(f"   • {category}: {prob:.2%}")
     
-    # Features
-    print(f"\n📊 EXTRACTED FEATURES (10 total)")
-    print(f"   Max Stretch: {results['features']['max_stretch']:.2f} semitones")
-    print(f"   Max Chord Size: {results['features']['max_chord_size']} notes")
-    print(f"   Note Density: {results['features']['note_density']:.2f} notes/sec")
-    print(f"   Left Hand Activity: {results['features']['left_hand_activity']:.2%}")
-    print(f"   Average Tempo: {results['features']['avg_tempo']:.0f} BPM")
-    print(f"   Dynamic Range: {results['features']['dynamic_range']:.2f}")
-    print(f"   Polyphony (Voice Count): {results['features']['poly_voice_count']:.2f}")
-    print(f"   Octave Jump Frequency: {results['features']['octave_jump_frequency']:.2%}")
-    print(f"   Thirds Frequency: {results['features']['thirds_frequency']:.2%}")
-    print(f"   Polyrhythm Score: {results['features']['polyrhythm_score']:.2f}")
+    # Features (the fallback extracts only some of them)
+    features = results['features']
+    print(f"\n📊 EXTRACTED FEATURES ({len(features)} total)")
+    lines = [
+        ('max_stretch', "Max Stretch: {:.2f} semitones"),
+        ('max_chord_size', "Max Chord Size: {} notes"),
+        ('note_density', "Note Density: {:.2f} notes/sec"),
+        ('left_hand_activity', "Left Hand Activity: {:.2%}"),
+        ('avg_tempo', "Average Tempo: {:.0f} BPM"),
+        ('dynamic_range', "Dynamic Range: {:.2f}"),
+        ('poly_voice_count', "Polyphony (Voice Count): {:.2f}"),
+        ('octave_jump_frequency', "Octave Jump Frequency: {:.2%}"),
+        ('thirds_frequency', "Thirds Frequency: {:.2%}"),
+        ('polyrhythm_score', "Polyrhythm Score: {:.2f}")
+    ]
+    for name, line in lines:
+        if name in features:
+            print("   " + line.format(features[name]))
     
     # Piece info if available
     if results.get('piece_info'):
@@ -138,13 +348,21 @@ def main():
         description="Virtuoso Architect - Piano MIDI Technical Analysis"
     )
     
-    parser.add_argument(
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument(
         '--midi_file',
         type=str,
-        required=True,
         help='Path to MIDI file to analyze'
     )
     
+    inputs.add_argument(
+        '--batch',
+        type=str,
+        metavar='INPUT',
+        help='Analyze many files: a directory, zip/tar archive, manifest (CSV with a '
+             'path column, or one path per line) or quoted glob; writes JSON Lines'
+    )
+    
     parser.add_argument(
         '--model',
         type=str,
@@ -155,7 +373,35 @@ def main():
     parser.add_argument(
         '--output',
         type=str,
-        help='Path to save JSON results (optional)'
+        help='Path to save JSON results (optional; JSON Lines in batch mode, default stdout)'
+    )
+    
+    parser.add_argument(
+        '--backend',
+        type=str,
+        default=DEFAULT_BACKEND,
+        choices=list(BACKENDS),
+        help=f'MIDI parser backend (default: {DEFAULT_BACKEND})'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Batch mode: parallel extraction workers (default: all CPUs - 1)'
+    )
+    
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=BATCH_SIZE,
+        help=f'Batch mode: files extracted and classified together (default: {BATCH_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Batch mode: do not use the feature cache'
     )
     
     parser.add_argument(
@@ -172,6 +418,18 @@ def main():
     
     args = parser.parse_args()
     
+    if args.batch:
+        analyze_batch(
+            args.batch,
+            args.model,
+            output=args.output,
+            n_jobs=args.workers,
+            backend=args.backend,
+            cache=None if args.no_cache else DEFAULT_CACHE_PATH,
+            batch_size=args.batch_size
+        )
+        return
+    
     # Prepare piece info
     piece_info = {}
     if args.composer:
@@ -183,7 +441,8 @@ def main():
     results = analyze_midi_file(
         args.midi_file,
         args.model,
-        piece_info=piece_info if piece_info else None
+        piece_info=piece_info if piece_info else None,
+        backend=args.backend
     )
     
     # Print results
@@ -0,0 +1,208 @@
+"""
+Streaming Corpus Discovery
+Walks a MIDI library recursively (including zip/tar archives) and yields
+files as they are found, while keeping a manifest of (path, size, mtime,
+content hash) so later runs only rehash new or changed files.
+"""
+
+import os
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+
+try:
+    from .midi_archive import is_archive, iter_archive_members, source_digest, source_stat
+except ImportError:  # running as a script
+    from midi_archive import is_archive, iter_archive_members, source_digest, source_stat
+
+
+DEFAULT_MANIFEST_PATH = "data/cache/corpus_manifest.sqlite"
+MIDI_SUFFIXES = ('.mid', '.midi')
+
+
+def scan_midi_files(root, manifest=None, suffixes=MIDI_SUFFIXES, archives=True):
+    """
+    Yield MIDI files under root, recursively, as they are found.
+
+    Suffixes match case-insensitively (.MID, .Midi, ...). Each directory is
+    listed on its own and in sorted order, so the first paths arrive
+    immediately and the order is stable between runs. Directory symlinks
+    are not followed.
+
+    Args:
+        root (str): Library root, or a single zip/tar archive
+        manifest (CorpusManifest, optional): Records size and mtime of every
+                                             file found
+        suffixes (tuple): Lower-case file suffixes to accept
+        archives (bool): Also yield the MIDI members of zip/tar archives, as
+                         "archive::member" addresses (see midi_archive.py)
+
+    Yields:
+        str: File path or archive member address
+    """
+    if archives and os.path.isfile(root) and is_archive(root):
+        yield from _scan_archive(str(root), manifest, suffixes)
+        if manifest is not None:
+            manifest.scan_complete = True
+        return
+
+    pending = [str(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                elif entry.name.lower().endswith(suffixes) and entry.is_file():
+                    if manifest is not None:
+                        stat = entry.stat()
+                        manifest.observe(entry.path, stat.st_size, stat.st_mtime)
+                    yield entry.path
+                elif archives and is_archive(entry.name) and entry.is_file():
+                    yield from _scan_archive(entry.path, manifest, suffixes)
+            except OSError:
+                continue
+        # Depth first, in name order
+        pending.extend(reversed(subdirectories))
+    if manifest is not None:
+        manifest.scan_complete = True
+
+
+def _scan_archive(archive, manifest, suffixes):
+    """Yield the MIDI members of one archive (nothing if it is unreadable)."""
+    try:
+        mtime = os.stat(archive).st_mtime
+        for path, size in iter_archive_members(archive, suffixes):
+            if manifest is not None:
+                manifest.observe(path, size, mtime)
+            yield path
+    except OSError as e:
+        print(f"  ⚠ Skipping {archive}: {e}")
+
+
+class CorpusManifest:
+    """
+    SQLite-backed record of every file in the library.
+
+    Each row holds the path, size, mtime and (once computed) content digest.
+    A digest is reused for as long as size and mtime are unchanged, so a
+    rerun over a mostly unchanged library reads almost no file content.
+    """
+
+    def __init__(self, manifest_path=DEFAULT_MANIFEST_PATH, commit_every=1000):
+        """
+        Open (or create) a manifest.
+
+        Args:
+            manifest_path (str): Path to the SQLite manifest file
+            commit_every (int): Commit after this many updates
+        """
+        self.manifest_path = Path(manifest_path)
+        self.commit_every = commit_every
+        self.scan_started = time.time()
+        self.scan_complete = False
+        # new / changed / unchanged files seen by this scan, and files hashed
+        self.counts = Counter()
+        self._uncommitted = 0
+        os.makedirs(self.manifest_path.parent, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.manifest_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime REAL NOT NULL,"
+            " digest TEXT,"
+            " last_seen REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _row(self, path):
+        return self._conn.execute("SELECT size, mtime, digest FROM files WHERE path = ?", (path,)).fetchone()
+
+    def _changed(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def observe(self, path, size, mtime):
+        """
+        Record a file found by the scanner.
+
+        Returns:
+            str: 'new', 'changed' or 'unchanged'
+        """
+        path = str(path)
+        row = self._row(path)
+        if row is None:
+            status = 'new'
+        elif row[0] != size or row[1] != mtime:
+            status = 'changed'
+        else:
+            status = 'unchanged'
+        digest = row[2] if status == 'unchanged' else None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime, digest, last_seen) VALUES (?, ?, ?, ?, ?)",
+            (path, size, mtime, digest, time.time())
+        )
+        self.counts[status] += 1
+        self._changed()
+        return status
+
+    def digest(self, path):
+        """
+        Content digest of a file or archive member, reusing the stored one
+        when size and mtime still match.
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        path = str(path)
+        size, mtime = source_stat(path)
+        row = self._row(path)
+        if row is not None and row[2] and row[0] == size and row[1] == mtime:
+            return row[2]
+        digest = source_digest(path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime, digest, last_seen) VALUES (?, ?, ?, ?, ?)",
+            (path, size, mtime, digest, time.time())
+        )
+        self.counts['hashed'] += 1
+        self._changed()
+        return digest
+
+    def missing(self):
+        """Paths recorded by earlier scans but not seen by this one."""
+        rows = self._conn.execute("SELECT path FROM files WHERE last_seen < ?", (self.scan_started,))
+        return [path for (path,) in rows]
+
+    def prune(self):
+        """
+        Drop files not seen by this scan. Only call this after a complete
+        scan (scan_complete), or files not reached yet are dropped too.
+
+        Returns:
+            int: Number of rows removed
+        """
+        removed = self._conn.execute("DELETE FROM files WHERE last_seen < ?", (self.scan_started,)).rowcount
+        self._conn.commit()
+        return removed
+
+    def commit(self):
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,267 @@
+"""
+Extraction Profiling
+Optional per-stage timings for feature extraction: where each file's time
+goes (reading, parsing, NoteArray conversion, each analyzer, IPC with the
+pool), aggregated over a batch run into a JSON/CSV report.
+
+Stages are timed with `with stage('parse'): ...`. Outside a collect_timings()
+block stage() returns a shared no-op, so the hooks cost one function call
+and a None check when profiling is off.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+
+PERCENTILES = (50, 90, 99)
+SLOWEST_FILES = 20
+THROUGHPUT_BUCKETS = 20
+
+# Timings of the file being extracted in this process, or None
+_current = None
+
+
+class _NullStage:
+    """Stage timer used while profiling is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Adds the time spent in a with-block to one stage of the current file."""
+
+    __slots__ = ('timings', 'name', 'start')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+def stage(name):
+    """
+    Time a block as one stage of the current file.
+
+    Returns:
+        A context manager (a no-op unless inside collect_timings())
+    """
+    if _current is None:
+        return _NULL_STAGE
+    return _Stage(_current, name)
+
+
+class collect_timings:
+    """
+    Collect stage timings for the code run inside the block.
+
+    Example:
+        with collect_timings() as timings:
+            extract_features_from_midi(path, backend='native')
+        # timings: {'parse': ..., 'convert': ..., 'max_stretch': ..., 'total': ...}
+
+    Blocks do not nest; an inner block records into the outer one.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._outer = False
+
+    def __enter__(self):
+        global _current
+        if _current is not None:
+            self._outer = True
+            return _current
+        _current = self.timings
+        self._start = time.perf_counter()
+        return self.timings
+
+    def __exit__(self, *exc):
+        global _current
+        if not self._outer:
+            self.timings['total'] = time.perf_counter() - self._start
+            _current = None
+        return False
+
+
+class ExtractionProfile:
+    """
+    Per-file stage timings of one extraction run, aggregated in the main
+    process from what the workers send back.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.files = []
+        # Work done in the main process (hashing, cache lookups, ...)
+        self.parent = Counter()
+        # Seconds since start at which each file finished, cache hits included
+        self.finished = []
+
+    def add_file(self, midi_filename, timings, ipc=None, worker=None):
+        """
+        Record one file extracted by a worker.
+
+        Args:
+            midi_filename (str): File name
+            timings (dict): Stage -> seconds from collect_timings (with 'total')
+            ipc (float, optional): Seconds the file spent in transit and
+                                   queued, as seen from the main process
+            worker (int, optional): Worker process id
+        """
+        row = dict(timings)
+        row['midi_filename'] = midi_filename
+        row['worker'] = worker
+        if ipc is not None:
+            row['ipc'] = max(0.0, ipc)
+        row['finished'] = time.perf_counter() - self.started
+        self.files.append(row)
+
+    def add_parent(self, name, seconds):
+        """Add main-process time to a stage."""
+        self.parent[name] += seconds
+
+    def parent_stage(self, name):
+        """Time a block of main-process work (a context manager)."""
+        return _Stage(self.parent, name)
+
+    def mark_finished(self, count=1):
+        """Record files finishing now (for files/sec over time)."""
+        self.finished.extend([time.perf_counter() - self.started] * count)
+
+    def stages(self):
+        """Stage names seen in any file, in first-seen order ('total' last)."""
+        names = {}
+        for row in self.files:
+            for name in row:
+                if name not in ('midi_filename', 'worker', 'finished', 'total'):
+                    names[name] = None
+        return list(names) + ['total']
+
+    def summary(self):
+        """
+        Statistics per stage over all profiled files.
+
+        Returns:
+            list: One dict per stage with stage, files, total_seconds, share
+                  (of summed file totals), mean_ms, p50_ms, p90_ms, p99_ms, max_ms
+        """
+        grand_total = sum(row.get('total', 0.0) for row in self.files) or 1.0
+        rows = []
+        for name in self.stages():
+            values = np.array([row[name] for row in self.files if name in row])
+            if len(values) == 0:
+                continue
+            entry = {
+                'stage': name,
+                'files': int(len(values)),
+                'total_seconds': float(values.sum()),
+                'share': float(values.sum() / grand_total),
+                'mean_ms': float(values.mean() * 1000)
+            }
+            for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                entry[f'p{q}_ms'] = float(value * 1000)
+            entry['max_ms'] = float(values.max() * 1000)
+            rows.append(entry)
+        return rows
+
+    def slowest(self, n=SLOWEST_FILES):
+        """The n files with the longest total, slowest first."""
+        return sorted(self.files, key=lambda row: -row.get('total', 0.0))[:n]
+
+    def workers(self):
+        """Files and seconds per worker process."""
+        per_worker = {}
+        for row in self.files:
+            stats = per_worker.setdefault(row.get('worker'), {'files': 0, 'seconds': 0.0})
+            stats['files'] += 1
+            stats['seconds'] += row.get('total', 0.0)
+        return [dict(stats, worker=worker) for worker, stats in per_worker.items()]
+
+    def throughput(self, buckets=THROUGHPUT_BUCKETS):
+        """
+        Files per second over the run.
+
+        Returns:
+            list: One dict per time bucket with start, end (seconds since the
+                  run started), files and files_per_sec
+        """
+        if not self.finished:
+            return []
+        wall = max(self.finished)
+        width = max(wall / buckets, 1.0)
+        counts = Counter(int(t // width) for t in self.finished)
+        return [{'start': round(i * width, 3), 'end': round((i + 1) * width, 3),
+                 'files': counts.get(i, 0), 'files_per_sec': counts.get(i, 0) / width}
+                for i in range(int(wall // width) + 1)]
+
+    def report(self):
+        """The whole profile as a JSON-serializable dict."""
+        wall = time.perf_counter() - self.started
+        return {
+            'wall_seconds': wall,
+            'files': len(self.finished),
+            'profiled_files': len(self.files),
+            'files_per_sec': len(self.finished) / wall if wall > 0 else 0.0,
+            'stages': self.summary(),
+            'main_process': dict(self.parent),
+            'workers': self.workers(),
+            'slowest': self.slowest(),
+            'throughput': self.throughput()
+        }
+
+    def write(self, report_path):
+        """
+        Write the JSON report and, next to it, a CSV with one row per file.
+
+        Args:
+            report_path (str): JSON report path (the CSV gets a .csv suffix)
+
+        Returns:
+            tuple: (JSON path, CSV path)
+        """
+        import pandas as pd
+
+        report_path = Path(report_path)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = str(report_path) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp_path, report_path)
+
+        csv_path = report_path.with_suffix('.csv')
+        columns = ['midi_filename', 'worker', 'finished'] + self.stages()
+        pd.DataFrame(self.files, columns=columns).to_csv(csv_path, index=False)
+        return str(report_path), str(csv_path)
+
+    def print_summary(self):
+        """Print the per-stage table, slowest files and overall throughput."""
+        report = self.report()
+        print(f"\n  ⏱️  Profile: {report['files']} files in {report['wall_seconds']:.1f}s "
+              f"({report['files_per_sec']:.1f} files/sec)")
+        print(f"     {'Stage':<24}{'Share':>7}{'Total s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'Max ms':>9}")
+        for row in report['stages']:
+            print(f"     {row['stage']:<24}{row['share']:>7.1%}{row['total_seconds']:>9.2f}"
+                  f"{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}")
+        for name, seconds in report['main_process'].items():
+            print(f"     main process: {name} {seconds:.2f}s")
+        for row in report['slowest'][:5]:
+            print(f"     slow: {row['midi_filename']} {row.get('total', 0.0) * 1000:.0f} ms")
@@ -0,0 +1,118 @@
+"""
+Persistent Failure Index
+Remembers which MIDI files could not be extracted, keyed by content hash and
+extractor version, so later runs skip them instead of paying the full parse
+cost again.
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+
+DEFAULT_FAILURE_INDEX_PATH = "data/cache/failures.sqlite"
+
+
+class FailureIndex:
+    """
+    SQLite-backed index of failed extractions.
+
+    Entries are keyed by (content digest, extractor version), so a new
+    extractor version gets a fresh chance at every file.
+    """
+
+    def __init__(self, index_path=DEFAULT_FAILURE_INDEX_PATH):
+        """
+        Open (or create) a failure index.
+
+        Args:
+            index_path (str): Path to the SQLite index file
+        """
+        self.index_path = Path(index_path)
+        os.makedirs(self.index_path.parent, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.index_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS failures ("
+            " digest TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " error_class TEXT NOT NULL,"
+            " message TEXT NOT NULL,"
+            " elapsed REAL,"
+            " filename TEXT,"
+            " failed_at REAL NOT NULL,"
+            " PRIMARY KEY (digest, version))"
+        )
+        self._conn.commit()
+
+    def get_many(self, digests, version):
+        """
+        Look up several files at once.
+
+        Args:
+            digests (list): Content digests
+            version (str): Extractor version string
+
+        Returns:
+            dict: digest -> failure dict (error_class, message, elapsed,
+                  filename, failed_at), for known failures only
+        """
+        known = {}
+        wanted = list(dict.fromkeys(d for d in digests if d))
+        # Stay well below SQLite's host parameter limit
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                "SELECT digest, error_class, message, elapsed, filename, failed_at FROM failures"
+                f" WHERE version = ? AND digest IN ({placeholders})",
+                [version] + batch
+            ).fetchall()
+            for digest, error_class, message, elapsed, filename, failed_at in rows:
+                known[digest] = {
+                    'error_class': error_class,
+                    'message': message,
+                    'elapsed': elapsed,
+                    'filename': filename,
+                    'failed_at': failed_at
+                }
+        return known
+
+    def record(self, digest, version, error_class, message, elapsed=None, filename=None):
+        """
+        Record a failed extraction. Call commit() to persist.
+
+        Args:
+            digest (str): Content digest of the file
+            version (str): Extractor version string
+            error_class (str): Exception class (or pool failure kind, e.g. WorkerCrashed)
+            message (str): Error message
+            elapsed (float, optional): Seconds spent before the file failed
+            filename (str, optional): File name it failed under, for reports
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO failures"
+            " (digest, version, error_class, message, elapsed, filename, failed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (digest, version, error_class, message, elapsed, filename, time.time())
+        )
+
+    def remove(self, digest, version):
+        """Forget a failure, e.g. after the file was extracted on a retry."""
+        self._conn.execute("DELETE FROM failures WHERE digest = ? AND version = ?", (digest, version))
+
+    def commit(self):
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM failures").fetchone()[0]
+
+    def clear(self):
+        self._conn.execute("DELETE FROM failures")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,179 @@
+"""
+Content-Addressed Feature Cache
+Stores extracted features on disk keyed by MIDI file content hash and
+extractor version, so unchanged files are never parsed twice.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+
+DEFAULT_CACHE_PATH = "data/cache/features.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Hash a file's content.
+
+    Args:
+        path (str): Path to the file
+        chunk_size (int): Read size in bytes
+
+    Returns:
+        str: Hex BLAKE2b digest (32 hex characters)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    """
+    Hash in-memory content; matches file_digest of a file with these bytes.
+
+    Returns:
+        str: Hex BLAKE2b digest (32 hex characters)
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class FeatureCache:
+    """
+    SQLite-backed cache of feature dicts.
+
+    Entries are keyed by (content digest, extractor version). When the
+    total stored size exceeds max_bytes, the least recently used entries
+    are evicted.
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Open (or create) a feature cache.
+
+        Args:
+            cache_path (str): Path to the SQLite cache file
+            max_bytes (int): Size cap for stored feature payloads
+        """
+        self.cache_path = Path(cache_path)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_path.parent, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.cache_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS features ("
+            " digest TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " PRIMARY KEY (digest, version))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON features (last_access)")
+        self._conn.commit()
+
+    def get_many(self, digests, version):
+        """
+        Look up several files at once.
+
+        Args:
+            digests (list): Content digests
+            version (str): Extractor version string
+
+        Returns:
+            dict: digest -> features dict, for cache hits only
+        """
+        hits = {}
+        wanted = list(dict.fromkeys(d for d in digests if d))
+        # Stay well below SQLite's host parameter limit
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT digest, payload FROM features WHERE version = ? AND digest IN ({placeholders})",
+                [version] + batch
+            ).fetchall()
+            for digest, payload in rows:
+                hits[digest] = json.loads(payload)
+
+        if hits:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE features SET last_access = ? WHERE digest = ? AND version = ?",
+                [(now, digest, version) for digest in hits]
+            )
+            self._conn.commit()
+        return hits
+
+    def get(self, digest, version):
+        """Return cached features for one file, or None."""
+        return self.get_many([digest], version).get(digest)
+
+    def put(self, digest, version, features):
+        """
+        Store features for one file. Call commit() to persist.
+
+        The midi_filename column is not stored, since identical content can
+        appear under different names.
+        """
+        payload = json.dumps({k: v for k, v in features.items() if k != 'midi_filename'})
+        self._conn.execute(
+            "INSERT OR REPLACE INTO features (digest, version, payload, size, last_access)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (digest, version, payload, len(payload), time.time())
+        )
+
+    def commit(self):
+        self._conn.commit()
+
+    def total_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM features").fetchone()[0]
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+
+    def evict(self):
+        """
+        Drop least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            int: Number of entries removed
+        """
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+
+        removed = 0
+        freed = 0
+        rows = self._conn.execute(
+            "SELECT digest, version, size FROM features ORDER BY last_access ASC"
+        )
+        to_delete = []
+        for digest, version, size in rows:
+            if freed >= excess:
+                break
+            to_delete.append((digest, version))
+            freed += size
+            removed += 1
+
+        self._conn.executemany("DELETE FROM features WHERE digest = ? AND version = ?", to_delete)
+        self._conn.commit()
+        return removed
+
+    def clear(self):
+        self._conn.execute("DELETE FROM features")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
@@ -3,21 +3,112 @@ Enhanced Feature Extraction Engine for MIDI Files
 Extracts 10 comprehensive technical difficulty features.
 """
 
-import music21
+import functools
+import itertools
+import os
 import numpy as np
+from collections import Counter
 from pathlib import Path
 import warnings
 
+try:
+    from .corpus_scan import CorpusManifest
+    from .extraction_profile import ExtractionProfile, collect_timings, stage
+    from .feature_cache import FeatureCache
+    from .feature_registry import (FEATURES, FEATURE_NAMES, feature_set_version, feature_versions,
+                                   outdated_features, read_table_versions, write_table_versions)
+    from .failure_index import FailureIndex
+    from .feature_sink import open_feature_sink
+    from .feature_store import STORE_SUFFIX, FeatureStore, import_csv, write_feature_store
+    from .worker_pool import MEMORY_LIMIT_EXCEEDED, TASK_TIMEOUT, GuardedPool, schedule_files
+    from .midi_archive import (MidiBuffer, preload_source, read_source, source_digest, source_name,
+                                source_size, split_member)
+    from .midi_reader import MidiScore, read_midi
+    from .note_array import (ANALYZERS, DYNAMIC_VALUES, NoteArray, VECTORIZED_FEATURES,
+                             extract_features_from_note_array, required_inputs)
+    from .note_cache import NoteCache, note_source
+except ImportError:  # running as a script: python feature_extract.py <file>
+    from corpus_scan import CorpusManifest
+    from extraction_profile import ExtractionProfile, collect_timings, stage
+    from feature_cache import FeatureCache
+    from feature_registry import (FEATURES, FEATURE_NAMES, feature_set_version, feature_versions,
+                                  outdated_features, read_table_versions, write_table_versions)
+    from failure_index import FailureIndex
+    from feature_sink import open_feature_sink
+    from feature_store import STORE_SUFFIX, FeatureStore, import_csv, write_feature_store
+    from worker_pool import MEMORY_LIMIT_EXCEEDED, TASK_TIMEOUT, GuardedPool, schedule_files
+    from midi_archive import (MidiBuffer, preload_source, read_source, source_digest, source_name,
+                               source_size, split_member)
+    from midi_reader import MidiScore, read_midi
+    from note_array import (ANALYZERS, DYNAMIC_VALUES, NoteArray, VECTORIZED_FEATURES,
+                            extract_features_from_note_array, required_inputs)
+    from note_cache import NoteCache, note_source
+
 # Disable warnings for cleaner output
 warnings.filterwarnings('ignore')
-music21.environment.UserSettings()['warnings'] = 0
+
+# music21 is imported on first use: it is a large share of startup time,
+# and the native backend, feature tables and --help never need it
+_music21 = None
+
+
+def _load_music21():
+    """Import music21 (once) with its warnings silenced."""
+    global _music21
+    if _music21 is None:
+        import music21
+        music21.environment.UserSettings()['warnings'] = 0
+        _music21 = music21
+    return _music21
+
+# Parser backends: 'music21' builds the full music21 Score, 'native' reads
+# MIDI events directly into flat note records (see midi_reader.py)
+BACKENDS = ('music21', 'native')
+DEFAULT_BACKEND = 'music21'
+
+# Bump when parsing or the pipeline changes every feature; a change to one
+# analyzer only needs its version bumped in feature_registry.py. Cached
+# features are keyed by both, so output from older code is not reused.
+EXTRACTOR_VERSION = '1'
+
+# extract_features_batch hashes, looks up and schedules its input this many
+# files at a time, so work starts before a large input is fully listed
+STREAM_WINDOW = 1000
+
+# Pool kills that depend on the run's limits rather than the file: they are
+# not recorded in the failure index, and entries left by older runs are retried
+POOL_LIMITS = (TASK_TIMEOUT, MEMORY_LIMIT_EXCEEDED)
+
+# Long-lived pool used by extract_features_batch(warm_workers=True)
+_warm_pool = None
+
+
+def _accepts_note_sources(feature_name):
+    """
+    Let an analyzer also run on a NoteArray or a MidiScore.
+    
+    NoteArray inputs go to the matching vectorized analyzer; a MidiScore
+    from the native backend is converted to a NoteArray first.
+    """
+    def decorator(analyzer):
+        @functools.wraps(analyzer)
+        def wrapper(stream):
+            if isinstance(stream, MidiScore):
+                stream = NoteArray.from_score(stream)
+            if isinstance(stream, NoteArray):
+                return VECTORIZED_FEATURES[feature_name](stream)
+            return analyzer(stream)
+        return wrapper
+    return decorator
 
 
+@_accepts_note_sources('max_stretch')
 def analyze_hand_span(stream):
     """
     Analyze maximum hand span required (max_stretch).
     Returns maximum interval in semitones.
     """
+    music21 = _load_music21()
     max_stretch = 0
     notes = stream.flatten().notes
     
@@ -31,10 +122,12 @@ def analyze_hand_span(stream):
     return float(max_stretch)
 
 
+@_accepts_note_sources('max_chord_size')
 def analyze_max_chord_size(stream):
     """
     Analyze maximum simultaneous notes (max_chord_size).
     """
+    music21 = _load_music21()
     max_chord_size = 0
     notes = stream.flatten().notes
     
@@ -46,10 +139,12 @@ def analyze_max_chord_size(stream):
     return int(max_chord_size)
 
 
+@_accepts_note_sources('note_density')
 def analyze_note_density(stream):
     """
     Calculate notes per second (note_density).
     """
+    music21 = _load_music21()
     notes = stream.flatten().notesAndRests
     
     total_notes = 0
@@ -74,11 +169,13 @@ def analyze_note_density(stream):
     return 0.0
 
 
+@_accepts_note_sources('left_hand_activity')
 def analyze_left_hand_activity(stream):
     """
     Measure left hand activity (notes below middle C).
     Returns ratio of left hand notes to total notes.
     """
+    music21 = _load_music21()
     notes = stream.flatten().notes
     total_notes = 0
     left_hand_notes = 0
@@ -101,10 +198,12 @@ def analyze_left_hand_activity(stream):
     return 0.0
 
 
+@_accepts_note_sources('avg_tempo')
 def analyze_tempo(stream):
     """
     Extract average tempo (avg_tempo).
     """
+    music21 = _load_music21()
     metronomes = stream.flatten().getElementsByClass(music21.tempo.MetronomeMark)
     
     if metronomes:
@@ -114,11 +213,13 @@ def analyze_tempo(stream):
     return 120.0  # Default tempo
 
 
+@_accepts_note_sources('dynamic_range')
 def analyze_dynamic_range(stream):
     """
     Measure dynamic range (dynamic_range).
     Returns range of dynamics from pp to ff.
     """
+    music21 = _load_music21()
     dynamics = stream.flatten().getElementsByClass(music21.dynamics.Dynamic)
     
     if not dynamics:
@@ -140,10 +241,12 @@ def analyze_dynamic_range(stream):
     return 0.0
 
 
+@_accepts_note_sources('poly_voice_count')
 def analyze_polyphony(stream):
     """
     Count average number of simultaneous voices (poly_voice_count).
     """
+    music21 = _load_music21()
     # Count parts/voices
     parts = stream.parts
     
@@ -166,11 +269,13 @@ def analyze_polyphony(stream):
     return 1.0
 
 
+@_accepts_note_sources('octave_jump_frequency')
 def analyze_octave_jumps(stream):
     """
     Measure frequency of octave jumps (octave_jump_frequency).
     Returns ratio of octave+ jumps to total intervals.
     """
+    music21 = _load_music21()
     notes_list = []
     for element in stream.flatten().notes:
         if isinstance(element, music21.note.Note):
@@ -196,11 +301,13 @@ def analyze_octave_jumps(stream):
     return 0.0
 
 
+@_accepts_note_sources('thirds_frequency')
 def analyze_thirds(stream):
     """
     Detect frequency of thirds (thirds_frequency).
     Returns ratio of third intervals to total intervals.
     """
+    music21 = _load_music21()
     notes_list = []
     for element in stream.flatten().notes:
         if isinstance(element, music21.note.Note):
@@ -223,6 +330,7 @@ def analyze_thirds(stream):
     return 0.0
 
 
+@_accepts_note_sources('polyrhythm_score')
 def analyze_polyrhythm(stream):
     """
     Detect polyrhythmic complexity (polyrhythm_score).
@@ -248,56 +356,425 @@ def analyze_polyrhythm(stream):
     return 0.0
 
 
-def extract_features_from_midi(midi_path):
+# Reference analyzers in output column order. extract_features_from_stream
+# computes the same values in one pass; these are kept for parity checks.
+FEATURE_ANALYZERS = {
+    'max_stretch': analyze_hand_span,
+    'max_chord_size': analyze_max_chord_size,
+    'note_density': analyze_note_density,
+    'left_hand_activity': analyze_left_hand_activity,
+    'avg_tempo': analyze_tempo,
+    'dynamic_range': analyze_dynamic_range,
+    'poly_voice_count': analyze_polyphony,
+    'octave_jump_frequency': analyze_octave_jumps,
+    'thirds_frequency': analyze_thirds,
+    'polyrhythm_score': analyze_polyrhythm
+}
+
+class _FeatureAccumulator:
+    """
+    Running state for all 10 features, filled one element at a time.
+    
+    Elements must be fed in flattened stream order so that the interval
+    based features (octave jumps, thirds) see the same note sequence as
+    the individual analyze_* functions.
+    """
+    
+    def __init__(self):
+        self.max_stretch = 0
+        self.max_chord_size = 0
+        self.total_notes = 0
+        self.left_hand_notes = 0
+        self.tempos = []
+        self.dynamic_values = []
+        self.voice_counts_total = 0
+        self.element_count = 0
+        self.last_top_pitch = None
+        self.top_intervals = 0
+        self.octave_jumps = 0
+        self.last_note_pitch = None
+        self.note_intervals = 0
+        self.thirds_count = 0
+        self.durations = set()
+    
+    def _add_top_pitch(self, pitch):
+        if self.last_top_pitch is not None:
+            self.top_intervals += 1
+            if abs(pitch - self.last_top_pitch) >= 12:
+                self.octave_jumps += 1
+        self.last_top_pitch = pitch
+    
+    def add_note(self, pitch, quarter_length):
+        """Add a single pitched note (MIDI number)."""
+        self.total_notes += 1
+        if pitch < 60:
+            self.left_hand_notes += 1
+        self.voice_counts_total += 1
+        self.element_count += 1
+        self._add_top_pitch(pitch)
+        if self.last_note_pitch is not None:
+            self.note_intervals += 1
+            if abs(pitch - self.last_note_pitch) % 12 in (3, 4):
+                self.thirds_count += 1
+        self.last_note_pitch = pitch
+        self.durations.add(quarter_length)
+    
+    def add_chord(self, pitches, quarter_length):
+        """Add a chord given as a list of MIDI numbers."""
+        size = len(pitches)
+        if size >= 2:
+            self.max_stretch = max(self.max_stretch, max(pitches) - min(pitches))
+        self.max_chord_size = max(self.max_chord_size, size)
+        self.total_notes += size
+        self.left_hand_notes += sum(1 for p in pitches if p < 60)
+        self.voice_counts_total += size
+        self.element_count += 1
+        if pitches:
+            self._add_top_pitch(max(pitches))
+        self.durations.add(quarter_length)
+    
+    def add_unpitched(self, quarter_length):
+        """Add a note-like element without pitches (e.g. percussion)."""
+        self.voice_counts_total += 1
+        self.element_count += 1
+        self.durations.add(quarter_length)
+    
+    def add_tempo(self, bpm):
+        self.tempos.append(bpm)
+    
+    def add_dynamic(self, value):
+        if value in DYNAMIC_VALUES:
+            self.dynamic_values.append(DYNAMIC_VALUES[value])
+    
+    def result(self, duration_quarters, n_parts):
+        """
+        Finalize the features.
+        
+        Args:
+            duration_quarters (float): Total duration in quarter lengths
+            n_parts (int): Number of parts in the score
+            
+        Returns:
+            dict: Dictionary of 10 features
+        """
+        tempo = self.tempos[0] if self.tempos else 120
+        duration_seconds = (duration_quarters / tempo) * 60
+        
+        if n_parts:
+            poly_voice_count = float(n_parts)
+        elif self.element_count:
+            poly_voice_count = float(self.voice_counts_total / self.element_count)
+        else:
+            poly_voice_count = 1.0
+        
+        return {
+            'max_stretch': float(self.max_stretch),
+            'max_chord_size': int(self.max_chord_size),
+            'note_density': float(self.total_notes / duration_seconds) if duration_seconds > 0 else 0.0,
+            'left_hand_activity': float(self.left_hand_notes / self.total_notes) if self.total_notes > 0 else 0.0,
+            'avg_tempo': float(np.mean(self.tempos)) if self.tempos else 120.0,
+            'dynamic_range': float(max(self.dynamic_values) - min(self.dynamic_values)) if self.dynamic_values else 0.0,
+            'poly_voice_count': poly_voice_count,
+            'octave_jump_frequency': float(self.octave_jumps / self.top_intervals) if self.top_intervals > 0 else 0.0,
+            'thirds_frequency': float(self.thirds_count / self.note_intervals) if self.note_intervals > 0 else 0.0,
+            'polyrhythm_score': float(len(self.durations) / self.element_count) if self.element_count else 0.0
+        }
+
+
+def extract_features_from_stream(stream, features=None):
+    """
+    Extract every registered feature from a parsed stream.
+    
+    The 10 original features come from one walk over the flattened stream
+    instead of one per analyzer (same values as FEATURE_ANALYZERS); any
+    other registered analyzer runs on a NoteArray converted from the stream.
+    
+    Args:
+        stream: Parsed music21 stream (usually a Score)
+        features (list, optional): Only these features. The stream is
+                                   converted once with just the inputs they
+                                   read (see note_array.ANALYZERS) and only
+                                   their analyzers run
+        
+    Returns:
+        dict: Dictionary of all features (or of the requested ones)
+    """
+    music21 = _load_music21()
+    if features is not None:
+        with stage('convert'):
+            notes = NoteArray.from_stream(stream, inputs=required_inputs(features))
+        return extract_features_from_note_array(notes, features)
+    
+    with stage('analyze'):
+        acc = _FeatureAccumulator()
+        
+        for element in stream.flatten():
+            if isinstance(element, music21.chord.Chord):
+                acc.add_chord([p.midi for p in element.pitches], element.quarterLength)
+            elif isinstance(element, music21.note.Note):
+                acc.add_note(element.pitch.midi, element.quarterLength)
+            elif isinstance(element, music21.note.NotRest):
+                acc.add_unpitched(element.quarterLength)
+            elif isinstance(element, music21.tempo.MetronomeMark):
+                acc.add_tempo(element.number)
+            elif isinstance(element, music21.dynamics.Dynamic):
+                acc.add_dynamic(element.value)
+        
+        values = acc.result(stream.duration.quarterLength, len(stream.parts))
+    
+    # Analyzers registered since the fused walk was written
+    extra = [name for name in ANALYZERS if name not in values]
+    if extra:
+        with stage('convert'):
+            notes = NoteArray.from_stream(stream, inputs=required_inputs(extra))
+        values.update(extract_features_from_note_array(notes, extra))
+    return values
+
+
+def extract_features_from_score(score, features=None):
+    """
+    Extract all 10 features from a MidiScore (native backend).
+    
+    The score's music21-compatible note elements are packed into a
+    NoteArray and featurized with the vectorized analyzers. Values track
+    the music21 path closely; small differences remain where music21
+    splits notes into extra voices or fills gaps during quantization.
+    
+    Args:
+        score (MidiScore): Score parsed by midi_reader.read_midi
+        features (list, optional): Only these features, skipping the passes
+                                   they do not read
+        
+    Returns:
+        dict: Dictionary of 10 features (or of the requested ones)
+    """
+    inputs = None if features is None else required_inputs(features)
+    with stage('convert'):
+        notes = NoteArray.from_score(score, inputs=inputs)
+    return extract_features_from_note_array(notes, features)
+
+
+def extract_features_from_midi(midi_path, backend=DEFAULT_BACKEND, raise_errors=False, features=None):
     """
     Extract all 10 technical difficulty features from a MIDI file.
     
     Args:
-        midi_path (str): Path to MIDI file
+        midi_path (str): Path to MIDI file, or a zip/tar member address
+                         ("archive.zip::member.mid", see midi_archive.py)
+        backend (str): Parser backend, 'music21' (default) or 'native'
+        raise_errors (bool): Raise parse/analysis errors instead of returning None
+        features (list, optional): Only compute these features; only the
+                                   passes their analyzers read are run
         
     Returns:
-        dict: Dictionary of 10 features
+        dict: Dictionary of 10 features, or of the requested ones
+              (None if the file could not be processed)
     """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Available: {list(BACKENDS)}")
+    if features is not None:
+        required_inputs(features)  # unknown names are a usage error, not a bad file
+    
     try:
-        # Parse MIDI file with faster method
-        stream = music21.converter.parse(midi_path, forceSource=True, storePickle=False)
+        if split_member(midi_path) is not None:
+            # Archive member: parsed from memory, nothing is unpacked
+            with stage('read'):
+                data = read_source(midi_path)
+            return extract_features_from_bytes(data, backend, raise_errors=True, features=features)
         
-        # Extract all features
-        features = {
-            'max_stretch': analyze_hand_span(stream),
-            'max_chord_size': analyze_max_chord_size(stream),
-            'note_density': analyze_note_density(stream),
-            'left_hand_activity': analyze_left_hand_activity(stream),
-            'avg_tempo': analyze_tempo(stream),
-            'dynamic_range': analyze_dynamic_range(stream),
-            'poly_voice_count': analyze_polyphony(stream),
-            'octave_jump_frequency': analyze_octave_jumps(stream),
-            'thirds_frequency': analyze_thirds(stream),
-            'polyrhythm_score': analyze_polyrhythm(stream)
-        }
+        if backend == 'native':
+            with stage('parse'):
+                score = read_midi(midi_path)
+            return extract_features_from_score(score, features)
         
-        return features
+        # Parse MIDI file with faster method
+        music21 = _load_music21()
+        with stage('parse'):
+            stream = music21.converter.parse(midi_path, forceSource=True, storePickle=False)
+        
+        # Extract all features in a single pass over the notes
+        return extract_features_from_stream(stream, features)
         
     except KeyboardInterrupt:
         raise
     except Exception as e:
+        if raise_errors:
+            raise
         # Skip corrupted or problematic files
         return None
 
 
-def extract_features_batch(midi_files, output_csv=None, n_jobs=None, save_interval=100):
+def extract_features_from_bytes(data, backend=DEFAULT_BACKEND, raise_errors=False, features=None):
+    """
+    Extract all 10 technical difficulty features from MIDI file content in
+    memory, e.g. an upload, without writing a temporary file.
+    
+    Args:
+        data (bytes): Raw bytes of a Standard MIDI File
+        backend (str): Parser backend, 'music21' (default) or 'native'
+        raise_errors (bool): Raise parse/analysis errors instead of returning None
+        features (list, optional): Only compute these features
+        
+    Returns:
+        dict: Dictionary of 10 features, or of the requested ones
+              (None if the data could not be processed)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Available: {list(BACKENDS)}")
+    if features is not None:
+        required_inputs(features)
+    
+    try:
+        if backend == 'native':
+            with stage('parse'):
+                score = read_midi(data)
+            return extract_features_from_score(score, features)
+        # Same translation converter.parse applies to a .mid file
+        music21 = _load_music21()
+        with stage('parse'):
+            stream = music21.midi.translate.midiStringToStream(bytes(data))
+        return extract_features_from_stream(stream, features)
+        
+    except KeyboardInterrupt:
+        raise
+    except Exception as e:
+        if raise_errors:
+            raise
+        return None
+
+
+def extract_features_from_fileobj(fileobj, backend=DEFAULT_BACKEND, raise_errors=False, features=None):
+    """
+    Extract features from a binary file-like object (an open file, a
+    BytesIO, a request stream). It is read to the end from its current
+    position.
+    
+    Args:
+        fileobj: Object with a read() method returning bytes
+        backend (str): Parser backend, 'music21' (default) or 'native'
+        raise_errors (bool): Raise parse/analysis errors instead of returning None
+        features (list, optional): Only compute these features
+        
+    Returns:
+        dict: Dictionary of 10 features, or of the requested ones
+              (None if the data could not be processed)
+    """
+    return extract_features_from_bytes(fileobj.read(), backend, raise_errors=raise_errors, features=features)
+
+
+def parse_note_array(midi_path, backend=DEFAULT_BACKEND, inputs=None):
+    """
+    Parse a MIDI file into a NoteArray, the compact form kept by the note
+    cache. extract_features_from_note_array gives the same features as
+    extract_features_from_midi for it.
+    
+    Args:
+        midi_path (str or MidiBuffer): Path to MIDI file, archive member
+                                       address or pre-read content
+        backend (str): Parser backend, 'music21' (default) or 'native'
+        inputs (iterable, optional): NOTE_INPUTS to load (default: all; only a
+                                     fully loaded array can be cached)
+        
+    Returns:
+        NoteArray: Notes, tempo map and dynamics of the file
+        
+    Raises:
+        Exception: Whatever the parser raises for an unreadable file
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Available: {list(BACKENDS)}")
+    source = midi_path
+    if isinstance(midi_path, MidiBuffer) or split_member(midi_path) is not None:
+        with stage('read'):
+            source = bytes(read_source(midi_path))
+    with stage('parse'):
+        if backend == 'native':
+            parsed = read_midi(source)
+        elif isinstance(source, bytes):
+            parsed = _load_music21().midi.translate.midiStringToStream(source)
+        else:
+            parsed = _load_music21().converter.parse(source, forceSource=True, storePickle=False)
+    with stage('convert'):
+        if backend == 'native':
+            return NoteArray.from_score(parsed, inputs=inputs)
+        return NoteArray.from_stream(parsed, inputs=inputs)
+
+
+def extract_features_batch(midi_files, output_csv=None, n_jobs=None, save_interval=100,
+                           backend=DEFAULT_BACKEND, cache=None, resume=False,
+                           sink_format=None, return_df=True, timeout=None, max_memory_mb=None,
+                           max_tasks_per_child=None, max_memory_growth_mb=None, warm_workers=False,
+                           failure_index=None, retry_failures=False, manifest=None, read_ahead=False,
+                           note_cache=None, features=None, profile=None, root=None):
     """
     Extract features from multiple MIDI files using parallel processing.
     
+    Results are streamed to disk: every save_interval rows are appended to
+    the partial output, which is moved into place when the run finishes.
+    
     Args:
-        midi_files (list): List of MIDI file paths
+        midi_files (iterable): MIDI file paths, archive member addresses or
+                               MidiBuffers (pre-read content). Any iterable works
+                               (e.g. corpus_scan.scan_midi_files); it is consumed
+                               lazily, STREAM_WINDOW files at a time
         output_csv (str, optional): Path to save features CSV
         n_jobs (int, optional): Number of parallel jobs. 
                                None = use all CPUs - 1 (to keep system responsive)
-        save_interval (int): Save progress every N files (default: 100)
+        save_interval (int): Append results to disk every N files (default: 100)
+        backend (str): Parser backend, 'music21' (default) or 'native'
+        cache (str or FeatureCache, optional): Feature cache (or path to one).
+                               Files whose content is already cached for this
+                               extractor version are not re-parsed
+        resume (bool): Continue the partial output of an interrupted run and
+                               skip files already in it
+        sink_format (str, optional): 'csv' or 'npz' (chunked columnar, see
+                               feature_sink.py). None = 'csv' for .csv paths
+        return_df (bool): Load the written output back as a DataFrame. Pass
+                               False to keep memory bounded on large corpora
+        timeout (float, optional): Seconds allowed per file before its worker
+                               is killed and the file recorded as failed
+        max_memory_mb (float, optional): Resident memory allowed per worker;
+                               a worker above it is killed the same way
+        max_tasks_per_child (int, optional): Replace each worker after this
+                               many tasks, releasing music21's caches
+        max_memory_growth_mb (float, optional): Replace a worker once its memory
+                               has grown this much since its first task
+        warm_workers (bool): Run on the shared pool from start_warm_pool() and
+                               keep its workers alive for the next call
+        failure_index (str or FailureIndex, optional): Failure index (or path
+                               to one). Failed files are recorded with their
+                               error, and files that already failed for this
+                               extractor version are skipped. Timeouts and
+                               memory-limit kills are not recorded
+        retry_failures (bool): Extract files in the failure index again;
+                               the ones that now succeed are removed from it
+        manifest (str or CorpusManifest, optional): Corpus manifest (or path
+                               to one) used for content digests, so files whose
+                               size and mtime are unchanged are not rehashed
+        read_ahead (bool): Read each window of files in this process and send
+                               the bytes to the workers: one sequential read
+                               per file serves both hashing and parsing
+        note_cache (str or NoteCache, optional): Parsed-note cache (or path
+                               to one). Parsed files keep their notes there, and
+                               files with cached notes are featurized from them
+                               without parsing (e.g. after EXTRACTOR_VERSION changes)
+        features (list, optional): Only extract these feature columns; files
+                               are parsed with just the passes they need
+        profile (str or ExtractionProfile, optional): Time every stage of every
+                               file (parse, convert, each analyzer, IPC) and the
+                               main process's hashing and lookups. A path gets a
+                               JSON report plus a per-file CSV at the end of the
+                               run; an ExtractionProfile is filled in for the caller
+        root (str, optional): Directory or archive midi_files were found under.
+                               Rows are named by their path relative to it
+                               (see midi_archive.source_name) instead of their
+                               file name, so same-named files in different
+                               folders get their own rows. Files whose name
+                               repeats an earlier one are reported
         
     Returns:
         pd.DataFrame: DataFrame with features for all files
+                      (None if return_df is False and output_csv is given)
     """
     import pandas as pd
     from tqdm import tqdm
@@ -308,28 +785,180 @@ def extract_features_batch(midi_files, output_csv=None, n_jobs=None, save_interv
     import sys
     import atexit
     
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Available: {list(BACKENDS)}")
+    if features is not None:
+        required_inputs(features)
+    
     # Determine number of workers
     if n_jobs is None:
         # Use all CPUs minus 1 to keep system responsive
         n_jobs = max(1, mp.cpu_count() - 1)
     
     print(f"  💻 Using {n_jobs} CPU cores (out of {mp.cpu_count()} available)")
-    print(f"  📊 Processing {len(midi_files)} MIDI files...")
+    if hasattr(midi_files, '__len__'):
+        print(f"  📊 Processing {len(midi_files)} MIDI files ({backend} backend)...")
+    else:
+        print(f"  📊 Processing MIDI files as they are found ({backend} backend)...")
     print(f"  💾 Auto-saving every {save_interval} files")
-    print(f"  ℹ️  Press Ctrl+C to stop (last auto-save will be kept)")
+    print(f"  ℹ️  Press Ctrl+C to stop (saved progress is kept; resume=True continues from it)")
     
-    # Process files in parallel
+    # Results go straight to the sink when writing to disk; they are only
+    # kept in memory when there is no output file
     results = []
+    sink = None
+    if output_csv:
+        sink = open_feature_sink(output_csv, sink_format, chunk_size=save_interval, resume=resume)
+    failures = []
     pool = None
     interrupted = False
     
+    def emit(row):
+        if profile is not None:
+            profile.mark_finished()
+        if sink is None:
+            results.append(row)
+        elif sink.add(row):
+            if cache is not None:
+                cache.commit()
+            if failure_index is not None:
+                failure_index.commit()
+            if note_cache is not None:
+                note_cache.commit()
+            # Print on same line to not clutter output
+            tqdm.write(f"  💾 Auto-saved {sink.rows_written} files to {Path(sink.partial_path).name}")
+    
+    # Pick up where an interrupted run left off
+    done = set()
+    if resume and sink is not None:
+        done = sink.completed_names()
+        resumed = len(done)
+        for row in _load_checkpoints(output_csv):
+            if row['midi_filename'] not in done:
+                sink.add(row)
+                done.add(row['midi_filename'])
+                resumed += 1
+        if resumed:
+            print(f"  ⏯️  Resuming: {resumed} files already extracted")
+    
+    owns_cache = False
+    owns_failure_index = False
+    owns_manifest = False
+    owns_note_cache = False
+    profile_path = None
+    if profile is not None and not isinstance(profile, ExtractionProfile):
+        profile_path = profile
+        profile = ExtractionProfile()
+    if cache is not None and not isinstance(cache, FeatureCache):
+        cache = FeatureCache(cache)
+        owns_cache = True
+    if failure_index is not None and not isinstance(failure_index, FailureIndex):
+        failure_index = FailureIndex(failure_index)
+        owns_failure_index = True
+    if manifest is not None and not isinstance(manifest, CorpusManifest):
+        manifest = CorpusManifest(manifest)
+        owns_manifest = True
+    if note_cache is not None and not isinstance(note_cache, NoteCache):
+        note_cache = NoteCache(note_cache)
+        owns_note_cache = True
+    cache_version = f"{EXTRACTOR_VERSION}/{backend}/{feature_set_version(features)}"
+    notes_version = note_source(backend)
+    need_digests = (cache is not None or failure_index is not None or manifest is not None
+                    or note_cache is not None)
+    counts = Counter()
+    seen_names = set()
+    # Digests of files handed to the pool, and known failures being retried
+    digest_of = {}
+    known_failures = {}
+    progress = None
+    
+    def timed(name):
+        # Main-process stage; a no-op unless profiling
+        return profile.parent_stage(name) if profile is not None else stage(name)
+    
+    def digest_for(midi_path):
+        try:
+            if manifest is not None and not isinstance(midi_path, MidiBuffer):
+                return manifest.digest(midi_path)
+            return source_digest(midi_path)
+        except OSError:
+            return None
+    
+    def name_of(midi_path):
+        return source_name(midi_path, root)
+    
+    def pending_tasks():
+        """
+        Consume the input one window at a time: answer what we can from the
+        cache, skip known failures and schedule the rest for the pool.
+        """
+        for window in _windows(midi_files, STREAM_WINDOW):
+            if interrupted:
+                return
+            names = [name_of(f) for f in window]
+            for name in names:
+                if name in seen_names:
+                    counts['repeated_names'] += 1
+                    tqdm.write(f"  ⚠ {name}: name already used by another file")
+                seen_names.add(name)
+            if done:
+                window = [f for f, name in zip(window, names) if name not in done]
+            if read_ahead:
+                with timed('read_ahead'):
+                    window = [preload_source(f, root) for f in window]
+            with timed('hash'):
+                digests = [digest_for(f) for f in window] if need_digests else [None] * len(window)
+            with timed('cache_lookup'):
+                cached = cache.get_many(digests, cache_version) if cache is not None else {}
+                known = failure_index.get_many(digests, cache_version) if failure_index is not None else {}
+                parsed = {}
+                if note_cache is not None:
+                    parsed = note_cache.get_many([d for d in digests if d not in cached], notes_version)
+            pending = []
+            for midi_path, content_digest in zip(window, digests):
+                if content_digest in cached:
+                    counts['hits'] += 1
+                    values = dict(cached[content_digest])
+                    values['midi_filename'] = name_of(midi_path)
+                    emit(values)
+                elif content_digest in parsed:
+                    # Parsed before: only the analyzers run
+                    counts['from_notes'] += 1
+                    with timed('from_notes'):
+                        values = extract_features_from_note_array(parsed[content_digest], features)
+                    if cache is not None:
+                        cache.put(content_digest, cache_version, values)
+                    if content_digest in known:
+                        failure_index.remove(content_digest, cache_version)
+                    values['midi_filename'] = name_of(midi_path)
+                    emit(values)
+                elif (content_digest in known and not retry_failures
+                      and known[content_digest]['error_class'] not in POOL_LIMITS):
+                    counts['skipped'] += 1
+                    failure = known[content_digest]
+                    failures.append({'midi_filename': name_of(midi_path),
+                                     'error_class': failure['error_class'],
+                                     'message': failure['message'],
+                                     'elapsed': failure['elapsed'],
+                                     'skipped': True})
+                else:
+                    counts['misses'] += 1
+                    if content_digest in known:
+                        known_failures[content_digest] = known[content_digest]
+                    digest_of[_source_key(midi_path)] = content_digest
+                    pending.append(midi_path)
+            progress.total += len(pending)
+            progress.refresh()
+            # Largest files first, tiny files packed into shared tasks
+            yield from schedule_files(pending, size_of=source_size, n_workers=n_jobs)
+    
     def cleanup_pool():
         """Cleanup function to ensure pool is terminated."""
         nonlocal pool
         if pool is not None:
             try:
                 pool.terminate()
-                pool.join(timeout=5)
+                pool.join()
             except:
                 pass
     
@@ -346,54 +975,136 @@ def extract_features_batch(midi_files, output_csv=None, n_jobs=None, save_interv
     original_sigint = signal.signal(signal.SIGINT, signal_handler)
     
     try:
-        # Use multiprocessing Pool with context manager for safety
-        pool = mp.Pool(processes=n_jobs)
+        # Workers that exceed the time or memory limit are killed and
+        # replaced; results arrive in completion order
+        limits = dict(timeout=timeout, max_rss_mb=max_memory_mb,
+                      max_tasks_per_child=max_tasks_per_child, max_growth_mb=max_memory_growth_mb)
+        if warm_workers:
+            pool = start_warm_pool(n_jobs)
+            pool.set_limits(**limits)
+            pool.reset_stats()
+        else:
+            pool = GuardedPool(n_jobs, **limits)
+        extract_chunk = functools.partial(_extract_features_chunk, backend=backend,
+                                          keep_notes=note_cache is not None, features=features,
+                                          profile=profile is not None)
         
-        # Process files with progress bar
-        for i, features in enumerate(tqdm(
-            pool.imap(_extract_features_worker, midi_files),
-            total=len(midi_files),
-            desc="Extracting features"
-        )):
-            if interrupted:
+        # Files are hashed and scheduled lazily, as the pool asks for work
+        progress = tqdm(total=0, desc="Extracting features")
+        tasks = pending_tasks()
+        while not interrupted:
+            retry = []
+            for task in pool.imap_unordered(tasks, extract_chunk):
+                if interrupted:
+                    break
+                progress.update(len(task.task))
+                if task.error and len(task.task) > 1:
+                    # A chunk was killed: retry its files one by one so only
+                    # the offending file is recorded as failed
+                    retry.extend([path] for path in task.task)
+                    progress.update(-len(task.task))
+                    continue
+                outcomes = task.value or [(None, None, None, None)] * len(task.task)
+                if profile is not None:
+                    # Round trip as seen here, minus the time the worker spent on the files
+                    worker_seconds = sum(timings['total'] for *_, timings in outcomes if timings)
+                    ipc = (task.elapsed - worker_seconds) / len(task.task)
+                for midi_path, (values, failure, notes, timings) in zip(task.task, outcomes):
+                    if timings is not None:
+                        worker = timings.pop('worker', None)
+                        profile.add_file(name_of(midi_path), timings, ipc=ipc, worker=worker)
+                    content_digest = digest_of.pop(_source_key(midi_path), None)
+                    if notes is not None and content_digest:
+                        note_cache.put(content_digest, notes_version, notes)
+                    if values:
+                        if cache is not None and content_digest:
+                            cache.put(content_digest, cache_version, values)
+                        if known_failures.pop(content_digest, None):
+                            failure_index.remove(content_digest, cache_version)
+                        values['midi_filename'] = name_of(midi_path)
+                        emit(values)
+                        continue
+                    if failure is None:
+                        # The pool lost the file (timeout, memory limit, crash)
+                        failure = {'error_class': task.error_class, 'message': task.error,
+                                   'elapsed': task.elapsed}
+                        tqdm.write(f"  ⚠ {name_of(midi_path)}: {task.error}")
+                    failures.append(dict(failure, midi_filename=name_of(midi_path), skipped=False))
+                    if profile is not None:
+                        profile.mark_finished()
+                    # A file that only broke a pool limit may well fit within
+                    # the limits of a later run, so it is not remembered
+                    if (failure_index is not None and content_digest
+                            and failure['error_class'] not in POOL_LIMITS):
+                        failure_index.record(content_digest, cache_version, failure['error_class'],
+                                             failure['message'], failure['elapsed'], name_of(midi_path))
+            if not retry:
                 break
-            if features:
-                results.append(features)
-            
-            # Auto-save every save_interval files
-            if output_csv and len(results) > 0 and len(results) % save_interval == 0:
-                df_temp = pd.DataFrame(results)
-                temp_path = output_csv.replace('.csv', '_progress.csv')
-                os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-                df_temp.to_csv(temp_path, index=False)
-                # Print on same line to not clutter output
-                tqdm.write(f"  💾 Auto-saved {len(results)} files to {Path(temp_path).name}")
+            tasks = retry
+        progress.close()
         
-        # Close pool properly
+        if cache is not None:
+            print(f"  ♻️  Cache: {counts['hits']} hits, {counts['misses']} misses")
+        if counts['from_notes']:
+            print(f"  🎼 Notes: {counts['from_notes']} files featurized from cached notes")
+        if counts['skipped']:
+            print(f"  ⏭️  Skipped {counts['skipped']} files that failed before (retry_failures=True retries them)")
+        if counts['repeated_names']:
+            hint = "" if root is not None else " (root= names rows by their relative path)"
+            print(f"  ⚠ {counts['repeated_names']} files repeat another file's name{hint}; "
+                  f"resume and backfill cannot tell their rows apart")
         if not interrupted:
+            _report_utilization(pool)
+        if profile is not None:
+            profile.print_summary()
+            if profile_path:
+                json_path, csv_path = profile.write(profile_path)
+                print(f"  ⏱️  Profile saved to {json_path} (per file: {Path(csv_path).name})")
+        
+        # Close pool properly
+        if warm_workers and not interrupted:
+            # Keep the warm workers for the next call
+            pool = None
+        elif not interrupted:
             pool.close()
             pool.join()
         else:
             pool.terminate()
-            pool.join(timeout=5)
+            pool.join()
         
     except Exception as e:
         print(f"\n❌ Error: {e}")
         cleanup_pool()
         
-        # Save what we have
-        if results and output_csv:
-            print(f"💾 Saving {len(results)} processed files before exit...")
-            df_partial = pd.DataFrame(results)
-            partial_path = output_csv.replace('.csv', '_error_backup.csv')
-            os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-            df_partial.to_csv(partial_path, index=False)
-            print(f"✓ Backup saved to {partial_path}")
+        # Everything extracted so far stays in the partial output
+        if sink is not None:
+            sink.flush()
+            print(f"💾 {sink.rows_written} processed files kept in {sink.partial_path} (resume=True continues)")
         raise
     
     finally:
         # Ensure cleanup happens
         cleanup_pool()
+        # Keep whatever was extracted, even after an interruption
+        if cache is not None:
+            cache.commit()
+            evicted = cache.evict()
+            if evicted:
+                print(f"  ♻️  Evicted {evicted} old cache entries")
+            if owns_cache:
+                cache.close()
+        if failure_index is not None:
+            failure_index.commit()
+            if owns_failure_index:
+                failure_index.close()
+        if manifest is not None:
+            manifest.commit()
+            if owns_manifest:
+                manifest.close()
+        if note_cache is not None:
+            note_cache.commit()
+            if owns_note_cache:
+                note_cache.close()
         # Restore original signal handler
         signal.signal(signal.SIGINT, original_sigint)
         # Unregister atexit
@@ -402,40 +1113,417 @@ def extract_features_batch(midi_files, output_csv=None, n_jobs=None, save_interv
         except:
             pass
     
-    # Save final results
-    df = pd.DataFrame(results)
+    _report_failures(failures, output_csv)
+    
+    if sink is None:
+        return pd.DataFrame(results)
+    
+    if interrupted:
+        # Leave the partial output in place so the run can be resumed
+        sink.flush()
+        print(f"\n  ⏸️  Stopped after {sink.rows_written} files; progress kept in {sink.partial_path}")
+        return sink.read(finalized=False) if return_df else None
+    
+    # Only a rename: rows already on disk are not written again
+    sink.finalize()
+    write_table_versions(output_csv, feature_versions(features), backend)
+    print(f"\n  ✓ Saved all {sink.rows_written} features to {output_csv}")
+    
+    # The legacy error backup has been merged into the output by now
+    backup_path = output_csv.replace('.csv', '_error_backup.csv')
+    if backup_path != output_csv and os.path.exists(backup_path):
+        os.remove(backup_path)
+        print(f"  ✓ Cleaned up {Path(backup_path).name}")
+    
+    return sink.read() if return_df else None
+
+
+def backfill_features(features_path, midi_files, backend=None, note_cache=None, manifest=None,
+                      n_jobs=None, recompute=None, root=None):
+    """
+    Bring an existing feature table up to date with the feature registry,
+    in place, computing only what is missing or outdated.
+    
+    A column is outdated when the table's recorded version (see
+    feature_registry.read_table_versions) differs from the registry; its
+    values are recomputed for every row. Up-to-date columns are only
+    filled where a row has no value. Files with cached notes are featurized
+    from them without parsing; the rest are parsed once (and their notes
+    cached). Rows whose MIDI file cannot be found or parsed keep no value
+    for recomputed columns, so a later run fills them in.
+    
+    Args:
+        features_path (str): Features CSV (its .fstore is rebuilt too) or
+                             feature store directory
+        midi_files (iterable): The corpus (paths or archive member
+                               addresses); rows are matched by midi_filename
+        backend (str, optional): Parser backend. None = the one the table
+                                 was extracted with
+        note_cache (str or NoteCache, optional): Parsed-note cache (or path)
+        manifest (str or CorpusManifest, optional): Corpus manifest (or path)
+                                                    used for content digests
+        n_jobs (int, optional): Workers for files that need parsing
+        recompute (list, optional): Features to recompute even if up to date
+        root (str, optional): Directory or archive the corpus is under; pass
+                              the root the table was extracted with (see
+                              extract_features_batch)
+        
+    Returns:
+        dict: feature name -> number of values written
+    """
+    import pandas as pd
+    import os
+    
+    features_path = Path(features_path)
+    is_store = features_path.suffix == STORE_SUFFIX
+    if not is_store and features_path.suffix != '.csv':
+        raise ValueError(f"Backfill needs a features CSV or feature store, got {features_path}")
+    for name in recompute or []:
+        if name not in FEATURES:
+            raise ValueError(f"Unknown feature: {name}. Available: {FEATURE_NAMES}")
+    
+    if is_store:
+        # Writable float64 columns, so backfilled values can be merged in place
+        df = FeatureStore(features_path).to_dataframe(widen=True, copy=True)
+    else:
+        df = pd.read_csv(features_path)
+    recorded = read_table_versions(features_path, list(df.columns))
+    backend = backend or recorded['backend'] or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Available: {list(BACKENDS)}")
+    
+    # Rows to compute, per feature
+    stale = set(outdated_features(recorded['features'])) | set(recompute or [])
+    needed = {}
+    for name in FEATURE_NAMES:
+        if name in stale or name not in df.columns:
+            needed[name] = np.ones(len(df), dtype=bool)
+        else:
+            needed[name] = df[name].isna().to_numpy()
+    needed = {name: rows for name, rows in needed.items() if rows.any()}
+    
+    print(f"  📋 {len(df)} rows in {features_path.name} ({backend} backend)")
+    for name in FEATURE_NAMES:
+        if name in stale:
+            old = recorded['features'].get(name)
+            reason = f"v{old} -> v{FEATURES[name].version}" if old else "new"
+            print(f"     {name}: {reason}, all rows")
+        elif name in needed:
+            print(f"     {name}: {int(needed[name].sum())} rows missing")
+    if not needed:
+        print("  ✓ Feature table is up to date")
+        return {}
+    
+    owns_note_cache = note_cache is not None and not isinstance(note_cache, NoteCache)
+    if owns_note_cache:
+        note_cache = NoteCache(note_cache)
+    owns_manifest = manifest is not None and not isinstance(manifest, CorpusManifest)
+    if owns_manifest:
+        manifest = CorpusManifest(manifest)
+    
+    try:
+        rows = np.flatnonzero(np.any(list(needed.values()), axis=0))
+        path_of = {}
+        for midi_path in midi_files:
+            path_of.setdefault(source_name(midi_path, root), midi_path)
+        targets = {row: path_of.get(df['midi_filename'].iat[row]) for row in rows}
+        unresolved = sum(path is None for path in targets.values())
+        if unresolved == len(targets):
+            raise ValueError("None of the rows to backfill match a MIDI file in the corpus")
+        if unresolved:
+            print(f"  ⚠ {unresolved} rows have no MIDI file in the corpus")
+        
+        def digest_for(midi_path):
+            try:
+                return manifest.digest(midi_path) if manifest is not None else source_digest(midi_path)
+            except OSError:
+                return None
+        
+        digests = {row: digest_for(path) for row, path in targets.items() if path is not None}
+        notes = {}
+        if note_cache is not None:
+            notes = note_cache.get_many(list(digests.values()), note_source(backend))
+        names = list(needed)
+        values = {}
+        for row, content_digest in digests.items():
+            if content_digest in notes:
+                values[row] = extract_features_from_note_array(notes[content_digest], names)
+        print(f"  🎼 {len(values)} files featurized from cached notes")
+        
+        to_parse = {targets[row]: row for row in digests if row not in values}
+        if to_parse:
+            print(f"  🔍 Parsing {len(to_parse)} files without cached notes...")
+            parsed = extract_features_batch(list(to_parse), n_jobs=n_jobs, backend=backend,
+                                            note_cache=note_cache, manifest=manifest, features=names,
+                                            root=root)
+            by_name = {record['midi_filename']: record for record in parsed.to_dict('records')}
+            for midi_path, row in to_parse.items():
+                record = by_name.get(source_name(midi_path, root))
+                if record is not None:
+                    values[row] = {name: record[name] for name in names}
+    finally:
+        if note_cache is not None:
+            note_cache.commit()
+            if owns_note_cache:
+                note_cache.close()
+        if manifest is not None:
+            manifest.commit()
+            if owns_manifest:
+                manifest.close()
+    
+    # Merge: outdated values without a replacement are dropped, not kept
+    written = {}
+    computed = pd.DataFrame.from_dict(values, orient='index', columns=names).reindex(range(len(df)))
+    for name, rows_needed in needed.items():
+        if name in stale or name not in df.columns:
+            df[name] = computed[name]
+        else:
+            df.loc[rows_needed, name] = computed.loc[rows_needed, name]
+        written[name] = int(computed.loc[rows_needed, name].notna().sum())
+        if FEATURES[name].dtype == 'int' and df[name].notna().all():
+            df[name] = df[name].astype(int)
+    # Registry columns in model input order, then everything else
+    df = df[[name for name in FEATURE_NAMES if name in df.columns]
+            + [column for column in df.columns if column not in FEATURES]]
+    
+    if is_store:
+        write_feature_store(df, features_path)
+    else:
+        tmp_path = str(features_path) + '.tmp'
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, features_path)
+        if features_path.with_suffix(STORE_SUFFIX).exists():
+            import_csv(features_path)
+    # A column that received no values keeps its old version (or none), so
+    # the next run computes it again
+    versions = dict(recorded['features'])
+    versions.update(feature_versions([name for name, count in written.items() if count]))
+    write_table_versions(features_path, versions, backend)
+    
+    for name, count in written.items():
+        mark = "✓" if count else "⚠"
+        print(f"  {mark} {name}: {count}/{int(needed[name].sum())} values written")
+    return written
+
+
+def _warm_up_worker():
+    """Pool initializer: load music21 and its settings before the first file."""
+    _load_music21()
+
+
+def start_warm_pool(n_jobs=None, context=None):
+    """
+    Start (or return) the shared pool of pre-imported extraction workers.
+    
+    The workers import music21 and the analyzers once and are reused by every
+    extract_features_batch(..., warm_workers=True) call in this process. With
+    context='forkserver' the server preloads both, so replacement workers
+    start warm too.
+    
+    Args:
+        n_jobs (int, optional): Number of workers. None = all CPUs - 1
+        context (str, optional): multiprocessing start method
+        
+    Returns:
+        GuardedPool: The shared pool
+    """
+    global _warm_pool
+    import atexit
+    import multiprocessing as mp
+    
+    if n_jobs is None:
+        n_jobs = max(1, mp.cpu_count() - 1)
+    pool = _warm_pool
+    if (pool is not None and not pool.closed and pool.processes == n_jobs
+            and context in (None, pool.context)):
+        return pool
+    
+    shutdown_warm_pool()
+    preload = ['music21'] + ([__name__] if __name__ != '__main__' else [])
+    _warm_pool = GuardedPool(n_jobs, initializer=_warm_up_worker, context=context, preload=preload)
+    _warm_pool.start()
+    atexit.unregister(shutdown_warm_pool)
+    atexit.register(shutdown_warm_pool)
+    return _warm_pool
+
+
+def shutdown_warm_pool():
+    """Stop the shared worker pool, if one is running."""
+    global _warm_pool
+    if _warm_pool is not None:
+        _warm_pool.close()
+        _warm_pool.join()
+        _warm_pool = None
+
+
+def _report_utilization(pool):
+    """Print how busy each worker slot was during the run."""
+    stats = pool.utilization()
+    if not any(slot['tasks'] for slot in stats):
+        return
+    print(f"\n  ⚙️  Worker utilization ({pool.wall_seconds:.1f}s wall):")
+    for slot in stats:
+        print(f"     worker {slot['slot']}: {slot['utilization'] * 100:5.1f}% busy, "
+              f"{slot['tasks']} tasks, {slot['recycled']} recycled, {slot['killed']} killed")
+
+
+def _report_failures(failures, output_csv=None):
+    """
+    Print a summary of files that produced no features and, when writing to
+    disk, save them to <output>_failures.csv.
     
+    Args:
+        failures (list): Dicts with midi_filename, error_class, message,
+                         elapsed and skipped (known from an earlier run)
+        output_csv (str, optional): Output path of the run
+    """
+    import os
+    import pandas as pd
+    
+    failures_path = None
     if output_csv:
-        os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-        df.to_csv(output_csv, index=False)
-        print(f"\n  ✓ Saved all {len(results)} features to {output_csv}")
+        failures_path = (output_csv.replace('.csv', '_failures.csv') if output_csv.endswith('.csv')
+                         else output_csv + '_failures.csv')
+    if not failures:
+        # Drop the list left by an earlier run
+        if failures_path and os.path.exists(failures_path):
+            os.remove(failures_path)
+        return
+    
+    df = pd.DataFrame(failures, columns=['midi_filename', 'error_class', 'message', 'elapsed', 'skipped'])
+    df['elapsed'] = pd.to_numeric(df['elapsed'], errors='coerce')
+    new = df[~df['skipped'].astype(bool)]
+    print(f"\n  ⚠ {len(failures)} files failed ({len(new)} this run, {len(df) - len(new)} known and skipped):")
+    print(f"     {'Files':>5}  {'Seconds':>8}  Error")
+    for error_class, group in sorted(df.groupby('error_class'), key=lambda item: -len(item[1])):
+        message = group['message'].value_counts().index[0]
+        print(f"     {len(group):>5}  {group['elapsed'].sum():>8.1f}  {error_class}: {message[:60]}")
+    if len(new):
+        print(f"     {new['elapsed'].sum():.1f}s spent on files that failed this run")
+    if len(new) < len(df):
+        print(f"     {df.loc[df['skipped'].astype(bool), 'elapsed'].sum():.1f}s saved by skipping known failures")
+    
+    if failures_path:
+        df.to_csv(failures_path, index=False)
+        print(f"  ✓ Failed files listed in {failures_path}")
+
+
+def _load_checkpoints(output_csv):
+    """
+    Load the *_error_backup.csv rows written by older extractor versions,
+    which saved a separate backup on errors instead of keeping the partial
+    output.
+    
+    Args:
+        output_csv (str): Final output path of the run
         
-        # Clean up progress file if exists
-        progress_path = output_csv.replace('.csv', '_progress.csv')
-        if os.path.exists(progress_path):
-            os.remove(progress_path)
-            print(f"  ✓ Cleaned up progress file")
+    Returns:
+        list: Feature dicts, one per midi_filename (the most recent wins)
+    """
+    import os
+    import pandas as pd
+    
+    checkpoint_path = output_csv.replace('.csv', '_error_backup.csv')
+    if checkpoint_path == output_csv or not os.path.exists(checkpoint_path):
+        return []
+    try:
+        df = pd.read_csv(checkpoint_path)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError):
+        print(f"  ⚠ Ignoring unreadable checkpoint {checkpoint_path}")
+        return []
+    
+    if 'midi_filename' not in df.columns:
+        return []
+    df = df.dropna(subset=['midi_filename']).drop_duplicates('midi_filename', keep='last')
+    return df.to_dict('records')
+
+
+def _windows(items, size):
+    """Yield lists of up to size consecutive items from any iterable."""
+    iterator = iter(items)
+    while True:
+        window = list(itertools.islice(iterator, size))
+        if not window:
+            return
+        yield window
+
+
+def _extract_features_chunk(midi_paths, backend=DEFAULT_BACKEND, keep_notes=False, features=None,
+                            profile=False):
+    """
+    Worker function for a scheduled task of one or more files.
     
-    return df
+    Returns:
+        list: (features, failure, notes, timings) per path, in order
+              (see _extract_features_worker)
+    """
+    return [_extract_features_worker(midi_path, backend=backend, keep_notes=keep_notes, features=features,
+                                     profile=profile)
+            for midi_path in midi_paths]
 
 
-def _extract_features_worker(midi_path):
+def _source_key(source):
+    """Hashable key of a batch input: the path, or a buffer's name."""
+    return source.name if isinstance(source, MidiBuffer) else str(source)
+
+
+def _extract_features_worker(midi_path, backend=DEFAULT_BACKEND, keep_notes=False, features=None,
+                             profile=False):
     """
     Worker function for parallel processing.
     Extracts features from a single MIDI file.
     
     Args:
-        midi_path (str): Path to MIDI file
+        midi_path (str or MidiBuffer): Path to MIDI file, archive member
+                                       address or pre-read content
+        backend (str): Parser backend passed to extract_features_from_midi
+        keep_notes (bool): Also return the parsed notes (NoteArray.to_bytes)
+                           for the note cache
+        features (list, optional): Only compute these features
+        profile (bool): Also return the file's stage timings
         
     Returns:
-        dict: Features dictionary with filename
+        tuple: (features dict with filename, None, notes, timings) on success,
+               or (None, dict with error_class, message and elapsed seconds,
+               None, timings); notes is None unless keep_notes is set, timings
+               (stage -> seconds, plus total and worker pid) unless profile is
     """
-    from pathlib import Path # Import Path here for the worker function
-    features = extract_features_from_midi(midi_path)
-    if features:
-        features['midi_filename'] = Path(midi_path).name
-        return features
-    return None
+    if not profile:
+        return _extract_features_file(midi_path, backend, keep_notes, features) + (None,)
+    with collect_timings() as timings:
+        result = _extract_features_file(midi_path, backend, keep_notes, features)
+    timings['worker'] = os.getpid()
+    return result + (timings,)
+
+
+def _extract_features_file(midi_path, backend, keep_notes, features):
+    """Extract one file for _extract_features_worker: (features, failure, notes)."""
+    import time
+    start = time.perf_counter()
+    notes = None
+    try:
+        if keep_notes:
+            # The cache needs every input, whatever subset is computed
+            note_array = parse_note_array(midi_path, backend=backend)
+            values = extract_features_from_note_array(note_array, features)
+            with stage('pack'):
+                notes = note_array.to_bytes()
+        elif isinstance(midi_path, MidiBuffer):
+            values = extract_features_from_bytes(midi_path.data, backend=backend, raise_errors=True,
+                                                 features=features)
+        else:
+            values = extract_features_from_midi(midi_path, backend=backend, raise_errors=True,
+                                                features=features)
+    except KeyboardInterrupt:
+        raise
+    except Exception as e:
+        return None, {'error_class': type(e).__name__, 'message': str(e) or repr(e),
+                      'elapsed': time.perf_counter() - start}, None
+    if not values:
+        return None, {'error_class': 'NoFeatures', 'message': "no features extracted",
+                      'elapsed': time.perf_counter() - start}, None
+    values['midi_filename'] = source_name(midi_path)
+    return values, None, notes
 
 
 if __name__ == "__main__":
@@ -444,12 +1532,13 @@ if __name__ == "__main__":
     
     if len(sys.argv) > 1:
         midi_path = sys.argv[1]
-        print(f"Extracting features from: {midi_path}")
-        features = extract_features_from_midi(midi_path)
+        backend = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BACKEND
+        print(f"Extracting features from: {midi_path} ({backend} backend)")
+        features = extract_features_from_midi(midi_path, backend=backend)
         
         if features:
             print("\nExtracted Features:")
             for key, value in features.items():
                 print(f"  {key}: {value:.4f}")
     else:
-        print("Usage: python feature_extract.py <path_to_midi_file>")
+        print("Usage: python feature_extract.py <path_to_midi_file> [music21|native]")
@@ -0,0 +1,159 @@
+"""
+Feature Registry
+The feature columns in model input order, each with its own version, plus
+the record of which versions a feature table was computed with.
+
+Bump a feature's version whenever its analyzer changes output. Extraction
+caches are keyed by the whole set (feature_set_version), and
+feature_extract.backfill_features recomputes only the columns whose
+version in the table no longer matches.
+
+This module has no heavy imports, so training, evaluation and labeling
+code can use it without loading music21.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+
+# dtype is 'float' or 'int'; default is used when a value is missing at
+# prediction time; label is the display name in reports and plots
+FeatureSpec = namedtuple('FeatureSpec', ['name', 'version', 'dtype', 'default', 'label'])
+
+FEATURES = OrderedDict((spec.name, spec) for spec in [
+    FeatureSpec('max_stretch', '1', 'float', 0, 'Max Stretch'),
+    FeatureSpec('max_chord_size', '1', 'int', 0, 'Max Chord Size'),
+    FeatureSpec('note_density', '1', 'float', 0, 'Note Density'),
+    FeatureSpec('left_hand_activity', '1', 'float', 0, 'Left Hand Activity'),
+    FeatureSpec('avg_tempo', '1', 'float', 120, 'Avg Tempo'),
+    FeatureSpec('dynamic_range', '1', 'float', 0, 'Dynamic Range'),
+    FeatureSpec('poly_voice_count', '1', 'float', 1, 'Polyphony'),
+    FeatureSpec('octave_jump_frequency', '1', 'float', 0, 'Octave Jumps'),
+    FeatureSpec('thirds_frequency', '1', 'float', 0, 'Thirds Freq'),
+    FeatureSpec('polyrhythm_score', '1', 'float', 0, 'Polyrhythm'),
+])
+
+# Model input order
+FEATURE_NAMES = list(FEATURES)
+
+# Version assumed for columns of tables written before versions were
+# recorded; every original feature started at '1'
+LEGACY_VERSION = '1'
+
+VERSIONS_SUFFIX = '.versions.json'
+
+
+def feature_versions(names=None):
+    """
+    Current version of each feature.
+
+    Args:
+        names (list, optional): Subset of features (default: all)
+
+    Returns:
+        dict: name -> version, in FEATURE_NAMES order
+    """
+    if names is None:
+        return {name: spec.version for name, spec in FEATURES.items()}
+    unknown = [name for name in names if name not in FEATURES]
+    if unknown:
+        raise ValueError(f"Unknown features: {unknown}. Available: {FEATURE_NAMES}")
+    return {name: spec.version for name, spec in FEATURES.items() if name in set(names)}
+
+
+def feature_set_version(names=None):
+    """
+    Short digest of the feature names and versions, for cache keys: it
+    changes whenever a feature is added, removed or bumped.
+    """
+    text = ";".join(f"{name}={version}" for name, version in feature_versions(names).items())
+    return hashlib.blake2b(text.encode(), digest_size=4).hexdigest()
+
+
+def feature_row(features):
+    """
+    Model input values for one file, in FEATURE_NAMES order, with each
+    feature's default for missing values.
+
+    Args:
+        features (dict): Feature values (e.g. from extract_features_from_midi)
+
+    Returns:
+        list: Values in model input order
+    """
+    return [features.get(name, spec.default) for name, spec in FEATURES.items()]
+
+
+def cast_feature(name, value):
+    """Convert one value to its feature's Python type (int or float)."""
+    return int(value) if FEATURES[name].dtype == 'int' else float(value)
+
+
+def versions_path(table_path):
+    """
+    Sidecar recording a feature table's column versions.
+
+    A CSV, its .fstore and an npz output directory of the same stem share
+    one sidecar (data/processed/features_all.versions.json).
+    """
+    table_path = Path(table_path)
+    if table_path.suffix in ('.csv', '.fstore'):
+        table_path = table_path.with_suffix('')
+    return table_path.with_name(table_path.name + VERSIONS_SUFFIX)
+
+
+def read_table_versions(table_path, columns=None):
+    """
+    Column versions of a feature table.
+
+    Args:
+        table_path (str): Features CSV, store or npz output directory
+        columns (list, optional): The table's columns; used for tables
+                                  without a sidecar, whose registry columns
+                                  are taken to be at LEGACY_VERSION
+
+    Returns:
+        dict: 'backend' (str or None) and 'features' (name -> version)
+    """
+    path = versions_path(table_path)
+    if path.exists():
+        return json.loads(path.read_text())
+    legacy = [name for name in (columns or []) if name in FEATURES]
+    return {'backend': None, 'features': {name: LEGACY_VERSION for name in legacy}}
+
+
+def write_table_versions(table_path, versions, backend=None):
+    """
+    Record a feature table's column versions (atomically).
+
+    Args:
+        table_path (str): Features CSV, store or npz output directory
+        versions (dict): name -> version of the columns in the table
+        backend (str, optional): Parser backend the table was extracted with
+
+    Returns:
+        str: The sidecar path
+    """
+    path = versions_path(table_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = str(path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'backend': backend, 'features': versions}, f, indent=2)
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def outdated_features(table_versions):
+    """
+    Registry features a table is missing or holds at another version.
+
+    Args:
+        table_versions (dict): name -> version, as in read_table_versions()['features']
+
+    Returns:
+        list: Feature names, in FEATURE_NAMES order
+    """
+    return [name for name, spec in FEATURES.items() if table_versions.get(name) != spec.version]
@@ -0,0 +1,278 @@
+"""
+Streaming Feature Sinks
+Append-only writers for extraction results: completed chunks go straight
+to disk and are never rewritten, and the output is swapped into place
+atomically when the run finishes.
+"""
+
+import csv
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+
+SINK_FORMATS = ('csv', 'npz')
+
+
+def _drop_partial_line(path, block_size=65536):
+    """
+    Cut a file back to the end of its last complete line. A run killed
+    while appending leaves a fragment there, which must not count as a
+    finished row or have the next rows glued to it.
+
+    Returns:
+        int: Bytes removed
+    """
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        keep = 0
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                keep = start + newline + 1
+                break
+            position = start
+        if keep < end:
+            f.truncate(keep)
+    return end - keep
+
+
+class CsvFeatureSink:
+    """
+    Appends feature rows to <output>_progress.csv, one chunk at a time.
+
+    finalize() renames the progress file to the output path, so the
+    data is written exactly once.
+    """
+
+    format = 'csv'
+
+    def __init__(self, output_path, chunk_size=100, resume=False):
+        """
+        Args:
+            output_path (str): Final CSV path
+            chunk_size (int): Rows buffered in memory before each append
+            resume (bool): Keep and extend an existing progress file
+                           instead of starting a new one
+        """
+        self.output_path = str(output_path)
+        self.partial_path = self.output_path.replace('.csv', '_progress.csv')
+        if self.partial_path == self.output_path:
+            self.partial_path = self.output_path + '.progress'
+        self.chunk_size = max(1, chunk_size)
+        self.columns = None
+        self.rows_written = 0
+        self._buffer = []
+
+        os.makedirs(os.path.dirname(self.output_path) or '.', exist_ok=True)
+        if not resume and os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+
+        self._completed = set()
+        if os.path.exists(self.partial_path):
+            _drop_partial_line(self.partial_path)
+            with open(self.partial_path, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                self.columns = reader.fieldnames
+                for row in reader:
+                    self._completed.add(row.get('midi_filename'))
+                    self.rows_written += 1
+
+    def completed_names(self):
+        """midi_filename values already on disk when the sink was opened."""
+        return set(self._completed)
+
+    def add(self, row):
+        """
+        Buffer one feature row.
+
+        Returns:
+            bool: True if this row completed a chunk that was written to disk
+        """
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """Append buffered rows to the progress file."""
+        if not self._buffer:
+            return
+        write_header = self.columns is None or not os.path.exists(self.partial_path)
+        if self.columns is None:
+            self.columns = list(self._buffer[0].keys())
+        with open(self.partial_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns, extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerows(self._buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def finalize(self):
+        """Flush and atomically move the progress file to the output path."""
+        self.flush()
+        if not os.path.exists(self.partial_path):
+            # Nothing was extracted: still leave a valid (empty) CSV behind
+            with open(self.partial_path, 'w', newline='', encoding='utf-8') as f:
+                if self.columns:
+                    csv.writer(f).writerow(self.columns)
+        os.replace(self.partial_path, self.output_path)
+        return self.output_path
+
+    def read(self, finalized=True):
+        """Load the written rows as a DataFrame."""
+        import pandas as pd
+
+        path = self.output_path if finalized else self.partial_path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return pd.DataFrame()
+        return pd.read_csv(path)
+
+
+class NpzChunkFeatureSink:
+    """
+    Chunked columnar writer: each chunk is one .npz file of column arrays
+    inside <output>.partial/. finalize() writes a manifest and renames the
+    directory to the output path.
+    """
+
+    format = 'npz'
+
+    def __init__(self, output_path, chunk_size=100, resume=False):
+        """
+        Args:
+            output_path (str): Final output directory
+            chunk_size (int): Rows per chunk file
+            resume (bool): Keep and extend existing chunks
+        """
+        self.output_path = str(output_path)
+        self.partial_path = self.output_path + '.partial'
+        self.chunk_size = max(1, chunk_size)
+        self.columns = None
+        self.rows_written = 0
+        self._buffer = []
+
+        if not resume and os.path.exists(self.partial_path):
+            shutil.rmtree(self.partial_path)
+        os.makedirs(self.partial_path, exist_ok=True)
+
+        self._chunks = sorted(Path(self.partial_path).glob('chunk-*.npz'))
+        self._completed = set()
+        for chunk_path in self._chunks:
+            with np.load(chunk_path) as chunk:
+                if self.columns is None:
+                    self.columns = list(chunk.files)
+                names = chunk['midi_filename'] if 'midi_filename' in chunk.files else []
+                self._completed.update(str(name) for name in names)
+                self.rows_written += len(chunk[chunk.files[0]]) if chunk.files else 0
+
+    def completed_names(self):
+        """midi_filename values already on disk when the sink was opened."""
+        return set(self._completed)
+
+    def add(self, row):
+        """
+        Buffer one feature row.
+
+        Returns:
+            bool: True if this row completed a chunk that was written to disk
+        """
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """Write buffered rows as the next chunk file."""
+        if not self._buffer:
+            return
+        if self.columns is None:
+            self.columns = list(self._buffer[0].keys())
+        arrays = {}
+        for column in self.columns:
+            values = [row.get(column) for row in self._buffer]
+            arrays[column] = np.array(values, dtype=str if column == 'midi_filename' else None)
+
+        chunk_path = Path(self.partial_path) / f'chunk-{len(self._chunks):05d}.npz'
+        tmp_path = chunk_path.with_name(chunk_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, chunk_path)
+        self._chunks.append(chunk_path)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def finalize(self):
+        """Flush, write the manifest and atomically rename the directory."""
+        self.flush()
+        manifest = {
+            'columns': self.columns or [],
+            'rows': self.rows_written,
+            'chunks': [p.name for p in self._chunks]
+        }
+        with open(Path(self.partial_path) / 'manifest.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(self.output_path):
+            shutil.rmtree(self.output_path)
+        os.replace(self.partial_path, self.output_path)
+        return self.output_path
+
+    def read(self, finalized=True):
+        """Load the written rows as a DataFrame."""
+        return read_feature_chunks(self.output_path if finalized else self.partial_path)
+
+
+def read_feature_chunks(path):
+    """
+    Load a chunked .npz feature directory into a DataFrame.
+
+    Args:
+        path (str): Directory written by NpzChunkFeatureSink
+
+    Returns:
+        pd.DataFrame: All rows, in chunk order
+    """
+    import pandas as pd
+
+    frames = []
+    for chunk_path in sorted(Path(path).glob('chunk-*.npz')):
+        with np.load(chunk_path) as chunk:
+            frames.append(pd.DataFrame({column: chunk[column] for column in chunk.files}))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def open_feature_sink(output_path, sink_format=None, chunk_size=100, resume=False):
+    """
+    Create a sink for extraction output.
+
+    Args:
+        output_path (str): Final output path
+        sink_format (str, optional): 'csv' or 'npz'. None = 'csv' for paths
+                                     ending in .csv, otherwise 'npz'
+        chunk_size (int): Rows per appended chunk
+        resume (bool): Continue an existing partial output
+
+    Returns:
+        CsvFeatureSink or NpzChunkFeatureSink
+    """
+    if sink_format is None:
+        sink_format = 'csv' if str(output_path).endswith('.csv') else 'npz'
+    if sink_format not in SINK_FORMATS:
+        raise ValueError(f"Unknown sink format: {sink_format}. Available: {list(SINK_FORMATS)}")
+
+    sink_class = CsvFeatureSink if sink_format == 'csv' else NpzChunkFeatureSink
+    return sink_class(output_path, chunk_size=chunk_size, resume=resume)
@@ -0,0 +1,286 @@
+"""
+Columnar Feature Store
+Binary, typed, memory-mappable replacement for features_all.csv.
+
+A store is a directory with one .npy file per numeric column, a string table
+(UTF-8 blob + offsets) per text column and a meta.json describing both.
+Columns are opened with mmap, so loading is near-instant and the pages are
+shared between every process that reads the same store.
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+STORE_SUFFIX = '.fstore'
+STORE_FORMAT = 'virtuoso-feature-store'
+STORE_VERSION = 1
+DEFAULT_STORE_PATH = "data/processed/features_all" + STORE_SUFFIX
+
+
+def _narrow_dtype(values):
+    """Smallest dtype that holds a numeric column: float32 or a small int."""
+    if values.dtype.kind == 'b':
+        return np.dtype(np.bool_)
+    if values.dtype.kind in 'iu':
+        if len(values) == 0:
+            return np.dtype(np.uint8)
+        low, high = values.min(), values.max()
+        for dtype in (np.uint8, np.int8, np.uint16, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return np.dtype(dtype)
+        return np.dtype(np.int64)
+    return np.dtype(np.float32)
+
+
+def write_feature_store(df, store_path):
+    """
+    Write a DataFrame as a feature store.
+
+    Integer columns get the smallest integer type that fits (max_chord_size
+    becomes uint8), other numeric columns become float32 and text columns a
+    string table. The store is built next to the target and renamed into
+    place.
+
+    Args:
+        df (pd.DataFrame): Features (e.g. the extract_features_batch output)
+        store_path (str): Store directory to create or replace
+
+    Returns:
+        str: The store path
+    """
+    import pandas as pd
+
+    store_path = Path(store_path)
+    tmp_path = store_path.with_name(store_path.name + '.tmp')
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            values = series.to_numpy()
+            dtype = _narrow_dtype(values)
+            np.save(tmp_path / f"{name}.npy", values.astype(dtype))
+            columns.append({'name': name, 'kind': 'numeric', 'dtype': dtype.name})
+        else:
+            encoded = [b'' if pd.isna(value) else str(value).encode('utf-8') for value in series]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(item) for item in encoded], out=offsets[1:])
+            (tmp_path / f"{name}.strings").write_bytes(b''.join(encoded))
+            np.save(tmp_path / f"{name}.offsets.npy", offsets)
+            columns.append({'name': name, 'kind': 'string'})
+
+    meta = {
+        'format': STORE_FORMAT,
+        'version': STORE_VERSION,
+        'rows': len(df),
+        'columns': columns,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    (tmp_path / 'meta.json').write_text(json.dumps(meta, indent=2))
+
+    if store_path.exists():
+        shutil.rmtree(store_path)
+    os.replace(tmp_path, store_path)
+    return str(store_path)
+
+
+def widen_float32(values):
+    """
+    Convert float32 values to float64, rounded to the 7 significant digits
+    float32 carries.
+
+    A plain cast turns a stored 0.3 into 0.30000001192..., which flips
+    comparisons like `thirds_frequency > 0.30`; rounding restores the
+    decimal the value was written from.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values) & (values != 0)
+    scale = np.ones_like(values)
+    scale[finite] = 10.0 ** (6 - np.floor(np.log10(np.abs(values[finite]))))
+    return np.where(finite, np.round(values * scale) / scale, values)
+
+
+class FeatureStore:
+    """
+    Read-only, memory-mapped view of a feature store.
+
+    Numeric columns are np.memmap arrays; string columns are decoded from
+    their string table on first access and cached.
+    """
+
+    def __init__(self, store_path):
+        """
+        Args:
+            store_path (str): Store directory written by write_feature_store
+        """
+        self.store_path = Path(store_path)
+        meta_path = self.store_path / 'meta.json'
+        if not meta_path.exists():
+            raise ValueError(f"Not a feature store: {self.store_path}")
+        self.meta = json.loads(meta_path.read_text())
+        if self.meta.get('format') != STORE_FORMAT or self.meta.get('version', 0) > STORE_VERSION:
+            raise ValueError(f"Unsupported feature store format in {self.store_path}")
+        self._kinds = {column['name']: column['kind'] for column in self.meta['columns']}
+        self._arrays = {}
+
+    @property
+    def columns(self):
+        return [column['name'] for column in self.meta['columns']]
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __contains__(self, name):
+        return name in self._kinds
+
+    def column(self, name):
+        """
+        One column: a read-only memmap for numeric columns, an object array of
+        str for string columns.
+        """
+        if name not in self._kinds:
+            raise KeyError(name)
+        if name not in self._arrays:
+            if self._kinds[name] == 'numeric':
+                self._arrays[name] = np.load(self.store_path / f"{name}.npy", mmap_mode='r')
+            else:
+                self._arrays[name] = self._read_strings(name)
+        return self._arrays[name]
+
+    def _read_strings(self, name):
+        offsets = np.load(self.store_path / f"{name}.offsets.npy")
+        data = (self.store_path / f"{name}.strings").read_bytes()
+        return np.array([data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)],
+                        dtype=object)
+
+    def matrix(self, columns, dtype=np.float32):
+        """
+        Stack numeric columns into a (rows, len(columns)) array.
+
+        Args:
+            columns (list): Column names, in output order
+            dtype: Output dtype (float32 is what XGBoost uses internally)
+        """
+        out = np.empty((len(self), len(columns)), dtype=dtype)
+        for i, name in enumerate(columns):
+            out[:, i] = self.column(name)
+        return out
+
+    def to_dataframe(self, columns=None, widen=False, copy=False):
+        """
+        Load columns into a DataFrame, keeping their stored dtypes.
+
+        By default numeric columns are the store's read-only memmaps, so
+        loading costs no copy but assigning into the frame in place fails;
+        pass copy=True for a frame that can be modified.
+
+        Args:
+            columns (list, optional): Subset of columns (default: all)
+            widen (bool): Return float32 columns as float64 via widen_float32,
+                          for code that compares features against thresholds
+            copy (bool): Copy every column into writable memory
+        """
+        import pandas as pd
+
+        names = columns or self.columns
+        data = {}
+        for name in names:
+            values = self.column(name)
+            if widen and values.dtype == np.float32:
+                values = widen_float32(values)
+            elif copy:
+                values = np.array(values)
+            data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+
+def import_csv(csv_path, store_path=None):
+    """
+    Convert a features CSV into a feature store.
+
+    Args:
+        csv_path (str): Source CSV
+        store_path (str, optional): Target store (default: CSV path with the
+                                    .fstore suffix)
+
+    Returns:
+        str: The store path
+    """
+    import pandas as pd
+
+    csv_path = Path(csv_path)
+    store_path = Path(store_path) if store_path else csv_path.with_suffix(STORE_SUFFIX)
+    return write_feature_store(pd.read_csv(csv_path), store_path)
+
+
+def export_csv(store_path, csv_path):
+    """
+    Write a feature store back out as CSV.
+
+    Args:
+        store_path (str): Source store
+        csv_path (str): Target CSV
+
+    Returns:
+        str: The CSV path
+    """
+    df = FeatureStore(store_path).to_dataframe()
+    tmp_path = str(csv_path) + '.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+    return str(csv_path)
+
+
+def resolve_store(path):
+    """
+    Find the store to use for a features path.
+
+    A store directory is used as-is. For a CSV, the sibling .fstore is used
+    when it exists and is not older than the CSV, so a CSV rewritten after
+    the last import is never shadowed by stale data.
+
+    Returns:
+        Path or None: Store directory, or None to fall back to the CSV
+    """
+    path = Path(path)
+    if (path / 'meta.json').exists():
+        return path
+    store_path = path.with_suffix(STORE_SUFFIX)
+    if not (store_path / 'meta.json').exists():
+        return None
+    if path.exists() and path.stat().st_mtime > (store_path / 'meta.json').stat().st_mtime:
+        return None
+    return store_path
+
+
+def load_features(path, columns=None, widen=False, copy=False):
+    """
+    Load the feature table from a store or a CSV.
+
+    Args:
+        path (str): Feature store directory, or a features CSV (its .fstore
+                    sibling is preferred when up to date)
+        columns (list, optional): Only load these columns
+        widen (bool): Return store floats as float64 (see widen_float32)
+        copy (bool): Return a writable frame when loading from a store
+                     (see FeatureStore.to_dataframe)
+
+    Returns:
+        pd.DataFrame: Features
+    """
+    import pandas as pd
+
+    store_path = resolve_store(path)
+    if store_path is not None:
+        return FeatureStore(store_path).to_dataframe(columns, widen=widen, copy=copy)
+    return pd.read_csv(path, usecols=columns)
@@ -0,0 +1,21 @@
+"""
+Difficulty Labels
+The technical difficulty categories the classifier predicts.
+
+Kept apart from train.py so code that only needs the names (the CLI's
+rule-based fallback, reports) does not load xgboost and scikit-learn.
+"""
+
+
+# The 5 Technical Difficulty Categories
+# IDs 0-3 are used in both 4-class and 5-class schemas
+# ID 4 (Multiple Voices) is only used in 5-class schema
+DIFFICULTY_LABELS = {
+    0: "Far Reach",              # Wide hand spans (e.g., Rachmaninoff)
+    1: "Double Thirds",          # Technical runs in thirds (e.g., Chopin)
+    2: "Advanced Chords",        # Dense textures (e.g., Brahms)
+    3: "Advanced Counterpoint",  # Basic polyphony/fugal writing (e.g., Bach 2-part inventions)
+    4: "Multiple Voices"         # Complex polyphony - 3+ independent voices (e.g., Bach fugues) [5-class only]
+}
+
+LABEL_TO_ID = {v: k for k, v in DIFFICULTY_LABELS.items()}
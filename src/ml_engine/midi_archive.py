@@ -0,0 +1,242 @@
+"""
+MIDI Archive Sources
+Lets zip and tar archive members (and in-memory buffers) stand in for MIDI
+file paths, so a corpus can be extracted straight from its download without
+unpacking it.
+
+A member is addressed as "<archive path>::<member name>", e.g.
+"data/giant_midi.zip::midis/Chopin, Frederic, Ballade No.1.mid". Such a
+string works anywhere a path does in the batch pipeline; source_name()
+gives the name its row is keyed by. A MidiBuffer carries content that has
+already been read.
+"""
+
+import os
+import tarfile
+import zipfile
+from collections import OrderedDict, namedtuple
+from pathlib import PurePath, PurePosixPath
+
+try:
+    from .feature_cache import bytes_digest, file_digest
+except ImportError:  # running as a script
+    from feature_cache import bytes_digest, file_digest
+
+
+# MIDI content already in memory; name becomes the midi_filename column
+MidiBuffer = namedtuple('MidiBuffer', ['name', 'data'])
+
+MEMBER_SEPARATOR = '::'
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Archives kept open per process. Opening a zip reads its whole central
+# directory, which is far more work than reading one small member.
+MAX_OPEN_ARCHIVES = 8
+_open_archives = OrderedDict()
+
+# A forked worker must not share the parent's handles: they share the file
+# offset, so concurrent reads corrupt each other. Drop them (without
+# closing, which is the parent's business) and let the child reopen.
+os.register_at_fork(after_in_child=_open_archives.clear)
+
+
+def is_archive(path):
+    """True if path names a zip or tar archive (by suffix)."""
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def member_path(archive, member):
+    """Address of one archive member."""
+    return f"{archive}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member(path):
+    """
+    Split a member address.
+
+    Returns:
+        tuple: (archive path, member name), or None for a plain path or buffer
+    """
+    if isinstance(path, MidiBuffer):
+        return None
+    path = str(path)
+    archive, separator, member = path.partition(MEMBER_SEPARATOR)
+    if not separator or not is_archive(archive):
+        return None
+    return archive, member
+
+
+def _relative_to(path, root):
+    """path relative to root, '/'-separated, or None if it is not under root."""
+    try:
+        relative = os.path.relpath(path, root)
+    except ValueError:  # another drive
+        return None
+    if relative in (os.curdir, os.pardir) or relative.startswith(os.pardir + os.sep):
+        return None
+    return PurePath(relative).as_posix()
+
+
+def source_name(path, root=None):
+    """
+    Name of a path, archive member or buffer (the midi_filename column).
+
+    Without root this is the file name. With root, the directory or archive
+    the corpus was scanned from, it is the path relative to root, so files
+    with the same name in different folders get different names: e.g.
+    "Bach/Prelude.mid", or "packs/romantic.zip::Chopin/Prelude.mid" for a
+    member of an archive under root. Paths outside root keep their file name.
+    """
+    if isinstance(path, MidiBuffer):
+        return path.name
+    location = split_member(path)
+    if location is None:
+        relative = _relative_to(str(path), root) if root is not None else None
+        return relative or os.path.basename(str(path))
+    archive, member = location
+    if root is not None:
+        if os.path.abspath(archive) == os.path.abspath(root):
+            return member
+        relative = _relative_to(archive, root)
+        if relative is not None:
+            return member_path(relative, member)
+    return PurePosixPath(member).name
+
+
+def _open(archive):
+    """Open (or reuse) an archive: a ZipFile, or a TarFile with a name index."""
+    handle = _open_archives.pop(archive, None)
+    if handle is None:
+        try:
+            if zipfile.is_zipfile(archive):
+                handle = zipfile.ZipFile(archive)
+            else:
+                handle = tarfile.open(archive)
+                # Read every header once; getmember() is a linear scan
+                handle.index = {info.name: info for info in handle.getmembers()}
+        except (zipfile.BadZipFile, tarfile.TarError) as e:
+            raise OSError(f"Cannot read archive {archive}: {e}")
+        while len(_open_archives) >= MAX_OPEN_ARCHIVES:
+            _, oldest = _open_archives.popitem(last=False)
+            oldest.close()
+    _open_archives[archive] = handle
+    return handle
+
+
+def preload_source(path, root=None):
+    """
+    Read a file or archive member into a MidiBuffer named after it (see
+    source_name for root).
+
+    Returns:
+        MidiBuffer: The content, or the path itself if it cannot be read
+                    (so the failure is reported where it is extracted)
+    """
+    if isinstance(path, MidiBuffer):
+        return path
+    try:
+        return MidiBuffer(source_name(path, root), read_source(path))
+    except OSError:
+        return path
+
+
+def close_archives():
+    """Close every archive opened by this process."""
+    while _open_archives:
+        _, handle = _open_archives.popitem()
+        handle.close()
+
+
+def iter_archive_members(archive, suffixes=('.mid', '.midi')):
+    """
+    Yield member addresses of the MIDI files in an archive, in archive order.
+
+    Suffixes match case-insensitively; directories are skipped.
+
+    Yields:
+        tuple: (member address, uncompressed size)
+    """
+    handle = _open(str(archive))
+    if isinstance(handle, zipfile.ZipFile):
+        for info in handle.infolist():
+            if not info.is_dir() and info.filename.lower().endswith(suffixes):
+                yield member_path(archive, info.filename), info.file_size
+    else:
+        for info in handle.getmembers():
+            if info.isfile() and info.name.lower().endswith(suffixes):
+                yield member_path(archive, info.name), info.size
+
+
+def read_source(path):
+    """
+    Read the bytes of a MIDI file, archive member or buffer.
+
+    Compressed tar archives have no random access, so each member read
+    decompresses from the start of the stream; use zip or plain tar for
+    large corpora.
+
+    Raises:
+        OSError: If the file or member cannot be read
+    """
+    if isinstance(path, MidiBuffer):
+        return path.data
+    location = split_member(path)
+    if location is None:
+        with open(path, 'rb') as f:
+            return f.read()
+    archive, member = location
+    handle = _open(archive)
+    try:
+        if isinstance(handle, zipfile.ZipFile):
+            return handle.read(member)
+        f = handle.extractfile(handle.index[member])
+    except KeyError:
+        raise FileNotFoundError(f"No member {member!r} in {archive}")
+    if f is None:
+        raise IsADirectoryError(f"Not a regular file: {path}")
+    return f.read()
+
+
+def source_stat(path):
+    """
+    Size and mtime of a file or archive member.
+
+    A member reports its uncompressed size and the archive's mtime.
+
+    Returns:
+        tuple: (size in bytes, mtime)
+    """
+    location = split_member(path)
+    if location is None:
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime
+    archive, member = location
+    handle = _open(archive)
+    try:
+        if isinstance(handle, zipfile.ZipFile):
+            size = handle.getinfo(member).file_size
+        else:
+            size = handle.index[member].size
+    except KeyError:
+        raise FileNotFoundError(f"No member {member!r} in {archive}")
+    return size, os.stat(archive).st_mtime
+
+
+def source_size(path):
+    """Size of a file, archive member or buffer in bytes (0 if it cannot be read)."""
+    if isinstance(path, MidiBuffer):
+        return len(path.data)
+    try:
+        return source_stat(path)[0]
+    except OSError:
+        return 0
+
+
+def source_digest(path):
+    """
+    Content digest of a file, archive member or buffer. The same content
+    gets the same digest either way, so cached features carry over.
+    """
+    if isinstance(path, MidiBuffer) or split_member(path) is not None:
+        return bytes_digest(read_source(path))
+    return file_digest(path)
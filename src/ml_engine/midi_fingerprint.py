@@ -0,0 +1,293 @@
+"""
+Near-Duplicate MIDI Detection
+Fingerprints MIDI files from their quantized pitch/onset sequence and groups
+exact and near-duplicate files (re-uploads, alternative transcriptions) with
+MinHash signatures, so only one representative per group needs extraction
+and labeling.
+"""
+
+import hashlib
+import os
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from .midi_archive import read_source, source_name
+    from .midi_reader import PERCUSSION_CHANNEL, read_midi
+    from .worker_pool import GuardedPool
+except ImportError:  # running as a script
+    from midi_archive import read_source, source_name
+    from midi_reader import PERCUSSION_CHANNEL, read_midi
+    from worker_pool import GuardedPool
+
+
+DEFAULT_MANIFEST_PATH = "data/processed/duplicate_groups.csv"
+
+GRID = 4                 # onset grid steps per quarter note (sixteenths)
+SHINGLE_SIZE = 4         # consecutive onsets per shingle
+NUM_PERM = 64            # MinHash signature length
+BAND_ROWS = 4            # signature rows per LSH band (16 bands)
+DEFAULT_THRESHOLD = 0.8  # estimated Jaccard similarity to count as duplicate
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes; fixed
+# seed so signatures are comparable between runs
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(20240611)
+_PERM_A = _rng.randint(1, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 2 ** 32 - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def quantized_events(score, grid=GRID):
+    """
+    Reduce a score to its onset sequence.
+
+    Percussion is dropped and onsets are snapped to a grid of `grid` steps
+    per quarter note, so tempo, resolution and small timing differences do
+    not change the result.
+
+    Args:
+        score (MidiScore): Score parsed by midi_reader.read_midi
+        grid (int): Grid steps per quarter note
+
+    Returns:
+        list: (grid onset, sorted pitch tuple) per distinct onset, in order
+    """
+    onsets = defaultdict(set)
+    for note in score.notes:
+        if note.channel != PERCUSSION_CHANNEL:
+            onsets[int(round(note.onset * grid))].add(note.pitch)
+    return [(onset, tuple(sorted(onsets[onset]))) for onset in sorted(onsets)]
+
+
+def minhash_signature(shingles):
+    """
+    MinHash signature of a set of shingles.
+
+    Args:
+        shingles (iterable): Hashable shingles (converted with repr)
+
+    Returns:
+        np.ndarray: uint32 array of NUM_PERM minimum hashes
+    """
+    values = np.array([int.from_bytes(hashlib.blake2b(repr(s).encode(), digest_size=4).digest(), 'little')
+                       for s in set(shingles)], dtype=np.uint64)
+    if len(values) == 0:
+        return np.full(NUM_PERM, 2 ** 32 - 1, dtype=np.uint32)
+    # a, x < 2**32, so a * x fits in uint64 before the first reduction
+    hashed = ((values[:, None] * _PERM_A[None, :]) % _PRIME + _PERM_B[None, :]) % _PRIME
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def fingerprint(midi_path, grid=GRID, shingle_size=SHINGLE_SIZE):
+    """
+    Fingerprint one MIDI file.
+
+    The exact hash covers the whole quantized sequence, shifted to start at
+    zero. Shingles are runs of shingle_size consecutive onsets, each stored
+    as (gap to the previous onset, pitches), so a piece matches itself
+    whatever its start offset, and an alternative transcription still
+    shares most of its shingles.
+
+    Args:
+        midi_path (str): Path to MIDI file or archive member address
+        grid (int): Onset grid steps per quarter note
+        shingle_size (int): Onsets per shingle
+
+    Returns:
+        dict: exact (hex digest), signature (uint32 array) and n_notes
+    """
+    score = read_midi(read_source(midi_path))
+    events = quantized_events(score, grid)
+    steps = []
+    previous = events[0][0] if events else 0
+    for onset, pitches in events:
+        steps.append((onset - previous, pitches))
+        previous = onset
+    exact = hashlib.blake2b(repr(steps).encode(), digest_size=16).hexdigest()
+    shingles = [tuple(steps[i:i + shingle_size]) for i in range(max(1, len(steps) - shingle_size + 1))]
+    return {
+        'exact': exact,
+        'signature': minhash_signature(shingles if steps else []),
+        'n_notes': sum(len(pitches) for _, pitches in steps)
+    }
+
+
+def _fingerprint_chunk(midi_paths):
+    """Worker function: fingerprint (or None if unreadable) per path."""
+    results = []
+    for midi_path in midi_paths:
+        try:
+            results.append(fingerprint(midi_path))
+        except Exception:
+            results.append(None)
+    return results
+
+
+def fingerprint_files(midi_files, n_jobs=1, chunk_size=64):
+    """
+    Fingerprint many files, in parallel when n_jobs > 1.
+
+    Returns:
+        list: Fingerprint dict (or None for unreadable files) per path, in order
+    """
+    midi_files = [str(path) for path in midi_files]
+    tasks = [midi_files[start:start + chunk_size] for start in range(0, len(midi_files), chunk_size)]
+    if n_jobs <= 1:
+        return [result for task in tasks for result in _fingerprint_chunk(task)]
+
+    fingerprints = {}
+    with GuardedPool(n_jobs, _fingerprint_chunk) as pool:
+        for task in pool.imap_unordered(tasks):
+            for midi_path, result in zip(task.task, task.value or [None] * len(task.task)):
+                fingerprints[midi_path] = result
+    return [fingerprints.get(path) for path in midi_files]
+
+
+def group_duplicates(fingerprints, threshold=DEFAULT_THRESHOLD, band_rows=BAND_ROWS):
+    """
+    Group fingerprints into exact and near-duplicate sets.
+
+    Files with the same exact hash are always grouped. Near duplicates are
+    found with LSH banding over the MinHash signatures; a candidate pair is
+    grouped when its estimated Jaccard similarity reaches threshold.
+
+    Args:
+        fingerprints (list): Fingerprint dicts (None entries are never grouped)
+        threshold (float): Minimum estimated similarity
+        band_rows (int): Signature rows per LSH band
+
+    Returns:
+        list: Groups of at least two indices into fingerprints
+    """
+    parent = list(range(len(fingerprints)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    valid = [i for i, fp in enumerate(fingerprints) if fp is not None and fp['n_notes'] > 0]
+
+    first_of = {}
+    for i in valid:
+        exact = fingerprints[i]['exact']
+        if exact in first_of:
+            union(first_of[exact], i)
+        else:
+            first_of[exact] = i
+
+    # One representative per exact hash is enough for the banding pass
+    buckets = defaultdict(list)
+    for i in first_of.values():
+        signature = fingerprints[i]['signature']
+        for band, start in enumerate(range(0, len(signature), band_rows)):
+            buckets[(band, signature[start:start + band_rows].tobytes())].append(i)
+
+    checked = set()
+    for members in buckets.values():
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                i, j = members[a], members[b]
+                if (i, j) in checked or find(i) == find(j):
+                    continue
+                checked.add((i, j))
+                if similarity(fingerprints[i], fingerprints[j]) >= threshold:
+                    union(i, j)
+
+    groups = defaultdict(list)
+    for i in valid:
+        groups[find(i)].append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def similarity(fp_a, fp_b):
+    """Estimated Jaccard similarity of two fingerprints (1.0 for exact matches)."""
+    if fp_a['exact'] == fp_b['exact']:
+        return 1.0
+    return float(np.mean(fp_a['signature'] == fp_b['signature']))
+
+
+def find_duplicates(midi_files, threshold=DEFAULT_THRESHOLD, n_jobs=1, root=None):
+    """
+    Find duplicate groups in a set of MIDI files.
+
+    The representative of each group is the member with the most notes (the
+    most complete transcription), ties broken by path.
+
+    Args:
+        midi_files (list): MIDI file paths
+        threshold (float): Minimum estimated similarity for near duplicates
+        n_jobs (int): Worker processes for fingerprinting
+        root (str, optional): Directory or archive the files are under; names
+                              are relative to it, as in the feature table
+                              (see extract_features_batch)
+
+    Returns:
+        tuple: (representatives, manifest) where representatives is the list
+               of paths to extract (unique files and one per group, in input
+               order) and manifest a DataFrame with one row per grouped file:
+               group_id, midi_filename, path, representative (its midi_filename),
+               is_representative, similarity and n_notes
+    """
+    import pandas as pd
+
+    midi_files = [str(path) for path in midi_files]
+    fingerprints = fingerprint_files(midi_files, n_jobs=n_jobs)
+    groups = group_duplicates(fingerprints, threshold)
+
+    rows = []
+    duplicates = set()
+    for group_id, members in enumerate(sorted(groups, key=lambda g: min(midi_files[i] for i in g))):
+        rep = min(members, key=lambda i: (-fingerprints[i]['n_notes'], midi_files[i]))
+        for i in sorted(members, key=lambda i: midi_files[i]):
+            if i != rep:
+                duplicates.add(i)
+            rows.append({
+                'group_id': group_id,
+                'midi_filename': source_name(midi_files[i], root),
+                'path': midi_files[i],
+                'representative': source_name(midi_files[rep], root),
+                'is_representative': i == rep,
+                'similarity': round(similarity(fingerprints[i], fingerprints[rep]), 3),
+                'n_notes': fingerprints[i]['n_notes']
+            })
+
+    representatives = [path for i, path in enumerate(midi_files) if i not in duplicates]
+    manifest = pd.DataFrame(rows, columns=['group_id', 'midi_filename', 'path', 'representative',
+                                           'is_representative', 'similarity', 'n_notes'])
+    return representatives, manifest
+
+
+def write_manifest(manifest, manifest_path=DEFAULT_MANIFEST_PATH):
+    """Write a duplicate-group manifest as CSV (atomically)."""
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = str(manifest_path) + '.tmp'
+    manifest.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, manifest_path)
+    return str(manifest_path)
+
+
+def load_duplicate_groups(manifest_path=DEFAULT_MANIFEST_PATH):
+    """
+    Read a duplicate-group manifest.
+
+    Returns:
+        dict: representative filename -> list of its duplicates' filenames
+              (empty if the manifest does not exist)
+    """
+    import pandas as pd
+
+    if not Path(manifest_path).exists():
+        return {}
+    manifest = pd.read_csv(manifest_path)
+    duplicates = manifest[~manifest['is_representative'].astype(bool)]
+    return {rep: list(group['midi_filename']) for rep, group in duplicates.groupby('representative')}
@@ -0,0 +1,417 @@
+"""
+Lightweight MIDI Reader
+Parses Standard MIDI Files straight into flat note records, bypassing
+music21's object model.
+"""
+
+import math
+from collections import namedtuple
+
+
+# One sounding note. onset/offset are in quarter lengths, channel is 1-16
+# (music21 numbering, so channel 10 is percussion), track is the index of
+# the MTrk chunk the note came from.
+NoteRecord = namedtuple('NoteRecord', ['pitch', 'onset', 'offset', 'velocity', 'channel', 'track'])
+
+# One SET_TEMPO meta event. bpm is rounded like music21's MetronomeMark.
+TempoRecord = namedtuple('TempoRecord', ['onset', 'bpm', 'track'])
+
+# One note-like element in music21-compatible form: a Note (one pitch), a
+# Chord (several pitches) or a percussion hit. Offsets and quarter lengths
+# are quantized and split at barlines the way music21's MIDI import does.
+NoteElement = namedtuple('NoteElement', ['offset', 'quarter_length', 'pitches', 'velocities', 'percussion', 'part'])
+
+PERCUSSION_CHANNEL = 10
+
+# Same default as music21.defaults.quantizationQuarterLengthDivisors
+DEFAULT_QUARTER_LENGTH_DIVISORS = (4, 3)
+
+
+class MidiScore:
+    """
+    Flat, music21-free representation of a MIDI file.
+
+    Attributes:
+        notes (list): NoteRecord tuples, grouped by track in note-on order
+        tempos (list): TempoRecord tuples in file order
+        time_signatures (list): (onset, numerator, denominator) tuples
+        ticks_per_quarter (int): MIDI resolution
+        note_tracks (list): Indices of tracks containing note-ons; music21
+                            creates one Part for each of these
+    """
+
+    def __init__(self, notes, tempos, time_signatures, ticks_per_quarter, note_tracks):
+        self.notes = notes
+        self.tempos = tempos
+        self.time_signatures = time_signatures
+        self.ticks_per_quarter = ticks_per_quarter
+        self.note_tracks = note_tracks
+        self._elements = None
+        self._duration = None
+
+    @property
+    def tempo_map(self):
+        """Sorted, de-duplicated (onset, bpm) pairs."""
+        return sorted(set((t.onset, t.bpm) for t in self.tempos))
+
+    @property
+    def n_parts(self):
+        return len(self.note_tracks)
+
+    def metronome_marks(self):
+        """
+        Tempo values in the order music21's flattened score would list them.
+
+        music21 copies tempo events from note-less (conductor) tracks into
+        every Part that follows them, so those appear once per such Part.
+        """
+        conductor = []
+        marks = []
+        for track in sorted(set(t.track for t in self.tempos) | set(self.note_tracks)):
+            own = _dedupe([(t.onset, t.bpm) for t in self.tempos if t.track == track])
+            if track in self.note_tracks:
+                marks.extend(conductor + own)
+            else:
+                conductor.extend(own)
+        marks.sort(key=lambda mark: mark[0])
+        return [bpm for _, bpm in marks]
+
+    def elements(self, quarter_length_divisors=DEFAULT_QUARTER_LENGTH_DIVISORS):
+        """
+        Note-like elements in flattened music21 order.
+
+        Notes starting together are gathered into chords, offsets and
+        durations are snapped to the quantization grid and elements crossing
+        a barline are split, mirroring music21.midi.translate. The result is
+        cached for the default divisors.
+        """
+        use_cache = tuple(quarter_length_divisors) == DEFAULT_QUARTER_LENGTH_DIVISORS
+        if use_cache and self._elements is not None:
+            return self._elements
+
+        elements, duration = _build_elements(self, tuple(quarter_length_divisors))
+        if use_cache:
+            self._elements = elements
+            self._duration = duration
+        return elements
+
+    @property
+    def duration(self):
+        """Score length in quarter lengths, padded to the last barline like music21."""
+        if self._duration is None:
+            self.elements()
+        return self._duration
+
+
+def read_midi(source):
+    """
+    Parse a MIDI file into a MidiScore.
+
+    Args:
+        source (str, Path or bytes): Path to a MIDI file, or its raw bytes
+
+    Returns:
+        MidiScore: Parsed note records and tempo map
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+    return parse_midi_bytes(data)
+
+
+def parse_midi_bytes(data):
+    """
+    Parse the raw bytes of a Standard MIDI File into a MidiScore.
+
+    Raises:
+        ValueError: If the data is not a readable Standard MIDI File
+    """
+    if data[:4] != b'MThd' or len(data) < 14:
+        raise ValueError("Not a Standard MIDI File (missing MThd header)")
+
+    header_length = int.from_bytes(data[4:8], 'big')
+    n_tracks = int.from_bytes(data[10:12], 'big')
+    division = int.from_bytes(data[12:14], 'big')
+    if division & 0x8000:
+        raise ValueError("SMPTE time division is not supported")
+    if division == 0:
+        raise ValueError("Invalid MIDI time division: 0")
+
+    ticks_per_quarter = division
+    pos = 8 + header_length
+
+    notes = []
+    tempos = []
+    time_signatures = []
+    note_tracks = []
+    track_index = 0
+
+    while pos + 8 <= len(data) and track_index < n_tracks:
+        chunk_id = data[pos:pos + 4]
+        chunk_length = int.from_bytes(data[pos + 4:pos + 8], 'big')
+        start = pos + 8
+        end = min(start + chunk_length, len(data))
+        pos = start + chunk_length
+        if chunk_id != b'MTrk':
+            continue
+
+        has_notes = _read_track(data, start, end, track_index, ticks_per_quarter,
+                                notes, tempos, time_signatures)
+        if has_notes:
+            note_tracks.append(track_index)
+        track_index += 1
+
+    if track_index == 0:
+        raise ValueError("No tracks are defined in this MIDI file")
+
+    return MidiScore(notes, tempos, time_signatures, ticks_per_quarter, note_tracks)
+
+
+def _read_varlen(data, pos):
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+
+def _read_track(data, pos, end, track_index, ticks_per_quarter, notes, tempos, time_signatures):
+    """
+    Read one MTrk chunk, appending its notes and meta events.
+
+    Returns:
+        bool: Whether the track contains any note-on events
+    """
+    tick = 0
+    running_status = None
+    # (tick, is_note_on, pitch, channel, velocity) in file order
+    note_events = []
+
+    try:
+        while pos < end:
+            delta, pos = _read_varlen(data, pos)
+            tick += delta
+            status = data[pos]
+            if status & 0x80:
+                pos += 1
+            elif running_status is not None:
+                status = running_status
+            else:
+                raise ValueError(f"Running status without a previous status byte in track {track_index}")
+
+            if status == 0xFF:
+                meta_type = data[pos]
+                length, pos = _read_varlen(data, pos + 1)
+                payload = data[pos:pos + length]
+                pos += length
+                if meta_type == 0x51 and length == 3:
+                    mspq = int.from_bytes(payload, 'big')
+                    if mspq > 0:
+                        tempos.append(TempoRecord(tick / ticks_per_quarter, round(60_000_000 / mspq, 2), track_index))
+                elif meta_type == 0x58 and length >= 2:
+                    time_signatures.append((tick / ticks_per_quarter, payload[0], 2 ** payload[1]))
+                elif meta_type == 0x2F:
+                    break
+            elif status in (0xF0, 0xF7):
+                length, pos = _read_varlen(data, pos)
+                pos += length
+            elif status >= 0xF0:
+                # System common / real-time messages should not appear in files
+                pos += {0xF1: 1, 0xF2: 2, 0xF3: 1}.get(status, 0)
+            else:
+                running_status = status
+                kind = status & 0xF0
+                channel = (status & 0x0F) + 1
+                if kind in (0xC0, 0xD0):
+                    pos += 1
+                    continue
+                data1 = data[pos]
+                data2 = data[pos + 1]
+                pos += 2
+                if kind == 0x90 and data2 > 0:
+                    note_events.append((tick, True, data1, channel, data2))
+                elif kind == 0x80 or kind == 0x90:
+                    note_events.append((tick, False, data1, channel, data2))
+    except IndexError:
+        # Truncated track: keep everything read so far, like lenient parsers do
+        pass
+
+    # Pair note-ons with the next matching note-off, walking backwards the
+    # same way music21.midi.translate.getNotesFromEvents does
+    awaiting_note_on = {}
+    track_notes = []
+    for event_tick, is_note_on, pitch, channel, velocity in reversed(note_events):
+        if not is_note_on:
+            awaiting_note_on[pitch, channel] = event_tick
+        elif (pitch, channel) in awaiting_note_on:
+            off_tick = awaiting_note_on[pitch, channel]
+            track_notes.append(NoteRecord(pitch, event_tick / ticks_per_quarter,
+                                          off_tick / ticks_per_quarter, velocity, channel, track_index))
+    track_notes.reverse()
+    notes.extend(track_notes)
+
+    return any(is_note_on for _, is_note_on, _, _, _ in note_events)
+
+
+def _dedupe(items):
+    seen = set()
+    result = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            result.append(item)
+    return result
+
+
+def _quantize(value, divisors, zero_allowed=True, gap_to_fill=0.0):
+    """
+    Snap a quarter-length value to the best grid, as music21's Stream.quantize.
+
+    Returns:
+        tuple: (numerator, divisor) so callers can stay in exact integer units
+    """
+    best = None
+    for div in divisors:
+        unit = 1 / div
+        mult = math.floor(value / unit)
+        if value <= unit * mult + unit / 2:
+            error = round(value - unit * mult, 7)
+        else:
+            mult += 1
+            error = round(unit * mult - value, 7)
+        if not zero_allowed and mult == 0:
+            mult = 1
+            error = abs(round(value - unit, 7))
+        match = mult / div
+        remaining_gap = 0.0 if gap_to_fill % unit == 0 else max(gap_to_fill - match, 0.0)
+        candidate = (remaining_gap, error, unit, mult, div)
+        if best is None or candidate < best:
+            best = candidate
+    return best[3], best[4]
+
+
+def _bar_lines(time_signatures, units_per_quarter):
+    """
+    Return a function mapping a position (in units) to the next barline.
+    """
+    changes = {}
+    for onset, numerator, denominator in time_signatures:
+        start = round(onset * units_per_quarter)
+        if start not in changes and numerator > 0 and denominator > 0:
+            changes[start] = round(numerator * 4 * units_per_quarter / denominator)
+    if 0 not in changes:
+        changes[0] = 4 * units_per_quarter
+    segments = sorted((start, length) for start, length in changes.items() if length > 0)
+
+    def next_bar_line(position):
+        bar_start = 0
+        for index, (start, length) in enumerate(segments):
+            limit = segments[index + 1][0] if index + 1 < len(segments) else None
+            if limit is not None and position >= limit:
+                continue
+            bar_start = start
+            n_bars = (position - start) // length + 1
+            return bar_start + n_bars * length
+        return bar_start
+
+    return next_bar_line
+
+
+def _next_greater(values):
+    """
+    For each value, the first later value that is greater (None if none),
+    found in one reverse pass over a stack of candidates.
+    """
+    result = [None] * len(values)
+    stack = []
+    for index in range(len(values) - 1, -1, -1):
+        value = values[index]
+        while stack and stack[-1] <= value:
+            stack.pop()
+        if stack:
+            result[index] = stack[-1]
+        stack.append(value)
+    return result
+
+
+def _build_elements(score, divisors):
+    """
+    Group, quantize and split notes into music21-compatible elements.
+
+    Returns:
+        tuple: (elements in flatten order, padded score duration in quarters)
+    """
+    units_per_quarter = math.lcm(*divisors, 8)
+    next_bar_line = _bar_lines(score.time_signatures, units_per_quarter)
+    chunk_tolerance = 1 / max(divisors)
+
+    by_track = {track: [] for track in score.note_tracks}
+    for record in score.notes:
+        by_track[record.track].append(record)
+
+    keyed = []
+    highest_unit = 0
+    for part_index, track in enumerate(score.note_tracks):
+        track_notes = by_track[track]
+
+        # Gather notes starting within the quantization unit into chords;
+        # notes with a different end go to a separate element (voice)
+        gathered = [False] * len(track_notes)
+        raw = []
+        for i, record in enumerate(track_notes):
+            if gathered[i]:
+                continue
+            group = [record]
+            for j in range(i + 1, len(track_notes)):
+                other = track_notes[j]
+                if abs(other.onset - record.onset) >= chunk_tolerance:
+                    break
+                if abs(other.offset - record.offset) > chunk_tolerance:
+                    continue
+                group.append(other)
+                gathered[j] = True
+            # music21 takes chord timing from the last gathered note
+            length = group[-1].offset - group[-1].onset
+            percussion = any(n.channel == PERCUSSION_CHANNEL for n in group)
+            raw.append((record.onset, length, tuple(n.pitch for n in group),
+                        tuple(n.velocity for n in group), percussion))
+
+        raw.sort(key=lambda item: item[0])
+
+        # Quantize offsets, then durations with a look-ahead to the next
+        # non-coincident offset so adjacent notes do not leave gaps
+        offsets = []
+        for onset, _, _, _, _ in raw:
+            mult, div = _quantize(onset, divisors)
+            offsets.append(mult * units_per_quarter // div)
+
+        following = _next_greater(offsets)
+
+        for index, (onset, length, pitches, velocities, percussion) in enumerate(raw):
+            offset_units = offsets[index]
+            next_units = following[index]
+            gap = (next_units - offset_units) / units_per_quarter if next_units is not None else 0.0
+            zero_allowed = length == 0
+            mult, div = _quantize(max(length, 0), divisors, zero_allowed, gap)
+            length_units = mult * units_per_quarter // div
+            highest_unit = max(highest_unit, next_bar_line(max(offset_units + length_units - 1, 0)))
+
+            # Split at barlines, as makeMeasures + makeTies do
+            start = offset_units
+            end = offset_units + length_units
+            while True:
+                bar_line = next_bar_line(start)
+                piece_end = min(end, bar_line) if end > start else start
+                keyed.append((start, length_units > 0, part_index, len(keyed),
+                              NoteElement(start / units_per_quarter, (piece_end - start) / units_per_quarter,
+                                          pitches, velocities, percussion, part_index)))
+                if end <= bar_line:
+                    break
+                start = bar_line
+
+    keyed.sort(key=lambda item: item[:4])
+    return [item[4] for item in keyed], highest_unit / units_per_quarter
@@ -0,0 +1,399 @@
+"""
+NoteArray: NumPy Note Representation with Vectorized Analyzers
+Computes the 10 technical difficulty features with array operations
+instead of Python loops over music21 objects.
+"""
+
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+try:
+    from .extraction_profile import stage
+except ImportError:  # running as a script
+    from extraction_profile import stage
+
+
+# One row per sounding pitch. Rows belonging to the same Note/Chord element
+# share an `element` index and appear in flattened score order, so chord
+# grouping and note sequence survive the conversion. Unpitched (percussion)
+# elements get a single row with pitch -1.
+NOTE_DTYPE = np.dtype([
+    ('pitch', np.int16),
+    ('onset', np.float64),
+    ('duration', np.float64),
+    ('velocity', np.int16),
+    ('voice', np.int16),
+    ('element', np.int32),
+    ('chord', np.bool_)
+])
+
+DYNAMIC_VALUES = {
+    'ppp': 1, 'pp': 2, 'p': 3, 'mp': 4, 'mf': 5, 'f': 6, 'ff': 7, 'fff': 8
+}
+
+MIDDLE_C = 60
+
+# Score data an analyzer can read. Each is a separate pass when building a
+# NoteArray, and only the passes for the requested inputs are run:
+#   notes     note/chord rows (the walk over every element)
+#   voices    part index of each row (music21: an extra walk over each part)
+#   tempos    metronome marks
+#   dynamics  dynamic markings
+#   duration  score length (native backend: needs the note pass)
+#   parts     number of parts
+NOTE_INPUTS = ('notes', 'voices', 'tempos', 'dynamics', 'duration', 'parts')
+
+# A registered analyzer: feature column name, function of a NoteArray and
+# the NOTE_INPUTS it reads
+Analyzer = namedtuple('Analyzer', ['name', 'function', 'inputs'])
+
+# Registered analyzers in output column order
+ANALYZERS = OrderedDict()
+
+
+def register_analyzer(name, inputs):
+    """
+    Decorator registering a vectorized analyzer for a feature column.
+
+    Args:
+        name (str): Feature column the analyzer computes
+        inputs (tuple): NOTE_INPUTS the analyzer reads
+    """
+    unknown = set(inputs) - set(NOTE_INPUTS)
+    if unknown:
+        raise ValueError(f"Unknown analyzer inputs: {sorted(unknown)}. Available: {list(NOTE_INPUTS)}")
+
+    def decorator(function):
+        ANALYZERS[name] = Analyzer(name, function, tuple(inputs))
+        return function
+    return decorator
+
+
+def required_inputs(features=None):
+    """
+    NOTE_INPUTS needed to compute a set of features.
+
+    Args:
+        features (list, optional): Feature names (default: all)
+
+    Returns:
+        frozenset: Input names
+    """
+    names = list(ANALYZERS) if features is None else list(features)
+    unknown = [name for name in names if name not in ANALYZERS]
+    if unknown:
+        raise ValueError(f"Unknown features: {unknown}. Available: {list(ANALYZERS)}")
+    return frozenset(i for name in names for i in ANALYZERS[name].inputs)
+
+
+class NoteArray:
+    """
+    Notes of a piece as a structured array, plus the score-level data the
+    features need.
+
+    Attributes:
+        notes (np.ndarray): Structured array with NOTE_DTYPE
+        tempos (np.ndarray): Metronome values (BPM) in score order
+        dynamics (np.ndarray): Dynamic markings mapped through DYNAMIC_VALUES
+        duration (float): Score length in quarter lengths
+        n_parts (int): Number of parts (0 if the source had none)
+        inputs (frozenset): NOTE_INPUTS that were loaded; the others are
+                            left empty (see from_stream/from_score)
+    """
+
+    def __init__(self, notes, tempos=(), dynamics=(), duration=0.0, n_parts=0, inputs=NOTE_INPUTS):
+        self.notes = notes
+        self.tempos = np.asarray(tempos, dtype=np.float64)
+        self.dynamics = np.asarray(dynamics, dtype=np.int16)
+        self.duration = float(duration)
+        self.n_parts = int(n_parts)
+        self.inputs = frozenset(inputs)
+        self._elements = None
+
+    def __len__(self):
+        return len(self.notes)
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs):
+        """Build from (pitch, onset, duration, velocity, voice, element, chord) tuples."""
+        return cls(np.array(rows, dtype=NOTE_DTYPE), **kwargs)
+
+    @classmethod
+    def from_stream(cls, stream, inputs=None):
+        """
+        Convert a parsed music21 stream, walking its flattened elements once.
+
+        voice is the index of the Part each note belongs to (0 without parts).
+
+        Args:
+            stream: Parsed music21 stream (usually a Score)
+            inputs (iterable, optional): NOTE_INPUTS to load (default: all)
+        """
+        import music21
+
+        inputs = frozenset(NOTE_INPUTS if inputs is None else inputs)
+        want_notes = 'notes' in inputs
+        parts = list(stream.parts)
+        part_of = {}
+        if want_notes and 'voices' in inputs:
+            for index, part in enumerate(parts):
+                for element in part.recurse().notes:
+                    part_of[id(element)] = index
+
+        rows = []
+        tempos = []
+        dynamics = []
+        element_index = 0
+        if want_notes:
+            flat = stream.flatten()
+        elif 'tempos' in inputs or 'dynamics' in inputs:
+            # Only the markings are needed
+            flat = stream.flatten().getElementsByClass((music21.tempo.MetronomeMark, music21.dynamics.Dynamic))
+        else:
+            flat = ()
+        for element in flat:
+            if isinstance(element, music21.note.NotRest):
+                onset = float(element.offset)
+                duration = float(element.quarterLength)
+                voice = part_of.get(id(element), 0)
+                if isinstance(element, music21.chord.Chord):
+                    for chord_note in element.notes:
+                        rows.append((chord_note.pitch.midi, onset, duration,
+                                     chord_note.volume.velocity or 0, voice, element_index, True))
+                    if not element.notes:
+                        rows.append((-1, onset, duration, 0, voice, element_index, True))
+                elif isinstance(element, music21.note.Note):
+                    rows.append((element.pitch.midi, onset, duration,
+                                 element.volume.velocity or 0, voice, element_index, False))
+                else:
+                    rows.append((-1, onset, duration, 0, voice, element_index, False))
+                element_index += 1
+            elif isinstance(element, music21.tempo.MetronomeMark):
+                tempos.append(element.number)
+            elif isinstance(element, music21.dynamics.Dynamic):
+                if element.value in DYNAMIC_VALUES:
+                    dynamics.append(DYNAMIC_VALUES[element.value])
+
+        return cls.from_rows(rows, tempos=tempos if 'tempos' in inputs else (),
+                             dynamics=dynamics if 'dynamics' in inputs else (),
+                             duration=stream.duration.quarterLength if 'duration' in inputs else 0.0,
+                             n_parts=len(parts) if 'parts' in inputs else 0, inputs=inputs)
+
+    @classmethod
+    def from_score(cls, score, inputs=None):
+        """
+        Convert a MidiScore from the native backend (see midi_reader.py).
+
+        Args:
+            score (MidiScore): Parsed score
+            inputs (iterable, optional): NOTE_INPUTS to load (default: all)
+        """
+        inputs = frozenset(NOTE_INPUTS if inputs is None else inputs)
+        rows = []
+        for element_index, element in enumerate(score.elements() if 'notes' in inputs else ()):
+            if element.percussion:
+                rows.append((-1, element.offset, element.quarter_length, 0,
+                             element.part, element_index, False))
+                continue
+            is_chord = len(element.pitches) > 1
+            for pitch, velocity in zip(element.pitches, element.velocities):
+                rows.append((pitch, element.offset, element.quarter_length, velocity,
+                             element.part, element_index, is_chord))
+
+        return cls.from_rows(rows, tempos=score.metronome_marks() if 'tempos' in inputs else (),
+                             duration=score.duration if 'duration' in inputs else 0.0,
+                             n_parts=score.n_parts if 'parts' in inputs else 0, inputs=inputs)
+
+    def to_bytes(self):
+        """Serialize as a compressed .npz payload (see from_bytes)."""
+        import io
+        if self.inputs != frozenset(NOTE_INPUTS):
+            raise ValueError(f"Only a fully loaded NoteArray can be serialized (loaded: {sorted(self.inputs)})")
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, notes=self.notes, tempos=self.tempos, dynamics=self.dynamics,
+                            meta=np.array([self.duration, self.n_parts], dtype=np.float64))
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuild a NoteArray written by to_bytes."""
+        import io
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            duration, n_parts = arrays['meta']
+            return cls(arrays['notes'], arrays['tempos'], arrays['dynamics'], duration, n_parts)
+
+    def elements(self):
+        """
+        Per-element view of the rows, computed once.
+
+        Returns:
+            dict: starts (first row of each element), size (pitched rows),
+                  top (highest pitch), chord/note/unpitched masks, duration
+        """
+        if self._elements is not None:
+            return self._elements
+
+        notes = self.notes
+        if len(notes) == 0:
+            empty_int = np.zeros(0, dtype=np.int64)
+            empty_bool = np.zeros(0, dtype=bool)
+            self._elements = {
+                'starts': empty_int, 'size': empty_int, 'top': empty_int, 'bottom': empty_int,
+                'chord': empty_bool, 'note': empty_bool, 'unpitched': empty_bool,
+                'duration': np.zeros(0)
+            }
+            return self._elements
+
+        element = notes['element']
+        starts = np.flatnonzero(np.r_[True, element[1:] != element[:-1]])
+        pitch = notes['pitch'].astype(np.int64)
+        pitched = pitch >= 0
+
+        size = np.add.reduceat(pitched.astype(np.int64), starts)
+        top = np.maximum.reduceat(pitch, starts)
+        bottom = np.minimum.reduceat(np.where(pitched, pitch, np.iinfo(np.int64).max), starts)
+        chord = notes['chord'][starts]
+        note = ~chord & (pitch[starts] >= 0)
+
+        self._elements = {
+            'starts': starts,
+            'size': size,
+            'top': top,
+            'bottom': bottom,
+            'chord': chord,
+            'note': note,
+            'unpitched': ~chord & ~note,
+            'duration': notes['duration'][starts]
+        }
+        return self._elements
+
+
+@register_analyzer('max_stretch', inputs=('notes',))
+def max_stretch(notes):
+    """Widest chord span in semitones."""
+    el = notes.elements()
+    mask = el['chord'] & (el['size'] >= 2)
+    if not mask.any():
+        return 0.0
+    return float((el['top'][mask] - el['bottom'][mask]).max())
+
+
+@register_analyzer('max_chord_size', inputs=('notes',))
+def max_chord_size(notes):
+    """Largest number of pitches in one chord."""
+    el = notes.elements()
+    if not el['chord'].any():
+        return 0
+    return int(el['size'][el['chord']].max())
+
+
+@register_analyzer('note_density', inputs=('notes', 'tempos', 'duration'))
+def note_density(notes):
+    """Pitched notes per second, using the first tempo (default 120 BPM)."""
+    total_notes = int(np.count_nonzero(notes.notes['pitch'] >= 0))
+    tempo = notes.tempos[0] if len(notes.tempos) else 120
+    duration_seconds = (notes.duration / tempo) * 60
+    if duration_seconds > 0:
+        return float(total_notes / duration_seconds)
+    return 0.0
+
+
+@register_analyzer('left_hand_activity', inputs=('notes',))
+def left_hand_activity(notes):
+    """Share of pitched notes below middle C."""
+    pitch = notes.notes['pitch']
+    total_notes = np.count_nonzero(pitch >= 0)
+    if total_notes == 0:
+        return 0.0
+    left_hand_notes = np.count_nonzero((pitch >= 0) & (pitch < MIDDLE_C))
+    return float(left_hand_notes / total_notes)
+
+
+@register_analyzer('avg_tempo', inputs=('tempos',))
+def avg_tempo(notes):
+    """Mean metronome value (default 120 BPM)."""
+    if len(notes.tempos):
+        return float(np.mean(notes.tempos))
+    return 120.0
+
+
+@register_analyzer('dynamic_range', inputs=('dynamics',))
+def dynamic_range(notes):
+    """Span between the softest and loudest dynamic marking."""
+    if len(notes.dynamics):
+        return float(notes.dynamics.max() - notes.dynamics.min())
+    return 0.0
+
+
+@register_analyzer('poly_voice_count', inputs=('parts', 'notes'))
+def poly_voice_count(notes):
+    """Number of parts, or mean pitches per element when there are none."""
+    if notes.n_parts:
+        return float(notes.n_parts)
+    el = notes.elements()
+    if len(el['starts']) == 0:
+        return 1.0
+    voice_counts = np.where(el['chord'], el['size'], 1)
+    return float(voice_counts.sum() / len(voice_counts))
+
+
+@register_analyzer('octave_jump_frequency', inputs=('notes',))
+def octave_jump_frequency(notes):
+    """Share of intervals of an octave or more between successive top notes."""
+    el = notes.elements()
+    tops = el['top'][(el['chord'] & (el['size'] > 0)) | el['note']]
+    if len(tops) < 2:
+        return 0.0
+    intervals = np.abs(np.diff(tops))
+    return float(np.count_nonzero(intervals >= 12) / len(intervals))
+
+
+@register_analyzer('thirds_frequency', inputs=('notes',))
+def thirds_frequency(notes):
+    """Share of thirds (3 or 4 semitones mod 12) between successive single notes."""
+    el = notes.elements()
+    pitches = el['top'][el['note']]
+    if len(pitches) < 2:
+        return 0.0
+    intervals = np.abs(np.diff(pitches)) % 12
+    return float(np.count_nonzero((intervals == 3) | (intervals == 4)) / len(intervals))
+
+
+@register_analyzer('polyrhythm_score', inputs=('notes',))
+def polyrhythm_score(notes):
+    """Distinct element durations divided by the number of elements."""
+    durations = notes.elements()['duration']
+    if len(durations) == 0:
+        return 0.0
+    return float(len(np.unique(durations)) / len(durations))
+
+
+# Vectorized analyzers in output column order
+VECTORIZED_FEATURES = {name: analyzer.function for name, analyzer in ANALYZERS.items()}
+
+
+def extract_features_from_note_array(notes, features=None):
+    """
+    Extract features from a NoteArray.
+
+    Args:
+        notes (NoteArray): Notes of one piece
+        features (list, optional): Only these features (default: all 10)
+
+    Returns:
+        dict: Feature values, in registry order
+
+    Raises:
+        ValueError: If the array was built without an input a feature reads
+    """
+    missing = required_inputs(features) - notes.inputs
+    if missing:
+        raise ValueError(f"NoteArray was built without {sorted(missing)}")
+    wanted = ANALYZERS if features is None else set(features)
+    values = {}
+    for name, analyzer in ANALYZERS.items():
+        if name in wanted:
+            with stage(name):
+                values[name] = analyzer.function(notes)
+    return values
@@ -0,0 +1,141 @@
+"""
+Parsed-Note Cache
+Keeps the parsed notes, tempo map and dynamics of every extracted file as a
+compressed NoteArray, keyed by content hash, so new or changed analyzers run
+on compact arrays instead of re-parsing the MIDI corpus.
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+try:
+    from .note_array import NoteArray
+except ImportError:  # running as a script
+    from note_array import NoteArray
+
+
+DEFAULT_NOTE_CACHE_PATH = "data/cache/notes.sqlite"
+
+# Bump when NoteArray.from_stream/from_score change what they record, so
+# arrays built by older code are not reused
+NOTE_FORMAT_VERSION = '1'
+
+
+def note_source(backend):
+    """Cache key part for notes parsed with a backend."""
+    return f"{NOTE_FORMAT_VERSION}/{backend}"
+
+
+class NoteCache:
+    """
+    SQLite-backed store of NoteArray payloads (see NoteArray.to_bytes).
+
+    Entries are keyed by (content digest, note source). Unlike the feature
+    cache they do not depend on EXTRACTOR_VERSION: changing an analyzer
+    leaves the parsed notes valid.
+    """
+
+    def __init__(self, cache_path=DEFAULT_NOTE_CACHE_PATH):
+        """
+        Open (or create) a note cache.
+
+        Args:
+            cache_path (str): Path to the SQLite cache file
+        """
+        self.cache_path = Path(cache_path)
+        os.makedirs(self.cache_path.parent, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.cache_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            " digest TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " payload BLOB NOT NULL,"
+            " created REAL NOT NULL,"
+            " PRIMARY KEY (digest, source))"
+        )
+        self._conn.commit()
+
+    def get_many(self, digests, source):
+        """
+        Look up several files at once.
+
+        Args:
+            digests (list): Content digests
+            source (str): Note source (see note_source)
+
+        Returns:
+            dict: digest -> NoteArray, for cached files only
+        """
+        hits = {}
+        wanted = list(dict.fromkeys(d for d in digests if d))
+        # Stay well below SQLite's host parameter limit
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT digest, payload FROM notes WHERE source = ? AND digest IN ({placeholders})",
+                [source] + batch
+            ).fetchall()
+            for digest, payload in rows:
+                hits[digest] = NoteArray.from_bytes(payload)
+        return hits
+
+    def get(self, digest, source):
+        """Return the cached NoteArray for one file, or None."""
+        return self.get_many([digest], source).get(digest)
+
+    def put(self, digest, source, notes):
+        """
+        Store one file's notes. Call commit() to persist.
+
+        Args:
+            digest (str): Content digest
+            source (str): Note source (see note_source)
+            notes (NoteArray or bytes): Notes, or a NoteArray.to_bytes payload
+        """
+        payload = notes if isinstance(notes, bytes) else notes.to_bytes()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO notes (digest, source, payload, created) VALUES (?, ?, ?, ?)",
+            (digest, source, sqlite3.Binary(payload), time.time())
+        )
+
+    def iter_notes(self, source, digests=None):
+        """
+        Stream cached files without loading them all at once.
+
+        Args:
+            source (str): Note source (see note_source)
+            digests (iterable, optional): Only these files (default: all)
+
+        Yields:
+            tuple: (digest, NoteArray)
+        """
+        if digests is not None:
+            digests = list(digests)
+            for start in range(0, len(digests), 500):
+                yield from self.get_many(digests[start:start + 500], source).items()
+            return
+        rows = self._conn.execute("SELECT digest, payload FROM notes WHERE source = ?", (source,))
+        for digest, payload in rows:
+            yield digest, NoteArray.from_bytes(payload)
+
+    def commit(self):
+        self._conn.commit()
+
+    def total_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM notes").fetchone()[0]
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def clear(self):
+        self._conn.execute("DELETE FROM notes")
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
@@ -12,19 +12,14 @@ import pickle
 import os
 from pathlib import Path
 
-
-# The 5 Technical Difficulty Categories
-# IDs 0-3 are used in both 4-class and 5-class schemas
-# ID 4 (Multiple Voices) is only used in 5-class schema
-DIFFICULTY_LABELS = {
-    0: "Far Reach",              # Wide hand spans (e.g., Rachmaninoff)
-    1: "Double Thirds",          # Technical runs in thirds (e.g., Chopin)
-    2: "Advanced Chords",        # Dense textures (e.g., Brahms)
-    3: "Advanced Counterpoint",  # Basic polyphony/fugal writing (e.g., Bach 2-part inventions)
-    4: "Multiple Voices"         # Complex polyphony - 3+ independent voices (e.g., Bach fugues) [5-class only]
-}
-
-LABEL_TO_ID = {v: k for k, v in DIFFICULTY_LABELS.items()}
+try:
+    from .feature_registry import FEATURES, FEATURE_NAMES, feature_row
+    from .feature_store import load_features
+    from .labels import DIFFICULTY_LABELS, LABEL_TO_ID
+except ImportError:  # imported as a top-level module (src/ on sys.path)
+    from feature_registry import FEATURES, FEATURE_NAMES, feature_row
+    from feature_store import load_features
+    from labels import DIFFICULTY_LABELS, LABEL_TO_ID
 
 
 def prepare_training_data(features_csv, labels_csv=None):
@@ -32,22 +27,18 @@ def prepare_training_data(features_csv, labels_csv=None):
     Prepare training data from features and labels.
     
     Args:
-        features_csv (str): Path to features CSV file
+        features_csv (str): Path to features CSV file or feature store
+                            (an up-to-date .fstore next to the CSV is used)
         labels_csv (str, optional): Path to labels CSV file
         
     Returns:
         tuple: (X, y) features and labels, or just X if no labels
     """
     # Load features
-    df_features = pd.read_csv(features_csv)
+    df_features = load_features(features_csv)
     
-    # Select all 10 feature columns
-    feature_cols = [
-        'max_stretch', 'max_chord_size', 'note_density',
-        'left_hand_activity', 'avg_tempo', 'dynamic_range',
-        'poly_voice_count', 'octave_jump_frequency', 
-        'thirds_frequency', 'polyrhythm_score'
-    ]
+    # Select all registered feature columns, in model input order
+    feature_cols = FEATURE_NAMES
     
     if labels_csv:
         # Load labels
@@ -91,7 +82,7 @@ def train_model(X, y, model_save_path=None, test_size=0.2, random_state=42):
     """
     print("Training XGBoost classifier...")
     print(f"Dataset size: {len(X)} samples")
-    print(f"Number of features: {X.shape[1]} (10 comprehensive features)")
+    print(f"Number of features: {X.shape[1]}")
     print(f"Number of classes: {len(np.unique(y))}")
     
     # Split data (no stratify for imbalanced datasets)
@@ -177,6 +168,67 @@ def load_model(model_path):
     return model
 
 
+def feature_matrix(features):
+    """
+    Model input matrix for many files.
+    
+    Args:
+        features (pd.DataFrame, list of dicts, or 2D array): Feature rows. Frames
+                               and dicts are matched by column name (extra
+                               columns such as midi_filename are ignored, missing
+                               ones get their defaults); array columns must be
+                               in FEATURE_NAMES order
+        
+    Returns:
+        np.ndarray: float matrix, one row per file, in FEATURE_NAMES order
+    """
+    if isinstance(features, list) and (not features or isinstance(features[0], dict)):
+        features = pd.DataFrame(features)
+    if isinstance(features, pd.DataFrame):
+        defaults = {name: spec.default for name, spec in FEATURES.items()}
+        return features.reindex(columns=FEATURE_NAMES).fillna(defaults).to_numpy(dtype=float)
+    
+    X = np.asarray(features, dtype=float)
+    if X.ndim != 2 or X.shape[1] != len(FEATURE_NAMES):
+        raise ValueError(f"Expected an array of shape (n, {len(FEATURE_NAMES)}) "
+                         f"with columns {FEATURE_NAMES}, got shape {X.shape}")
+    return X
+
+
+def predict_difficulty_batch(model, features):
+    """
+    Predict difficulty categories for many files with a single model pass.
+    
+    The label is the argmax of predict_proba, which is what model.predict
+    computes, so the trees are traversed once per row.
+    
+    Args:
+        model: Trained XGBoost model
+        features (pd.DataFrame, list of dicts, or 2D array): Feature rows
+                               (see feature_matrix)
+        
+    Returns:
+        pd.DataFrame: predicted_category, predicted_id, confidence and one
+                      probability column per category, one row per input row
+                      (a DataFrame input keeps its index)
+    """
+    index = features.index if isinstance(features, pd.DataFrame) else None
+    X = feature_matrix(features)
+    if len(X) == 0:
+        proba = np.zeros((0, len(DIFFICULTY_LABELS)))
+    else:
+        proba = model.predict_proba(X)
+    pred_ids = proba.argmax(axis=1)
+    categories = [DIFFICULTY_LABELS[i] for i in range(proba.shape[1])]
+    
+    results = pd.DataFrame(proba, columns=categories, index=index)
+    results.insert(0, 'confidence', proba[np.arange(len(proba)), pred_ids])
+    results.insert(0, 'predicted_id', pred_ids.astype(int))
+    results.insert(0, 'predicted_category', np.array(categories, dtype=object)[pred_ids]
+                   if len(proba) else np.array([], dtype=object))
+    return results
+
+
 def predict_difficulty(model, features):
     """
     Predict difficulty category for given features.
@@ -190,36 +242,18 @@ def predict_difficulty(model, features):
     """
     # Convert features dict to array if needed
     if isinstance(features, dict):
-        feature_array = np.array([
-            features.get('max_stretch', 0),
-            features.get('max_chord_size', 0),
-            features.get('note_density', 0),
-            features.get('left_hand_activity', 0),
-            features.get('avg_tempo', 120),
-            features.get('dynamic_range', 0),
-            features.get('poly_voice_count', 1),
-            features.get('octave_jump_frequency', 0),
-            features.get('thirds_frequency', 0),
-            features.get('polyrhythm_score', 0)
-        ]).reshape(1, -1)
+        feature_array = np.array(feature_row(features)).reshape(1, -1)
     else:
-        feature_array = features.reshape(1, -1)
-    
-    # Predict
-    pred_id = model.predict(feature_array)[0]
-    pred_proba = model.predict_proba(feature_array)[0]
-    
-    # Get label
-    pred_label = DIFFICULTY_LABELS[pred_id]
+        feature_array = np.asarray(features).reshape(1, -1)
     
-    # Create probability dict
-    proba_dict = {DIFFICULTY_LABELS[i]: float(prob) for i, prob in enumerate(pred_proba)}
+    result = predict_difficulty_batch(model, feature_array).iloc[0]
+    categories = result.index[3:]
     
     return {
-        'predicted_category': pred_label,
-        'predicted_id': int(pred_id),
-        'confidence': float(pred_proba[pred_id]),
-        'probabilities': proba_dict
+        'predicted_category': result['predicted_category'],
+        'predicted_id': int(result['predicted_id']),
+        'confidence': float(result['confidence']),
+        'probabilities': {category: float(result[category]) for category in categories}
     }
 
 
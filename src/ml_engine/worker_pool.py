@@ -0,0 +1,460 @@
+"""
+Guarded Worker Pool
+Process pool for feature extraction that enforces per-task wall-clock and
+memory limits. A worker that exceeds a limit is killed and replaced, and
+results are yielded as soon as they are ready, so one pathological file
+never stalls the rest of the batch.
+"""
+
+import math
+import multiprocessing as mp
+import os
+import signal
+import time
+from collections import namedtuple
+from multiprocessing.connection import wait
+
+
+# error is None on success, otherwise a short human-readable reason;
+# error_class names the failure (TaskTimeout, MemoryLimitExceeded,
+# WorkerCrashed or the exception raised by the task function)
+TaskResult = namedtuple('TaskResult', ['index', 'task', 'value', 'error', 'error_class', 'elapsed'])
+
+TASK_TIMEOUT = 'TaskTimeout'
+MEMORY_LIMIT_EXCEEDED = 'MemoryLimitExceeded'
+WORKER_CRASHED = 'WorkerCrashed'
+
+# Yielded by a task iterable that has no work right now but is not done
+# (e.g. one fed by a request queue): workers stay idle and the iterable is
+# asked again on the next poll
+IDLE = object()
+
+# Files at or below this size are grouped into shared tasks
+TINY_FILE_BYTES = 16 * 1024
+TINY_CHUNK_SIZE = 16
+
+
+def schedule_files(paths, tiny_bytes=TINY_FILE_BYTES, chunk_size=TINY_CHUNK_SIZE, size_of=os.path.getsize,
+                   n_workers=1):
+    """
+    Order files for a pool so the longest jobs start first.
+
+    File size is used as the cost estimate. Large files become one task
+    each, in descending size; tiny files are packed into chunks at the end,
+    where they fill the gaps left by the last long jobs. Chunks are never
+    so large that some workers get no tiny files when there are few of them.
+
+    Args:
+        paths (list): File paths
+        tiny_bytes (int): Size at or below which files are chunked
+        chunk_size (int): Maximum files per chunk
+        size_of (callable): Returns the size of one path (raising OSError
+                            when it is unknown)
+        n_workers (int): Workers the tasks are shared between
+
+    Returns:
+        list: Tasks, each a list of paths
+    """
+    sized = []
+    for path in paths:
+        try:
+            size = size_of(path)
+        except OSError:
+            size = 0
+        sized.append((size, path))
+    sized.sort(key=lambda item: item[0], reverse=True)
+
+    tasks = [[path] for size, path in sized if size > tiny_bytes]
+    tiny = [path for size, path in sized if size <= tiny_bytes]
+    chunk_size = max(1, min(chunk_size, math.ceil(len(tiny) / max(1, n_workers))))
+    tasks.extend(tiny[start:start + chunk_size] for start in range(0, len(tiny), chunk_size))
+    return tasks
+
+
+def rss_bytes(pid):
+    """
+    Resident set size of a process, or None if it cannot be measured.
+
+    Reads /proc on Linux and falls back to psutil when it is installed.
+    """
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+
+def _worker_main(conn, func, initializer, initargs):
+    """Worker loop: receive (index, func, task), send back (index, status, value)."""
+    # Ctrl+C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        index, task_func, task = message
+        try:
+            reply = (index, 'ok', (task_func or func)(task))
+        except Exception as e:
+            reply = (index, 'error', (type(e).__name__, str(e)))
+        try:
+            conn.send(reply)
+        except (BrokenPipeError, OSError):
+            break
+    conn.close()
+
+
+class _Worker:
+    """One worker process and the pipe used to talk to it."""
+
+    def __init__(self, ctx, func, initializer, initargs, slot):
+        self.slot = slot
+        self.tasks_done = 0
+        self.baseline_rss = None
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main,
+                                   args=(child_conn, func, initializer, initargs),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.index = None
+        self.task = None
+        self.started = None
+
+    @property
+    def busy(self):
+        return self.index is not None
+
+    def submit(self, index, task, func=None):
+        self.index = index
+        self.task = task
+        self.started = time.monotonic()
+        self.conn.send((index, func, task))
+
+    def release(self):
+        self.index = None
+        self.task = None
+        self.started = None
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def retire(self, grace=5):
+        """Stop an idle worker, killing it if it does not exit in time."""
+        self.stop()
+        self.process.join(grace)
+        self.kill()
+
+
+class GuardedPool:
+    """
+    Fixed-size process pool with per-task time and memory limits.
+
+    Unlike multiprocessing.Pool, each worker runs one task at a time over
+    its own pipe, so the parent always knows which task a worker is on and
+    can kill it without corrupting shared queues. Workers are recycled
+    after a number of tasks or once their memory has grown too much, and
+    busy time is tracked per worker slot.
+    """
+
+    def __init__(self, processes, func=None, timeout=None, max_rss_mb=None,
+                 max_tasks_per_child=None, max_growth_mb=None,
+                 initializer=None, initargs=(), poll_interval=0.2, context=None,
+                 preload=None):
+        """
+        Args:
+            processes (int): Number of worker processes
+            func (callable, optional): Picklable function applied to each task,
+                                       unless imap_unordered is given another
+            timeout (float, optional): Wall-clock seconds allowed per task
+            max_rss_mb (float, optional): Resident memory allowed per worker
+            max_tasks_per_child (int, optional): Replace a worker after this
+                                                 many completed tasks
+            max_growth_mb (float, optional): Replace a worker once its memory
+                                             has grown this much since its
+                                             first completed task
+            initializer (callable, optional): Run once in each new worker
+            initargs (tuple): Arguments for initializer
+            poll_interval (float): Seconds between limit checks
+            context (str, optional): multiprocessing start method
+            preload (list, optional): Modules the forkserver imports once, so
+                                      forked workers start with them loaded
+                                      (only used with context='forkserver')
+        """
+        self.processes = max(1, processes)
+        self.func = func
+        self.initializer = initializer
+        self.initargs = initargs
+        self.poll_interval = poll_interval
+        self.context = context
+        self._ctx = mp.get_context(context)
+        if preload and self._ctx.get_start_method() == 'forkserver':
+            self._ctx.set_forkserver_preload(list(preload))
+        self._workers = []
+        self._closed = False
+        self.set_limits(timeout, max_rss_mb, max_tasks_per_child, max_growth_mb)
+        self.reset_stats()
+
+    def set_limits(self, timeout=None, max_rss_mb=None, max_tasks_per_child=None, max_growth_mb=None):
+        """Change the per-task limits (see __init__); applies to the next tasks."""
+        self.timeout = timeout
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_growth = max_growth_mb * 1024 * 1024 if max_growth_mb else None
+
+        if (self.max_rss or self.max_growth) and rss_bytes(os.getpid()) is None:
+            print("  ⚠ Cannot measure process memory on this platform; memory limits disabled")
+            self.max_rss = None
+            self.max_growth = None
+
+    def reset_stats(self):
+        """Clear the kill/recycle counters and utilization figures."""
+        self.killed = 0
+        self.recycled = 0
+        self.wall_seconds = 0.0
+        self.slot_stats = [{'tasks': 0, 'busy_seconds': 0.0, 'killed': 0, 'recycled': 0}
+                           for _ in range(self.processes)]
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def start(self):
+        """Start any missing workers now rather than on the first task."""
+        if self._closed:
+            raise ValueError("Pool is closed")
+        while len(self._workers) < self.processes:
+            self._workers.append(self._spawn(len(self._workers)))
+
+    def _spawn(self, slot):
+        return _Worker(self._ctx, self.func, self.initializer, self.initargs, slot)
+
+    def _account(self, worker):
+        """Add the finished task's busy time to its slot."""
+        stats = self.slot_stats[worker.slot]
+        stats['tasks'] += 1
+        stats['busy_seconds'] += time.monotonic() - worker.started
+
+    def _swap(self, worker):
+        """Kill a worker and start a fresh one in its slot."""
+        worker.kill()
+        self.killed += 1
+        self.slot_stats[worker.slot]['killed'] += 1
+        replacement = self._spawn(worker.slot)
+        self._workers[worker.slot] = replacement
+        return replacement
+
+    def _maybe_recycle(self, worker):
+        """
+        Replace an idle worker that has done enough tasks or grown too much.
+
+        Returns:
+            _Worker: The worker to use for the next task
+        """
+        if not worker.tasks_done:
+            return worker
+        reason = self.max_tasks_per_child and worker.tasks_done >= self.max_tasks_per_child
+        if not reason and self.max_growth:
+            rss = rss_bytes(worker.process.pid)
+            if rss is not None:
+                if worker.baseline_rss is None:
+                    worker.baseline_rss = rss
+                elif rss - worker.baseline_rss > self.max_growth:
+                    reason = True
+        if not reason:
+            return worker
+
+        worker.retire()
+        self.recycled += 1
+        self.slot_stats[worker.slot]['recycled'] += 1
+        replacement = self._spawn(worker.slot)
+        self._workers[worker.slot] = replacement
+        return replacement
+
+    def utilization(self):
+        """
+        Busy share of each worker slot over the time spent in imap_unordered.
+
+        Returns:
+            list: One dict per slot with slot, tasks, busy_seconds, killed,
+                  recycled and utilization (0-1)
+        """
+        wall = max(self.wall_seconds, 1e-9)
+        return [dict(stats, slot=slot, utilization=min(1.0, stats['busy_seconds'] / wall))
+                for slot, stats in enumerate(self.slot_stats)]
+
+    def _limit_exceeded(self, worker, now):
+        """Return (error_class, reason) if a busy worker broke a limit, else None."""
+        if self.timeout and now - worker.started > self.timeout:
+            return TASK_TIMEOUT, f"timeout after {self.timeout:g}s"
+        if self.max_rss:
+            rss = rss_bytes(worker.process.pid)
+            if rss is not None and rss > self.max_rss:
+                return MEMORY_LIMIT_EXCEEDED, (f"memory limit exceeded ({rss / 1024 / 1024:.0f} MB > "
+                                               f"{self.max_rss / 1024 / 1024:.0f} MB)")
+        return None
+
+    def _failed(self, worker, error_class, reason):
+        """TaskResult for the task a worker was on when it was lost."""
+        return TaskResult(worker.index, worker.task, None, reason, error_class,
+                          time.monotonic() - worker.started)
+
+    def imap_unordered(self, tasks, func=None):
+        """
+        Apply func to every task, yielding results as they complete.
+
+        Args:
+            tasks (iterable): Task arguments. A long-running source may yield
+                              IDLE when it has nothing to hand out yet; the
+                              pool then keeps polling it until it is exhausted
+            func (callable, optional): Picklable function for these tasks
+                                       (default: the pool's func)
+
+        Yields:
+            TaskResult: One per task, in completion order
+        """
+        if func is None and self.func is None:
+            raise ValueError("No function given for the tasks")
+        self.start()
+
+        started = time.monotonic()
+        try:
+            yield from self._run(tasks, func)
+        finally:
+            self.wall_seconds += time.monotonic() - started
+
+    def _run(self, tasks, func):
+        """Dispatch tasks to free workers and enforce limits until all finish."""
+        queue = iter(enumerate(tasks))
+        exhausted = False
+        # Set once the source has yielded IDLE: idle workers are then offered
+        # work on every poll, not only when a task finishes
+        waiting = False
+
+        def feed(worker):
+            nonlocal exhausted, waiting
+            if exhausted or self._closed:
+                return
+            try:
+                index, task = next(queue)
+            except StopIteration:
+                exhausted = True
+                return
+            if task is IDLE:
+                waiting = True
+                return
+            # Recycle only when there is more work, not after the last task
+            self._maybe_recycle(worker).submit(index, task, func)
+
+        for worker in self._workers:
+            feed(worker)
+
+        while True:
+            if waiting:
+                for worker in list(self._workers):
+                    if not worker.busy:
+                        feed(worker)
+            if not any(worker.busy for worker in self._workers):
+                if not waiting or exhausted or self._closed:
+                    return
+                time.sleep(self.poll_interval)
+                continue
+            busy = {worker.conn: worker for worker in self._workers if worker.busy}
+            try:
+                ready = wait(list(busy) + [w.process.sentinel for w in busy.values()],
+                             timeout=self.poll_interval)
+            except (OSError, ValueError):
+                if self._closed:
+                    return
+                raise
+
+            for worker in list(busy.values()):
+                # terminate() may be called from a signal handler mid-loop
+                if self._closed:
+                    return
+                if worker.conn in ready:
+                    try:
+                        index, status, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        pass
+                    else:
+                        task = worker.task
+                        elapsed = time.monotonic() - worker.started
+                        self._account(worker)
+                        worker.release()
+                        worker.tasks_done += 1
+                        if status == 'ok':
+                            yield TaskResult(index, task, value, None, None, elapsed)
+                        else:
+                            error_class, message = value
+                            yield TaskResult(index, task, None, f"{error_class}: {message}",
+                                             error_class, elapsed)
+                        feed(worker)
+                        continue
+                elif worker.process.sentinel not in ready:
+                    continue
+                # The process died without answering
+                worker.process.join()
+                result = self._failed(worker, WORKER_CRASHED,
+                                      f"worker crashed (exit code {worker.process.exitcode})")
+                self._account(worker)
+                new_worker = self._swap(worker)
+                yield result
+                feed(new_worker)
+
+            if self._closed:
+                return
+            now = time.monotonic()
+            for worker in [w for w in self._workers if w.busy]:
+                exceeded = self._limit_exceeded(worker, now)
+                if exceeded:
+                    result = self._failed(worker, *exceeded)
+                    self._account(worker)
+                    new_worker = self._swap(worker)
+                    yield result
+                    feed(new_worker)
+
+    def close(self):
+        """Ask idle workers to exit once they finish."""
+        self._closed = True
+        for worker in self._workers:
+            worker.stop()
+
+    def join(self):
+        for worker in self._workers:
+            worker.process.join()
+            worker.conn.close()
+        self._workers = []
+
+    def terminate(self):
+        """Kill all workers immediately."""
+        self._closed = True
+        for worker in self._workers:
+            worker.kill()
+        self._workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.terminate()
+        return False
@@ -13,6 +13,7 @@ from datetime import datetime
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from tools.labeling.config import get_labels, get_thresholds, get_num_classes, print_config_summary
+from src.ml_engine.feature_store import load_features
 
 
 def auto_label_file_4(features: dict) -> int:
@@ -200,7 +201,8 @@ def auto_label_all(features_csv: Path, output_csv: Path, config: str = "5_labels
     
     # Load features
     print(f"\n📂 Loading features from: {features_csv}")
-    df_features = pd.read_csv(features_csv)
+    # widen: compare against the thresholds with the values as extracted
+    df_features = load_features(features_csv, widen=True)
     print(f"✓ Loaded {len(df_features)} files")
     
     # Select labeling function
@@ -260,7 +262,7 @@ def main():
         "--features",
         type=Path,
         default=Path("data/processed/features_all.csv"),
-        help="Path to features CSV file"
+        help="Path to features CSV file or feature store (an up-to-date .fstore next to the CSV is used)"
     )
     parser.add_argument(
         "--output",
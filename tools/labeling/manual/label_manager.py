@@ -13,12 +13,16 @@ from typing import Dict, List, Optional, Tuple
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from tools.labeling.config import get_labels, get_config_info, DEFAULT_CONFIG
+from src.ml_engine.feature_registry import FEATURE_NAMES, cast_feature
+from src.ml_engine.feature_store import load_features
+from src.ml_engine.midi_fingerprint import load_duplicate_groups
 
 
 class LabelManager:
     """Manages labels for MIDI files."""
     
-    def __init__(self, features_csv: str, labels_csv: str, progress_file: str, config_name: str = DEFAULT_CONFIG):
+    def __init__(self, features_csv: str, labels_csv: str, progress_file: str, config_name: str = DEFAULT_CONFIG,
+                 duplicates_csv: Optional[str] = None):
         """
         Initialize Label Manager.
         
@@ -27,6 +31,9 @@ class LabelManager:
             labels_csv: Path to labels CSV file (will be created if doesn't exist)
             progress_file: Path to progress JSON file
             config_name: Label configuration name (e.g. "4_labels" or "5_labels")
+            duplicates_csv: Duplicate-group manifest (see midi_fingerprint.py). Only
+                            group representatives are queued, and their labels are
+                            copied to the other files in the group
         """
         self.features_csv = Path(features_csv)
         self.labels_csv = Path(labels_csv)
@@ -38,9 +45,18 @@ class LabelManager:
         self.config_info = get_config_info(config_name)
         
         # Load features
-        self.features_df = pd.read_csv(self.features_csv)
+        self.features_df = load_features(self.features_csv, widen=True)
         print(f"✓ Loaded {len(self.features_df)} MIDI files from features")
         
+        # Label one file per duplicate group
+        self.duplicate_groups = load_duplicate_groups(duplicates_csv) if duplicates_csv else {}
+        if self.duplicate_groups:
+            duplicates = {name for names in self.duplicate_groups.values() for name in names}
+            self.features_df = self.features_df[
+                ~self.features_df['midi_filename'].isin(duplicates)
+            ].reset_index(drop=True)
+            print(f"✓ {len(duplicates)} duplicates share the label of their group representative")
+        
         # Load or create labels
         self._load_or_create_labels()
         
@@ -105,19 +121,9 @@ class LabelManager:
             'index': current_idx,
             'total': len(self.features_df),
             'filename': row['midi_filename'],
-            'features': {
-                'max_stretch': float(row['max_stretch']),
-                'max_chord_size': int(row['max_chord_size']),
-                'note_density': float(row['note_density']),
-                'left_hand_activity': float(row['left_hand_activity']),
-                'avg_tempo': float(row['avg_tempo']),
-                'dynamic_range': float(row['dynamic_range']),
-                'poly_voice_count': float(row['poly_voice_count']),
-                'octave_jump_frequency': float(row['octave_jump_frequency']),
-                'thirds_frequency': float(row['thirds_frequency']),
-                'polyrhythm_score': float(row['polyrhythm_score'])
-            },
+            'features': {name: cast_feature(name, row[name]) for name in FEATURE_NAMES},
             'existing_label': int(existing_label.iloc[0]['difficulty_label']) if len(existing_label) > 0 else None,
+            'duplicates': self.duplicate_groups.get(row['midi_filename'], []),
             'progress_percent': (self.progress['labeled_count'] / self.progress['total_count']) * 100
         }
         
@@ -140,25 +146,13 @@ class LabelManager:
             print(f"❌ Invalid label: {label}")
             return False
         
-        # Check if label already exists
-        existing = self.labels_df[self.labels_df['midi_filename'] == filename]
-        
-        if len(existing) > 0:
-            # Update existing label
-            self.labels_df.loc[self.labels_df['midi_filename'] == filename, 'difficulty_label'] = label
-            self.labels_df.loc[self.labels_df['midi_filename'] == filename, 'timestamp'] = datetime.now().isoformat()
-            self.labels_df.loc[self.labels_df['midi_filename'] == filename, 'confidence'] = confidence
-        else:
-            # Add new label
-            new_label = pd.DataFrame([{
-                'midi_filename': filename,
-                'difficulty_label': label,
-                'timestamp': datetime.now().isoformat(),
-                'confidence': confidence
-            }])
-            self.labels_df = pd.concat([self.labels_df, new_label], ignore_index=True)
+        if self._set_label(filename, label, confidence):
             self.progress['labeled_count'] += 1
         
+        # Duplicates get the same label but do not count towards progress
+        for duplicate in self.duplicate_groups.get(filename, []):
+            self._set_label(duplicate, label, confidence)
+        
         # Save to CSV
         self.labels_csv.parent.mkdir(parents=True, exist_ok=True)
         self.labels_df.to_csv(self.labels_csv, index=False)
@@ -168,6 +162,28 @@ class LabelManager:
         
         return True
     
+    def _set_label(self, filename: str, label: int, confidence: int) -> bool:
+        """Add or update one row of labels_df. Returns True if the row is new."""
+        # Check if label already exists
+        existing = self.labels_df[self.labels_df['midi_filename'] == filename]
+        
+        if len(existing) > 0:
+            # Update existing label
+            self.labels_df.loc[self.labels_df['midi_filename'] == filename, 'difficulty_label'] = label
+            self.labels_df.loc[self.labels_df['midi_filename'] == filename, 'timestamp'] = datetime.now().isoformat()
+            self.labels_df.loc[self.labels_df['midi_filename'] == filename, 'confidence'] = confidence
+            return False
+        
+        # Add new label
+        new_label = pd.DataFrame([{
+            'midi_filename': filename,
+            'difficulty_label': label,
+            'timestamp': datetime.now().isoformat(),
+            'confidence': confidence
+        }])
+        self.labels_df = pd.concat([self.labels_df, new_label], ignore_index=True)
+        return True
+    
     def next_file(self) -> Optional[Dict]:
         """Move to next file and return its info."""
         self.progress['current_index'] += 1
@@ -208,7 +224,9 @@ class LabelManager:
             'total_labeled': len(self.labels_df),
             'total_files': len(self.features_df),
             'label_distribution': label_distribution,
-            'completion_percent': (len(self.labels_df) / len(self.features_df)) * 100
+            # Labels copied to duplicates are not part of the queue
+            'completion_percent': float(self.labels_df['midi_filename'].isin(self.features_df['midi_filename']).sum()
+                                   / len(self.features_df)) * 100
         }
 
     def get_config(self) -> Dict:
@@ -30,6 +30,8 @@ features_csv = project_root / "data" / "processed" / "features_all.csv"
 # Labels file specific to config
 labels_csv = project_root / "data" / "processed" / "labels" / f"manual_{args.config}.csv"
 progress_file = project_root / "data" / "processed" / "labels" / f"progress_{args.config}.json"
+# Written by scripts/extract_features.py --dedupe; labels are shared within a group
+duplicates_csv = project_root / "data" / "processed" / "duplicate_groups.csv"
 
 print(f"\n🚀 Starting Server with Config: {args.config}")
 print(f"📁 Labels File: {labels_csv}")
@@ -38,7 +40,8 @@ manager = LabelManager(
     str(features_csv),
     str(labels_csv),
     str(progress_file),
-    config_name=args.config
+    config_name=args.config,
+    duplicates_csv=str(duplicates_csv)
 )
 
 